@@ -0,0 +1,144 @@
+# backend/accounts/audit.py
+# Buffered writer for LogEvent rows: requests enqueue events in memory and a
+# background thread inserts them with bulk_create, so the request path no longer
+# pays for a synchronous INSERT.
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSink:
+    """
+    Queues LogEvent instances and flushes them in batches.
+    - batch_size: flush as soon as this many events are waiting
+    - flush_interval: seconds after which a partial batch is flushed anyway
+    - max_queue: events held in memory before new ones are dropped (counted in stats)
+    - buffered=False writes every event synchronously (tests, debugging); None follows
+      settings.AUDIT_LOG_BUFFERED, read on every emit so override_settings applies
+    Pending events are flushed at interpreter exit. Counters are best-effort metrics.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10000, buffered=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffered = buffered
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    @property
+    def buffered(self):
+        if self._buffered is None:
+            return getattr(settings, "AUDIT_LOG_BUFFERED", True)
+        return self._buffered
+
+    def emit(self, event):
+        """Record an unsaved LogEvent."""
+        if not self.buffered:
+            event.save(force_insert=True)
+            self.written += 1
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(event)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        # (re)start the writer lazily, and again in a forked child where the thread is gone
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stop.is_set():
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._write(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+        self._write(batch + self._drain())
+        connections.close_all()
+
+    def _drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _write(self, batch):
+        if not batch:
+            return
+        from .models import LogEvent
+        close_old_connections()
+        for start in range(0, len(batch), self.batch_size):
+            chunk = batch[start:start + self.batch_size]
+            try:
+                LogEvent.objects.bulk_create(chunk)
+                self.written += len(chunk)
+                self.flushes += 1
+            except Exception:
+                self.flush_errors += 1
+                self.dropped += len(chunk)
+                logger.exception("Failed to write %d audit event(s)", len(chunk))
+
+    def flush(self):
+        """Write everything queued so far from the calling thread."""
+        self._write(self._drain())
+
+    def shutdown(self, timeout=5.0):
+        """Stop the writer thread after it flushes what is queued."""
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._stop.set()
+            thread.join(timeout)
+        else:
+            self.flush()
+
+    def stats(self):
+        return {
+            "buffered": self.buffered,
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+        }
+
+
+audit_sink = AuditSink(
+    batch_size=getattr(settings, "AUDIT_LOG_BATCH_SIZE", 200),
+    flush_interval=getattr(settings, "AUDIT_LOG_FLUSH_INTERVAL", 1.0),
+    max_queue=getattr(settings, "AUDIT_LOG_MAX_QUEUE", 10000),
+)
+atexit.register(audit_sink.shutdown)
@@ -0,0 +1,85 @@
+# backend/accounts/logbus.py
+# In-process pub/sub for live log tailing (GET /logs/stream/).
+#
+# log_event() publishes each event from whatever thread it runs in; subscribers are
+# SSE connections living on the ASGI event loop. Filters are evaluated at publish
+# time, so an idle dashboard costs one queue and is never woken for events it
+# does not want. Each subscriber has a bounded queue: when a client reads slower
+# than events arrive, new events are dropped for that client only and it is told
+# how many it missed. The bus is per process; other workers' events are not seen.
+import asyncio
+import threading
+
+from django.conf import settings
+
+
+class Subscription:
+    def __init__(self, loop, matches, max_queue):
+        self.loop = loop
+        self.matches = matches
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        # events dropped since the client was last told about it
+        self.dropped = 0
+
+    def _offer(self, frame):
+        # runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+class LogBus:
+    def __init__(self, max_subscribers=5000, queue_size=256):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subs = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subs)
+
+    def subscribe(self, matches):
+        """Register a subscriber on the running event loop; None when the bus is full."""
+        sub = Subscription(asyncio.get_running_loop(), matches, self.queue_size)
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                return None
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, event, frame):
+        """Offer frame to every subscriber whose filter accepts event (a LogEventSerializer dict). Thread-safe."""
+        with self._lock:
+            subs = list(self._subs)
+        self.published += 1
+        for sub in subs:
+            if not sub.matches(event):
+                continue
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, frame)
+                self.delivered += 1
+            except RuntimeError:
+                # loop already closed: the connection is gone
+                self.unsubscribe(sub)
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subs),
+            "max_subscribers": self.max_subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+log_bus = LogBus(
+    max_subscribers=getattr(settings, "LOG_STREAM_MAX_CLIENTS", 5000),
+    queue_size=getattr(settings, "LOG_STREAM_QUEUE_SIZE", 256),
+)
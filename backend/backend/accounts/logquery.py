@@ -0,0 +1,178 @@
+# backend/accounts/logquery.py
+# Query-string filters and SQL aggregates over LogEvent for the logs endpoints.
+import json
+import re
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.db.models import Count, F
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+PAYLOAD_PREFIX = "payload."
+_KEY_RE = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+HISTOGRAM_INTERVALS = {
+    "minute": (TruncMinute, timedelta(minutes=1)),
+    "hour": (TruncHour, timedelta(hours=1)),
+    "day": (TruncDay, timedelta(days=1)),
+}
+HISTOGRAM_MAX_BUCKETS = 1440
+HISTOGRAM_DEFAULT_BUCKETS = 60
+
+
+class LogQueryError(ValueError):
+    """Invalid filter parameter; the message is returned to the client."""
+
+
+def _parse_time(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    ts = parse_datetime(raw)
+    if ts is None:
+        raise LogQueryError(f"invalid {name}, expected an ISO 8601 datetime")
+    if timezone.is_naive(ts):
+        ts = timezone.make_aware(ts, dt_timezone.utc)
+    return ts
+
+
+def _payload_value(raw):
+    # numbers, booleans and null are matched as JSON; anything else as a string
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return raw
+    return value if not isinstance(value, (dict, list)) else raw
+
+
+def filter_log_events(queryset, params):
+    """
+    Apply the logs query-string filters:
+    - user=<id>, username=<name>
+    - event_type=<type>[,<type>...]
+    - since=<iso datetime> (inclusive), until=<iso datetime> (exclusive)
+    - payload.<key>[.<key>...]=<value>: payload field equals value (JSON scalar or string)
+    - has_key=<key>: payload has the top-level key
+    Raises LogQueryError on malformed values.
+    """
+    if params.get("user"):
+        try:
+            queryset = queryset.filter(user_id=int(params["user"]))
+        except ValueError:
+            raise LogQueryError("invalid user, expected a user id")
+    if params.get("username"):
+        queryset = queryset.filter(user__username=params["username"])
+    if params.get("event_type"):
+        types = [t.strip() for t in params["event_type"].split(",") if t.strip()]
+        queryset = queryset.filter(event_type__in=types)
+    since, until = _parse_time(params, "since"), _parse_time(params, "until")
+    if since:
+        queryset = queryset.filter(timestamp__gte=since)
+    if until:
+        queryset = queryset.filter(timestamp__lt=until)
+
+    for n, (path, value) in enumerate(_payload_filters(params)):
+        if connection.features.supports_json_field_contains:
+            # payload @> {...}: served by the GIN index on PostgreSQL
+            for key in reversed(path):
+                value = {key: value}
+            queryset = queryset.filter(payload__contains=value)
+        else:
+            # built key by key: in a "payload__a__b" lookup string a key named like a
+            # lookup ("contains", "in", "gt") would be taken as that lookup
+            expr = F("payload")
+            for key in path:
+                expr = KeyTransform(key, expr)
+            alias = f"payload_filter_{n}"
+            queryset = queryset.alias(**{alias: expr}).filter(**{alias: value})
+    if _has_key(params):
+        queryset = queryset.filter(payload__has_key=params["has_key"])
+    return queryset
+
+
+def event_matcher(params):
+    """
+    Build a predicate over serialized events ({"user", "event_type", "payload", ...})
+    from the same filters as filter_log_events, for the live stream. Time bounds do
+    not apply and username must already be resolved to user.
+    """
+    user_id = None
+    if params.get("user"):
+        try:
+            user_id = int(params["user"])
+        except ValueError:
+            raise LogQueryError("invalid user, expected a user id")
+    types = {t.strip() for t in (params.get("event_type") or "").split(",") if t.strip()}
+    payload_filters = list(_payload_filters(params))
+    has_key = params["has_key"] if _has_key(params) else None
+
+    def matches(event):
+        if user_id is not None and event.get("user") != user_id:
+            return False
+        if types and event.get("event_type") not in types:
+            return False
+        payload = event.get("payload") or {}
+        if has_key is not None and has_key not in payload:
+            return False
+        for path, value in payload_filters:
+            node = payload
+            for key in path:
+                if not isinstance(node, dict) or key not in node:
+                    return False
+                node = node[key]
+            if node != value or type(node) is not type(value):
+                return False
+        return True
+    return matches
+
+
+def _payload_filters(params):
+    for name, raw in params.items():
+        if not name.startswith(PAYLOAD_PREFIX):
+            continue
+        path = name[len(PAYLOAD_PREFIX):].split(".")
+        if not all(_KEY_RE.match(k) for k in path):
+            raise LogQueryError(f"invalid payload key: {name}")
+        yield path, _payload_value(raw)
+
+
+def _has_key(params):
+    if not params.get("has_key"):
+        return False
+    if not _KEY_RE.match(params["has_key"]):
+        raise LogQueryError("invalid has_key")
+    return True
+
+
+def histogram(queryset, params):
+    """
+    Event counts per time bucket and event_type, grouped in SQL.
+    ?interval=minute|hour|day (default minute). The range defaults to the last
+    60 buckets before until (or now) and may span at most HISTOGRAM_MAX_BUCKETS buckets.
+    """
+    interval = params.get("interval") or "minute"
+    if interval not in HISTOGRAM_INTERVALS:
+        raise LogQueryError("invalid interval, expected minute, hour or day")
+    trunc, step = HISTOGRAM_INTERVALS[interval]
+    until = _parse_time(params, "until") or timezone.now()
+    since = _parse_time(params, "since") or until - step * HISTOGRAM_DEFAULT_BUCKETS
+    if since >= until:
+        raise LogQueryError("since must be before until")
+    if (until - since) / step > HISTOGRAM_MAX_BUCKETS:
+        raise LogQueryError(f"range too large for interval {interval} (max {HISTOGRAM_MAX_BUCKETS} buckets)")
+
+    rows = (queryset.filter(timestamp__gte=since, timestamp__lt=until)
+            .annotate(bucket=trunc("timestamp"))
+            .values("bucket", "event_type")
+            .annotate(count=Count("id"))
+            .order_by("bucket", "event_type"))
+    buckets = []
+    for row in rows:
+        if not buckets or buckets[-1]["t"] != row["bucket"]:
+            buckets.append({"t": row["bucket"], "total": 0, "counts": {}})
+        buckets[-1]["counts"][row["event_type"]] = row["count"]
+        buckets[-1]["total"] += row["count"]
+    return {"interval": interval, "since": since, "until": until, "buckets": buckets}
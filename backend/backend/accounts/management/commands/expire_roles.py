@@ -0,0 +1,39 @@
+# backend/accounts/management/commands/expire_roles.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.accounts.audit import audit_sink
+from backend.accounts.models import LogEvent, RoleRequest
+from backend.accounts.roles import invalidate_role
+
+
+class Command(BaseCommand):
+    help = ("Mark approved role requests (PIM grants) past expires_at as expired, with one bulk UPDATE per "
+            "batch, log a role_expired event for each and drop the affected users' cached roles. "
+            "Grants already stop counting at expires_at; this keeps the grant table and audit trail current.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Grants expired per UPDATE (default: 1000).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the grants that would be expired.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be >= 1")
+        due = RoleRequest.objects.filter(status="approved", expires_at__lte=timezone.now())
+        if options["dry_run"]:
+            self.stdout.write(f"{due.count()} grant(s) would be expired.")
+            return
+
+        total = 0
+        while True:
+            rows = list(due.order_by("expires_at").values_list("id", "user_id", "role_requested")[:batch_size])
+            if not rows:
+                break
+            # status is re-checked so a grant changed meanwhile is left alone
+            total += RoleRequest.objects.filter(pk__in=[r[0] for r in rows], status="approved").update(status="expired")
+            for rr_id, user_id, role in rows:
+                invalidate_role(user_id)
+                audit_sink.emit(LogEvent(user_id=user_id, event_type="role_expired",
+                                         payload={"role_request": str(rr_id), "role": role}))
+        self.stdout.write(self.style.SUCCESS(f"Expired {total} grant(s)."))
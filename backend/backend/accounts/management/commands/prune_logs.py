@@ -0,0 +1,104 @@
+# backend/accounts/management/commands/prune_logs.py
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Min
+from django.utils import timezone
+
+from backend.accounts import partitions
+from backend.accounts.models import LogEvent
+
+
+class Command(BaseCommand):
+    help = ("Archive LogEvent months older than the retention window to gzipped JSONL files and remove them "
+            "(dropping the month's partition on PostgreSQL), then create upcoming partitions.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=getattr(settings, "LOG_RETENTION_DAYS", 90),
+                            help="Keep events newer than this many days; only whole months older than that are pruned.")
+        parser.add_argument("--archive-dir", default=getattr(settings, "LOG_ARCHIVE_DIR", "log_archive"),
+                            help="Directory for logevent-YYYY-MM.jsonl.gz archives (logevent-YYYY-MM.N.jsonl.gz "
+                                 "when a month is pruned again).")
+        parser.add_argument("--no-archive", action="store_true", help="Drop old months without writing archives.")
+        parser.add_argument("--months-ahead", type=int, default=3,
+                            help="Partitions to keep created ahead of the current month (PostgreSQL, default: 3).")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be pruned.")
+
+    def handle(self, *args, **options):
+        partitioned = partitions.is_partitioned()
+        # a month is pruned only once all of it is past the cutoff
+        boundary = partitions.month_start(timezone.now() - timedelta(days=options["days"]))
+
+        months = {}
+        if partitioned:
+            for name, start, end in partitions.list_partitions():
+                if end <= boundary:
+                    months[start] = name
+        oldest = LogEvent.objects.filter(timestamp__lt=boundary).aggregate(t=Min("timestamp"))["t"]
+        if oldest is not None:
+            start = partitions.month_start(oldest)
+            while start < boundary:
+                months.setdefault(start, None)
+                start = partitions.add_months(start, 1)
+
+        if not months:
+            self.stdout.write(f"Nothing older than {boundary:%Y-%m}.")
+        for start in sorted(months):
+            end = partitions.add_months(start, 1)
+            if options["dry_run"]:
+                self.stdout.write(f"Would prune {start:%Y-%m}")
+                continue
+            archived = 0
+            if not options["no_archive"]:
+                archived = self._archive(start, end, options["archive_dir"])
+            if months[start]:
+                partitions.drop_partition(months[start])
+            # rows of that month kept in the DEFAULT partition (or the plain table on other backends)
+            deleted, _ = LogEvent.objects.filter(timestamp__gte=start, timestamp__lt=end).delete()
+            self.stdout.write(f"Pruned {start:%Y-%m}: {archived} archived, partition "
+                              f"{'dropped' if months[start] else 'n/a'}, {deleted} row(s) deleted")
+
+        if partitioned and not options["dry_run"]:
+            for name in partitions.ensure_partitions(options["months_ahead"]):
+                self.stdout.write(f"Created partition {name}")
+
+    def _archive(self, start, end, archive_dir):
+        """
+        Stream one month of events to <archive_dir>/logevent-YYYY-MM.jsonl.gz (skipped if empty); returns the row count.
+        A month pruned again (e.g. late rows, or a retention change) gets the next free logevent-YYYY-MM.N.jsonl.gz,
+        so earlier archives are never overwritten.
+        """
+        os.makedirs(archive_dir, exist_ok=True)
+        # write aside and link into place, so a crash never leaves a truncated archive under a final name
+        tmp = os.path.join(archive_dir, f"logevent-{start:%Y-%m}.jsonl.gz.tmp")
+        count = 0
+        rows = (LogEvent.objects.filter(timestamp__gte=start, timestamp__lt=end)
+                .order_by("timestamp", "id")
+                .values("id", "user_id", "event_type", "payload", "timestamp")
+                .iterator(chunk_size=2000))
+        with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+            for row in rows:
+                fh.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n")
+                count += 1
+        if count:
+            self._publish(tmp, archive_dir, start)
+        os.remove(tmp)
+        return count
+
+    @staticmethod
+    def _publish(tmp, archive_dir, start):
+        # os.link fails instead of replacing an existing file, unlike os.replace
+        n = 0
+        while True:
+            suffix = f".{n}" if n else ""
+            path = os.path.join(archive_dir, f"logevent-{start:%Y-%m}{suffix}.jsonl.gz")
+            try:
+                os.link(tmp, path)
+                return path
+            except FileExistsError:
+                n += 1
@@ -0,0 +1,45 @@
+# backend/accounts/management/commands/purge_tokens.py
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.accounts.models import VerificationToken
+
+
+class Command(BaseCommand):
+    help = ("Delete expired email/SMS verification tokens in bounded batches (one short DELETE each, "
+            "oldest first), so the table only holds live tokens. Safe to stop and rerun at any time.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tokens deleted per DELETE (default: 1000).")
+        parser.add_argument("--grace-minutes", type=int, default=0,
+                            help="Keep tokens expired for less than this many minutes (default: 0).")
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches, to throttle the load (default: 0).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the tokens that would be deleted.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be >= 1")
+        cutoff = timezone.now() - timedelta(minutes=options["grace_minutes"])
+        expired = VerificationToken.objects.filter(expires_at__lt=cutoff)
+        if options["dry_run"]:
+            self.stdout.write(f"{expired.count()} expired token(s) would be deleted.")
+            return
+
+        total = 0
+        while True:
+            # ids first, so each DELETE is bounded on every backend (no DELETE ... LIMIT needed)
+            ids = list(expired.order_by("expires_at").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = VerificationToken.objects.filter(pk__in=ids).delete()
+            total += deleted
+            if len(ids) < batch_size:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} expired token(s)."))
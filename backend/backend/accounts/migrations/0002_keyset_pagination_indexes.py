@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inboxmessage',
+            index=models.Index(fields=['-created_at', '-id'], name='inbox_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inboxmessage',
+            index=models.Index(fields=['type', '-created_at', '-id'], name='inbox_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logevent',
+            index=models.Index(fields=['-timestamp', '-id'], name='logevent_ts_idx'),
+        ),
+    ]
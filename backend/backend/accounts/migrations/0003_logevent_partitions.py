@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:56
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+TABLE = "accounts_logevent"
+MONTHS_AHEAD = 3
+
+
+def _month(dt, n=0):
+    index = dt.year * 12 + dt.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _rebuild(schema_editor, partitioned):
+    """
+    Recreate accounts_logevent as a monthly range-partitioned table (or back to a
+    plain one), copying rows, constraints and indexes. PostgreSQL only; other
+    backends keep the plain table.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    old = f"{TABLE}_old"
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() "
+            "AND tablename = %s AND indexname <> %s", [TABLE, f"{TABLE}_pkey"])
+        indexdefs = [row[0].replace(" ON ONLY ", " ON ") for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE])
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {old}")
+
+        if partitioned:
+            cursor.execute(f'CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS) PARTITION BY RANGE ("timestamp")')
+            cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+            cursor.execute(f'SELECT min("timestamp") FROM {old}')
+            now = datetime.now(dt_timezone.utc)
+            start = _month(min(cursor.fetchone()[0] or now, now).astimezone(dt_timezone.utc))
+            last = _month(now, MONTHS_AHEAD)
+            while start <= last:
+                end = _month(start, 1)
+                cursor.execute(
+                    f"CREATE TABLE {TABLE}_p{start:%Y%m} PARTITION OF {TABLE} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')")
+                start = end
+            # the partition key has to be part of the primary key
+            primary_key = '(id, "timestamp")'
+        else:
+            cursor.execute(f"CREATE TABLE {TABLE} (LIKE {old} INCLUDING DEFAULTS)")
+            primary_key = "(id)"
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {old}")
+        # drops the old indexes (and partitions) so their names can be reused
+        cursor.execute(f"DROP TABLE {old} CASCADE")
+        cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY {primary_key}")
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}")
+        for definition in indexdefs:
+            cursor.execute(definition)
+
+
+def partition_logevent(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_logevent(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_keyset_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logevent',
+            index=models.Index(fields=['user', 'timestamp'], name='logevent_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='logevent',
+            index=models.Index(fields=['event_type', 'timestamp'], name='logevent_type_ts_idx'),
+        ),
+        migrations.RunPython(partition_logevent, unpartition_logevent),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_payload_gin(apps, schema_editor):
+    # payload @> {...} filters on /logs/ (PostgreSQL only; other backends scan)
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE INDEX IF NOT EXISTS logevent_payload_gin ON accounts_logevent USING gin (payload)")
+
+
+def drop_payload_gin(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS logevent_payload_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_logevent_partitions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_payload_gin, drop_payload_gin),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_logevent_payload_gin'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rolerequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'pending'), ('approved', 'approved'), ('rejected', 'rejected'), ('expired', 'expired')], default='pending', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='rolerequest',
+            index=models.Index(fields=['user', 'status'], name='rolereq_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rolerequest',
+            index=models.Index(fields=['status', 'expires_at'], name='rolereq_status_expiry_idx'),
+        ),
+    ]
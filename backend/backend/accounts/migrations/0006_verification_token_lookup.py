@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_role_grant_expiry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationtoken',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='verificationtoken',
+            index=models.Index(fields=['user', 'type', '-created_at'], name='vtoken_user_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationtoken',
+            index=models.Index(fields=['expires_at'], name='vtoken_expires_idx'),
+        ),
+    ]
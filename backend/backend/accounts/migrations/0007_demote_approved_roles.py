@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.db.models import F
+
+from backend.accounts.roles import invalidate_role
+
+BASE_ROLE = "reader"
+
+
+def demote_approved_roles(apps, schema_editor):
+    """
+    Approving a role request used to overwrite Profile.role, so those elevations never
+    ended. The role now comes from the time-bound grant (roles.py): a base role equal to
+    the user's latest approved grant is reset to reader, and the grant keeps it until
+    expires_at. Self-approvals are skipped (the approver was already an admin); each
+    demotion is recorded as a role_demoted log event.
+    """
+    Profile = apps.get_model("accounts", "Profile")
+    RoleRequest = apps.get_model("accounts", "RoleRequest")
+    LogEvent = apps.get_model("accounts", "LogEvent")
+    latest = {}
+    grants = (RoleRequest.objects.filter(status__in=("approved", "expired"))
+              .exclude(role_requested=BASE_ROLE)
+              .order_by("user_id", F("approved_at").desc(nulls_last=True), "-requested_at"))
+    for grant in grants.iterator(chunk_size=1000):
+        latest.setdefault(grant.user_id, grant)
+    demoted = []
+    for profile in Profile.objects.filter(user_id__in=list(latest)).exclude(role=BASE_ROLE):
+        grant = latest[profile.user_id]
+        if profile.role != grant.role_requested or grant.approved_by_id == grant.user_id:
+            continue
+        LogEvent.objects.create(user_id=profile.user_id, event_type="role_demoted",
+                                payload={"role": profile.role, "base_role": BASE_ROLE,
+                                         "role_request": str(grant.id), "reason": "permanent approval"})
+        profile.role = BASE_ROLE
+        demoted.append(profile)
+    Profile.objects.bulk_update(demoted, ["role"], batch_size=1000)
+    # historical models do not fire signals.py, so drop the cached roles here
+    for profile in demoted:
+        invalidate_role(profile.user_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_verification_token_lookup'),
+    ]
+
+    operations = [
+        migrations.RunPython(demote_approved_roles, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,9 @@
 # Database models for account-related features.
 import uuid
 import hashlib
+import hmac
 from django.db import models
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
@@ -11,6 +13,7 @@ class VerificationToken(models.Model):
     """
     Stores a verification token for email/sms with a hashed token.
     Raw tokens are not stored, only a SHA256 hash is stored for demo safety. Provides hash_token and check helper.
+    attempts counts verification tries; `manage.py purge_tokens` deletes expired tokens.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -18,13 +21,27 @@ class VerificationToken(models.Model):
     type = models.CharField(max_length=10, choices=(('email','email'), ('sms','sms')))
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # latest token of a user and type (VerifyEmailView / VerifySMSView)
+            models.Index(fields=["user", "type", "-created_at"], name="vtoken_user_type_created_idx"),
+            # purge_tokens: expired tokens, oldest first
+            models.Index(fields=["expires_at"], name="vtoken_expires_idx"),
+        ]
 
     @staticmethod
     def hash_token(raw: str):
         return hashlib.sha256(raw.encode('utf-8')).hexdigest()
 
     def verify(self, raw: str):
-        return self.token_hash == self.hash_token(raw)
+        return hmac.compare_digest(self.token_hash, self.hash_token(raw))
+
+    def register_attempt(self, max_attempts: int) -> bool:
+        """Count one verification attempt with an atomic UPDATE; False once max_attempts are used up."""
+        used = VerificationToken.objects.filter(pk=self.pk, attempts__lt=max_attempts).update(attempts=F('attempts') + 1)
+        return bool(used)
 
 class InboxMessage(models.Model):
     """
@@ -40,6 +57,13 @@ class InboxMessage(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # keyset pagination, optionally filtered by type (InboxListView)
+            models.Index(fields=["-created_at", "-id"], name="inbox_created_idx"),
+            models.Index(fields=["type", "-created_at", "-id"], name="inbox_type_created_idx"),
+        ]
+
 class Profile(models.Model):
     """
     Extra fields for users: totp_secret and role.
@@ -55,8 +79,10 @@ class Profile(models.Model):
 class RoleRequest(models.Model):
     """
     PIM: user requests a role; admin approves. expires_at is when elevated rights end.
+    An approved request grants role_requested on top of Profile.role (the base role)
+    until expires_at (see roles.py); `manage.py expire_roles` then marks it expired.
     """
-    STATUS = (('pending','pending'), ('approved','approved'), ('rejected','rejected'))
+    STATUS = (('pending','pending'), ('approved','approved'), ('rejected','rejected'), ('expired','expired'))
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     role_requested = models.CharField(max_length=20)
@@ -66,9 +92,19 @@ class RoleRequest(models.Model):
     approved_at = models.DateTimeField(null=True, blank=True)
     expires_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # effective role resolution (a user's approved grants)
+            models.Index(fields=["user", "status"], name="rolereq_user_status_idx"),
+            # expire_roles: approved grants past expires_at
+            models.Index(fields=["status", "expires_at"], name="rolereq_status_expiry_idx"),
+        ]
+
 class LogEvent(models.Model):
     """
     Structured log events for the UI (SIEM-like demo).
+    On PostgreSQL the table is range-partitioned by month on timestamp (see
+    partitions.py); its primary key there is (id, timestamp).
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
@@ -78,3 +114,11 @@ class LogEvent(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # keyset pagination (LogsListView)
+            models.Index(fields=["-timestamp", "-id"], name="logevent_ts_idx"),
+            models.Index(fields=["user", "timestamp"], name="logevent_user_ts_idx"),
+            models.Index(fields=["event_type", "timestamp"], name="logevent_type_ts_idx"),
+            # PostgreSQL also gets a GIN index on payload (migration 0004, raw SQL so
+            # the SQLite fallback keeps migrating)
+        ]
@@ -0,0 +1,95 @@
+# backend/accounts/partitions.py
+# Monthly range partitions of the LogEvent table (PostgreSQL only).
+#
+# Layout: accounts_logevent is partitioned by RANGE ("timestamp") with one child
+# per calendar month (UTC), named accounts_logevent_pYYYYMM, plus a DEFAULT
+# partition catching rows outside every month created so far. Old months are
+# archived and dropped by `manage.py prune_logs`, which also creates upcoming ones.
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from .models import LogEvent
+
+TABLE = LogEvent._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+_NAME_RE = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+
+def month_start(dt):
+    dt = dt.astimezone(dt_timezone.utc)
+    return datetime(dt.year, dt.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(start, n):
+    index = start.year * 12 + start.month - 1 + n
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    return f"{TABLE}_p{start:%Y%m}"
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Return [(name, start, end)] of the monthly partitions, oldest first (DEFAULT excluded)."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)", [TABLE])
+        names = [row[0] for row in cursor.fetchall()]
+    parts = []
+    for name in names:
+        m = _NAME_RE.match(name)
+        if m:
+            start = datetime(int(m.group(1)), int(m.group(2)), 1, tzinfo=dt_timezone.utc)
+            parts.append((name, start, add_months(start, 1)))
+    return sorted(parts, key=lambda p: p[1])
+
+
+def create_partition(start):
+    """
+    Create the partition for the month beginning at start. Rows of that month that
+    already landed in the DEFAULT partition are moved into it first (PostgreSQL
+    refuses to attach a range the DEFAULT partition still holds rows for).
+    """
+    end = add_months(start, 1)
+    name = partition_name(start)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE "timestamp" >= %s AND "timestamp" < %s '
+            f'RETURNING *) INSERT INTO {name} SELECT * FROM moved', [start, end])
+        cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}')
+    return name
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """Create any missing partitions from the current month to months_ahead months ahead. Returns their names."""
+    existing = {name for name, _, _ in list_partitions()}
+    current = month_start(now or datetime.now(dt_timezone.utc))
+    created = []
+    for n in range(months_ahead + 1):
+        start = add_months(current, n)
+        if partition_name(start) not in existing:
+            created.append(create_partition(start))
+    return created
+
+
+def drop_partition(name):
+    if not _NAME_RE.match(name):
+        raise ValueError(f"Not a LogEvent partition: {name}")
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE {name}")
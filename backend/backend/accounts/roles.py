@@ -0,0 +1,95 @@
+# backend/accounts/roles.py
+# Effective role resolution for permission checks.
+#
+# A user's effective role is the highest of their base role (Profile.role) and the
+# roles of their approved, unexpired RoleRequests (PIM grants). Resolving it takes two
+# indexed single-table queries; the result is cached per user in Django's cache until
+# the earliest grant expiry (at most ROLE_CACHE_TTL seconds), so an elevation ends on
+# time without any job running, and the hot path does no query at all. Saving a
+# Profile or RoleRequest drops the user's entry (signals.py). That only reaches every
+# process when CACHES points at a shared backend (Redis, Memcached, database), so with
+# a per-process one (the default LocMemCache) "admin" is never cached: a demoted admin
+# loses admin rights at once everywhere, while other roles may lag ROLE_CACHE_TTL.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Profile, RoleRequest
+
+ROLE_RANK = {"reader": 0, "operator": 1, "admin": 2}
+DEFAULT_ROLE = "reader"
+CACHE_PREFIX = "effective-role:"
+# roles only cached when the cache is shared by all processes (see above)
+UNCACHED_LOCAL_ROLES = ("admin",)
+
+
+def _cache_is_shared():
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def resolve_role(user_id, now=None):
+    """
+    Compute (role, valid_until) from the database. valid_until is the earliest
+    expiry of an active grant, when the result may change, or None.
+    """
+    now = now or timezone.now()
+    role = Profile.objects.filter(user_id=user_id).values_list("role", flat=True).first() or DEFAULT_ROLE
+    grants = (RoleRequest.objects
+              .filter(user_id=user_id, status="approved")
+              .filter(Q(expires_at__isnull=True) | Q(expires_at__gt=now))
+              .values_list("role_requested", "expires_at"))
+    valid_until = None
+    for granted, expires_at in grants:
+        if ROLE_RANK.get(granted, -1) > ROLE_RANK.get(role, 0):
+            role = granted
+        if expires_at is not None and (valid_until is None or expires_at < valid_until):
+            valid_until = expires_at
+    return role, valid_until
+
+
+def effective_role(user_id):
+    """Cached effective role of a user (see module docstring)."""
+    key = CACHE_PREFIX + str(user_id)
+    role = cache.get(key)
+    if role is not None:
+        return role
+    now = timezone.now()
+    role, valid_until = resolve_role(user_id, now)
+    ttl = getattr(settings, "ROLE_CACHE_TTL", 60)
+    if valid_until is not None:
+        # rounded down, so the entry never outlives the grant
+        ttl = min(ttl, int((valid_until - now).total_seconds()))
+    if role in UNCACHED_LOCAL_ROLES and not _cache_is_shared():
+        return role
+    if ttl > 0:
+        cache.set(key, role, ttl)
+    return role
+
+
+def invalidate_role(user_id):
+    cache.delete(CACHE_PREFIX + str(user_id))
+
+
+def _http_request(request):
+    # DRF's Request wraps the HttpRequest; memoize on the latter so both see it
+    return getattr(request, "_request", request)
+
+
+def request_role(request):
+    """Effective role of request.user, memoized for the request; None when anonymous."""
+    http = _http_request(request)
+    role = getattr(http, "_cached_role", None)
+    if role is not None:
+        return role
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    role = http._cached_role = effective_role(user.pk)
+    return role
+
+
+def is_admin(request):
+    return request_role(request) == "admin"
@@ -1,10 +1,12 @@
 # Hooks into Django lifecycle to auto-create Profile when a User is created
 #Listens to post_save for User and creates a Profile for new users.
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Profile
+from .models import Profile, RoleRequest
+from .roles import invalidate_role
 
 User = get_user_model()
 
@@ -12,3 +14,11 @@ User = get_user_model()
 def create_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+@receiver([post_save, post_delete], sender=Profile)
+@receiver([post_save, post_delete], sender=RoleRequest)
+def drop_cached_role(sender, instance, **kwargs):
+    # base role or a grant changed (e.g. approved): resolve the effective role again,
+    # once committed so a concurrent resolve cannot re-cache the old role
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_role(user_id))
@@ -0,0 +1,61 @@
+# backend/accounts/tests/test_audit.py
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from backend.accounts.audit import AuditSink, audit_sink
+from backend.accounts.models import LogEvent
+
+User = get_user_model()
+
+
+class AuditSinkTests(TestCase):
+    def event(self, n=0):
+        return LogEvent(event_type="test_event", payload={"n": n})
+
+    def test_unbuffered_writes_at_once(self):
+        sink = AuditSink(buffered=False)
+        sink.emit(self.event())
+        self.assertEqual(LogEvent.objects.filter(event_type="test_event").count(), 1)
+        self.assertEqual(sink.stats()["written"], 1)
+
+    def test_buffered_setting_is_read_on_emit(self):
+        sink = AuditSink(max_queue=10)
+        # the writer thread is not started here; flush() writes from this thread
+        sink._ensure_thread = lambda: None
+        with override_settings(AUDIT_LOG_BUFFERED=True):
+            self.assertTrue(sink.buffered)
+            sink.emit(self.event())
+            self.assertFalse(LogEvent.objects.exists())
+        with override_settings(AUDIT_LOG_BUFFERED=False):
+            self.assertFalse(sink.buffered)
+            sink.emit(self.event(1))
+        self.assertEqual(LogEvent.objects.count(), 1)
+        sink.flush()
+        self.assertEqual(LogEvent.objects.count(), 2)
+        self.assertEqual({k: sink.stats()[k] for k in ("enqueued", "written", "queued")},
+                         {"enqueued": 1, "written": 2, "queued": 0})
+
+    @override_settings(AUDIT_LOG_BUFFERED=True)
+    def test_full_queue_drops_events(self):
+        sink = AuditSink(max_queue=2)
+        sink._ensure_thread = lambda: None
+        for n in range(3):
+            sink.emit(self.event(n))
+        self.assertEqual((sink.stats()["queued"], sink.stats()["dropped"]), (2, 1))
+
+    def test_flush_writes_in_batches(self):
+        sink = AuditSink(batch_size=2, buffered=True)
+        sink._ensure_thread = lambda: None
+        for n in range(5):
+            sink.emit(self.event(n))
+        sink.flush()
+        self.assertEqual(LogEvent.objects.count(), 5)
+        self.assertEqual(sink.stats()["flushes"], 3)
+
+    def test_tests_write_synchronously(self):
+        self.assertFalse(audit_sink.buffered)
+        user = User.objects.create_user(username="alice")
+        self.client.force_login(user)
+        self.client.post(reverse("role-request"), {"role": "operator"}, content_type="application/json")
+        self.assertTrue(LogEvent.objects.filter(user=user, event_type="role_requested").exists())
@@ -0,0 +1,88 @@
+# backend/accounts/tests/test_log_query.py
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase
+
+from backend.accounts.logquery import LogQueryError, event_matcher, filter_log_events, histogram
+from backend.accounts.models import LogEvent
+from backend.accounts.serializers import LogEventSerializer
+
+User = get_user_model()
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+
+def params(query):
+    return QueryDict(query)
+
+
+class LogQueryTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice")
+        self.bob = User.objects.create_user(username="bob")
+        self.events = {
+            "login": LogEvent.objects.create(user=self.alice, event_type="login", timestamp=T0,
+                                             payload={"ip": "10.0.0.1", "mfa": True}),
+            "stored": LogEvent.objects.create(user=self.alice, event_type="secret_stored", timestamp=T0 + timedelta(minutes=1),
+                                              payload={"vault": {"name": "ops", "contains": 2}, "n": 1}),
+            "failed": LogEvent.objects.create(user=self.bob, event_type="login_failed", timestamp=T0 + timedelta(minutes=90),
+                                              payload={"ip": "10.0.0.2", "n": "1"}),
+        }
+
+    def matching(self, query):
+        found = set(filter_log_events(LogEvent.objects.all(), params(query)).values_list("id", flat=True))
+        names = {name for name, e in self.events.items() if e.id in found}
+        # the live stream applies the same filters to serialized events
+        if "since" not in query and "until" not in query:
+            q = params(query).copy()
+            if q.get("username"):
+                q["user"] = str(User.objects.get(username=q["username"]).pk)
+            matches = event_matcher(q)
+            streamed = {name for name, e in self.events.items() if matches(LogEventSerializer(e).data)}
+            self.assertEqual(streamed, names, query)
+        return names
+
+    def test_filters(self):
+        cases = {
+            f"user={self.bob.pk}": {"failed"},
+            "username=alice": {"login", "stored"},
+            "event_type=login,login_failed": {"login", "failed"},
+            "since=2026-01-01T12:01:00Z&until=2026-01-01T13:30:00": {"stored"},
+            "payload.ip=10.0.0.1": {"login"},
+            "payload.mfa=true": {"login"},
+            "payload.vault.name=ops": {"stored"},
+            # a key named like a lookup is still a key
+            "payload.vault.contains=2": {"stored"},
+            # JSON scalars are matched by type: 1 is not "1"
+            "payload.n=1": {"stored"},
+            "payload.n=%221%22": {"failed"},
+            "has_key=vault": {"stored"},
+            "username=alice&has_key=ip": {"login"},
+        }
+        for query, expected in cases.items():
+            self.assertEqual(self.matching(query), expected, query)
+
+    def test_invalid_filters(self):
+        for query in ("user=x", "since=yesterday", "payload.a;drop=1", "has_key=a.b"):
+            with self.assertRaises(LogQueryError):
+                list(filter_log_events(LogEvent.objects.all(), params(query)))
+
+    def test_histogram(self):
+        data = histogram(LogEvent.objects.all(), params("interval=hour&since=2026-01-01T11:00:00Z&until=2026-01-01T14:00:00Z"))
+        self.assertEqual([(b["t"], b["total"], b["counts"]) for b in data["buckets"]],
+                         [(T0, 2, {"login": 1, "secret_stored": 1}), (T0 + timedelta(hours=1), 1, {"login_failed": 1})])
+        for query in ("interval=week", "since=2026-01-02T00:00:00Z&until=2026-01-01T00:00:00Z",
+                      "interval=minute&since=2026-01-01T00:00:00Z&until=2026-01-03T00:00:00Z"):
+            with self.assertRaises(LogQueryError):
+                histogram(LogEvent.objects.all(), params(query))
+
+    def test_endpoints(self):
+        self.client.force_login(self.alice)
+        self.assertEqual(self.client.get("/logs/count/?event_type=login").json(), {"count": 1})
+        self.assertEqual(self.client.get("/logs/count/?user=x").status_code, 400)
+        body = self.client.get("/logs/", {"payload.ip": "10.0.0.2"}).json()
+        self.assertEqual([e["id"] for e in body["results"]], [str(self.events["failed"].id)])
+        body = self.client.get("/logs/histogram/", {"interval": "day", "since": "2026-01-01T00:00:00Z",
+                                                    "until": "2026-01-02T00:00:00Z"}).json()
+        self.assertEqual([b["total"] for b in body["buckets"]], [3])
@@ -0,0 +1,84 @@
+# backend/accounts/tests/test_log_stream.py
+import asyncio
+import json
+import threading
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from backend.accounts.logbus import LogBus, log_bus
+from backend.accounts.views import log_event
+
+User = get_user_model()
+
+
+class LogBusTests(SimpleTestCase):
+    def test_publish_from_another_thread(self):
+        bus = LogBus(queue_size=2)
+
+        async def scenario():
+            wanted = bus.subscribe(lambda event: event["event_type"] == "login")
+            other = bus.subscribe(lambda event: False)
+            thread = threading.Thread(target=lambda: [bus.publish({"event_type": "login"}, f"frame{n}")
+                                                      for n in range(3)])
+            thread.start()
+            thread.join()
+            await asyncio.sleep(0)
+            frames = [wanted.queue.get_nowait() for _ in range(wanted.queue.qsize())]
+            bus.unsubscribe(wanted)
+            bus.unsubscribe(other)
+            return frames, wanted.dropped, other.queue.qsize()
+
+        frames, dropped, other = async_to_sync(scenario)()
+        self.assertEqual((frames, dropped, other), (["frame0", "frame1"], 1, 0))
+        self.assertEqual(bus.stats(), {"subscribers": 0, "max_subscribers": 5000, "published": 3, "delivered": 3})
+        self.assertFalse(bus.has_subscribers)
+
+    def test_full_bus_refuses_subscribers(self):
+        bus = LogBus(max_subscribers=1)
+
+        async def scenario():
+            return bus.subscribe(lambda e: True) is not None, bus.subscribe(lambda e: True)
+
+        self.assertEqual(async_to_sync(scenario)(), (True, None))
+
+
+class LogStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice")
+
+    def test_wsgi_server_answers_501(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/logs/stream/").status_code, 501)
+        self.assertEqual(self.client.post("/logs/stream/").status_code, 405)
+
+    async def test_anonymous_and_bad_filters(self):
+        self.assertEqual((await self.async_client.get("/logs/stream/")).status_code, 403)
+        await self.async_client.aforce_login(self.user)
+        self.assertEqual((await self.async_client.get("/logs/stream/", {"user": "x"})).status_code, 400)
+
+    @override_settings(LOG_STREAM_HEARTBEAT=0.05)
+    async def test_streams_matching_events(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get("/logs/stream/", {"event_type": "login"})
+        self.assertEqual((response.status_code, response["Content-Type"]), (200, "text/event-stream"))
+        frames = aiter(response.streaming_content)
+        self.assertEqual(await anext(frames), b"retry: 5000\n\n")
+        self.assertEqual(await anext(frames), b": ping\n\n")
+        self.assertTrue(log_bus.has_subscribers)
+        await sync_to_async(log_event)(self.user, "logout", {})
+        await sync_to_async(log_event)(self.user, "login", {"ip": "10.0.0.1"})
+        frame = (await anext(frames)).decode()
+        while frame == ": ping\n\n":
+            frame = (await anext(frames)).decode()
+        self.assertTrue(frame.startswith("id: "))
+        data = json.loads(frame.split("data: ", 1)[1])
+        self.assertEqual((data["event_type"], data["payload"]), ("login", {"ip": "10.0.0.1"}))
+        # the client went away: the server cancels the pending read, which drops the subscription
+        pending = asyncio.ensure_future(anext(frames))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(log_bus.has_subscribers)
@@ -0,0 +1,79 @@
+# backend/accounts/tests/test_prune_logs.py
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from backend.accounts import partitions
+from backend.accounts.models import LogEvent
+
+
+class MonthHelperTests(SimpleTestCase):
+    def test_month_start_and_add_months(self):
+        dt = datetime(2026, 12, 31, 23, 30, tzinfo=dt_timezone(timedelta(hours=-2)))
+        start = partitions.month_start(dt)
+        self.assertEqual(start, datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.add_months(start, -1), datetime(2026, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.add_months(start, 13), datetime(2028, 2, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(partitions.partition_name(start), "accounts_logevent_p202701")
+
+    def test_drop_partition_rejects_other_tables(self):
+        with self.assertRaises(ValueError):
+            partitions.drop_partition("accounts_profile")
+
+
+class PruneLogsTests(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.old = partitions.add_months(partitions.month_start(timezone.now()), -6)
+
+    def tearDown(self):
+        for name in os.listdir(self.archive_dir):
+            os.remove(os.path.join(self.archive_dir, name))
+        os.rmdir(self.archive_dir)
+
+    def event(self, n, when=None):
+        return LogEvent.objects.create(event_type="test_event", payload={"n": n},
+                                       timestamp=when or self.old + timedelta(hours=n))
+
+    def prune(self, *args):
+        out = StringIO()
+        call_command("prune_logs", "--days", "90", "--archive-dir", self.archive_dir, *args, stdout=out)
+        return out.getvalue()
+
+    def archived(self, name):
+        with gzip.open(os.path.join(self.archive_dir, name), "rt", encoding="utf-8") as fh:
+            return [json.loads(line)["payload"]["n"] for line in fh]
+
+    def test_archives_and_deletes_old_months(self):
+        self.event(1)
+        self.event(2)
+        recent = self.event(3, when=timezone.now())
+        out = self.prune()
+        self.assertIn(f"Pruned {self.old:%Y-%m}: 2 archived", out)
+        self.assertEqual(list(LogEvent.objects.values_list("id", flat=True)), [recent.id])
+        self.assertEqual(self.archived(f"logevent-{self.old:%Y-%m}.jsonl.gz"), [1, 2])
+
+    def test_pruning_a_month_again_keeps_the_first_archive(self):
+        self.event(1)
+        self.prune()
+        # e.g. a late row written after the month was pruned
+        self.event(2)
+        self.prune()
+        self.assertEqual(self.archived(f"logevent-{self.old:%Y-%m}.jsonl.gz"), [1])
+        self.assertEqual(self.archived(f"logevent-{self.old:%Y-%m}.1.jsonl.gz"), [2])
+        self.assertEqual(len(os.listdir(self.archive_dir)), 2)
+
+    def test_dry_run_and_no_archive(self):
+        self.event(1)
+        self.assertIn(f"Would prune {self.old:%Y-%m}", self.prune("--dry-run"))
+        self.assertEqual(LogEvent.objects.count(), 1)
+        self.prune("--no-archive")
+        self.assertFalse(LogEvent.objects.exists())
+        self.assertEqual(os.listdir(self.archive_dir), [])
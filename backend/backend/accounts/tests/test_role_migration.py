@@ -0,0 +1,53 @@
+# backend/accounts/tests/test_role_migration.py
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from backend.accounts.models import LogEvent, Profile, RoleRequest
+
+User = get_user_model()
+migration = import_module("backend.accounts.migrations.0007_demote_approved_roles")
+
+
+def make_user(username, role="reader"):
+    user = User.objects.create_user(username=username)
+    Profile.objects.filter(user=user).update(role=role)
+    return user
+
+
+def approved(user, role, approver, status="approved"):
+    return RoleRequest.objects.create(user=user, role_requested=role, status=status, approved_by=approver,
+                                      approved_at=timezone.now(), expires_at=timezone.now())
+
+
+class DemoteApprovedRolesTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("root", "admin")
+
+    def role(self, user):
+        return Profile.objects.get(user=user).role
+
+    def test_role_raised_by_approval_is_demoted(self):
+        alice = make_user("alice", "operator")
+        rr = approved(alice, "operator", self.admin, status="expired")
+        migration.demote_approved_roles(apps, None)
+        self.assertEqual(self.role(alice), "reader")
+        event = LogEvent.objects.get(user=alice, event_type="role_demoted")
+        self.assertEqual(event.payload["role_request"], str(rr.id))
+
+    def test_other_roles_are_kept(self):
+        # approval lowered the role, role changed by hand after the latest approval, self-approval, no grant
+        bob, carol, dave, erin = (make_user(name, role) for name, role in
+                                  (("bob", "admin"), ("carol", "operator"), ("dave", "admin"), ("erin", "operator")))
+        approved(bob, "operator", self.admin)
+        approved(carol, "admin", self.admin)
+        approved(carol, "operator", self.admin)
+        RoleRequest.objects.filter(user=carol, role_requested="admin").update(approved_at=timezone.now())
+        approved(dave, "admin", dave)
+        migration.demote_approved_roles(apps, None)
+        self.assertEqual([self.role(u) for u in (self.admin, bob, carol, dave, erin)],
+                         ["admin", "admin", "operator", "admin", "operator"])
+        self.assertFalse(LogEvent.objects.filter(event_type="role_demoted").exists())
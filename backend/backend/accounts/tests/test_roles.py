@@ -0,0 +1,138 @@
+# backend/accounts/tests/test_roles.py
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.accounts import roles
+from backend.accounts.models import LogEvent, Profile, RoleRequest
+
+User = get_user_model()
+
+
+def make_user(username, role="reader"):
+    user = User.objects.create_user(username=username)
+    Profile.objects.filter(user=user).update(role=role)
+    return user
+
+
+def grant(user, role, expires_in=timedelta(minutes=15), status="approved"):
+    return RoleRequest.objects.create(user=user, role_requested=role, status=status,
+                                      expires_at=timezone.now() + expires_in)
+
+
+class EffectiveRoleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user("alice")
+
+    def test_base_role(self):
+        self.assertEqual(roles.resolve_role(self.user.pk), ("reader", None))
+
+    def test_active_grant_raises_role_until_expiry(self):
+        rr = grant(self.user, "operator")
+        self.assertEqual(roles.resolve_role(self.user.pk), ("operator", rr.expires_at))
+
+    def test_expired_and_pending_grants_do_not_count(self):
+        grant(self.user, "admin", expires_in=timedelta(seconds=-1))
+        grant(self.user, "admin", status="pending")
+        self.assertEqual(roles.resolve_role(self.user.pk), ("reader", None))
+
+    def test_grant_never_lowers_base_role(self):
+        Profile.objects.filter(user=self.user).update(role="operator")
+        grant(self.user, "reader")
+        self.assertEqual(roles.resolve_role(self.user.pk)[0], "operator")
+
+    def test_cached_until_profile_or_grant_changes(self):
+        self.assertEqual(roles.effective_role(self.user.pk), "reader")
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.effective_role(self.user.pk), "reader")
+        with self.captureOnCommitCallbacks(execute=True):
+            grant(self.user, "operator")
+        self.assertEqual(roles.effective_role(self.user.pk), "operator")
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = Profile.objects.get(user=self.user)
+            profile.role = "admin"
+            profile.save()
+        self.assertEqual(roles.effective_role(self.user.pk), "admin")
+
+    def test_cache_entry_does_not_outlive_grant(self):
+        grant(self.user, "operator", expires_in=timedelta(seconds=10))
+        with mock.patch.object(roles.cache, "set") as cache_set:
+            roles.effective_role(self.user.pk)
+        self.assertLessEqual(cache_set.call_args.args[2], 10)
+
+    def test_admin_not_cached_in_per_process_cache(self):
+        Profile.objects.filter(user=self.user).update(role="admin")
+        self.assertEqual(roles.effective_role(self.user.pk), "admin")
+        self.assertIsNone(cache.get(roles.CACHE_PREFIX + str(self.user.pk)))
+        # demoted elsewhere (no signal reaches this process): takes effect at once
+        Profile.objects.filter(user=self.user).update(role="reader")
+        self.assertEqual(roles.effective_role(self.user.pk), "reader")
+
+    def test_admin_cached_in_shared_cache(self):
+        Profile.objects.filter(user=self.user).update(role="admin")
+        with mock.patch.object(roles, "_cache_is_shared", return_value=True):
+            roles.effective_role(self.user.pk)
+        self.assertEqual(cache.get(roles.CACHE_PREFIX + str(self.user.pk)), "admin")
+
+
+class RoleApproveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user("root", role="admin")
+        self.user = make_user("bob")
+        self.url = reverse("role-approve")
+
+    def approve(self, user, rr):
+        self.client.force_login(user)
+        return self.client.post(self.url, {"id": str(rr.id)}, content_type="application/json")
+
+    def test_approve_pending(self):
+        rr = RoleRequest.objects.create(user=self.user, role_requested="operator")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.approve(self.admin, rr)
+        self.assertEqual(response.status_code, 200)
+        rr.refresh_from_db()
+        self.assertEqual((rr.status, rr.approved_by), ("approved", self.admin))
+        self.assertEqual(roles.effective_role(self.user.pk), "operator")
+
+    def test_only_pending_requests_are_approved(self):
+        for status in ("approved", "rejected", "expired"):
+            rr = RoleRequest.objects.create(user=self.user, role_requested="operator", status=status)
+            response = self.approve(self.admin, rr)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json(), {"error": "not_pending", "status": status})
+            rr.refresh_from_db()
+            self.assertEqual(rr.status, status)
+
+    def test_non_admin_forbidden(self):
+        rr = RoleRequest.objects.create(user=self.user, role_requested="admin")
+        self.assertEqual(self.approve(self.user, rr).status_code, 403)
+        rr.refresh_from_db()
+        self.assertEqual(rr.status, "pending")
+
+
+class ExpireRolesCommandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_expires_past_grants_only(self):
+        users = [make_user(f"u{i}") for i in range(3)]
+        past = [grant(u, "operator", expires_in=timedelta(seconds=-1)) for u in users[:2]]
+        current = grant(users[2], "operator")
+        cache.set(roles.CACHE_PREFIX + str(users[0].pk), "operator")
+        call_command("expire_roles", "--batch-size", "1", stdout=StringIO())
+        for rr in past:
+            rr.refresh_from_db()
+            self.assertEqual(rr.status, "expired")
+        current.refresh_from_db()
+        self.assertEqual(current.status, "approved")
+        self.assertIsNone(cache.get(roles.CACHE_PREFIX + str(users[0].pk)))
+        self.assertEqual(LogEvent.objects.filter(event_type="role_expired").count(), 2)
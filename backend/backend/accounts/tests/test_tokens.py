@@ -0,0 +1,96 @@
+# backend/accounts/tests/test_tokens.py
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from backend.accounts.models import VerificationToken
+
+User = get_user_model()
+
+
+def make_token(user, raw, token_type="email", expires_in=timedelta(minutes=10), age=timedelta(0)):
+    vt = VerificationToken.objects.create(user=user, token_hash=VerificationToken.hash_token(raw), type=token_type,
+                                          expires_at=timezone.now() + expires_in)
+    if age:
+        VerificationToken.objects.filter(pk=vt.pk).update(created_at=timezone.now() - age)
+    return vt
+
+
+@override_settings(VERIFICATION_MAX_ATTEMPTS=3)
+class VerifyTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice")
+
+    def verify_email(self, token, username="alice"):
+        return self.client.post(reverse("verify-email"), {"username": username, "token": token},
+                                content_type="application/json")
+
+    def verify_sms(self, token):
+        self.client.force_login(self.user)
+        return self.client.post(reverse("verify-sms"), {"token": token}, content_type="application/json")
+
+    def test_latest_token_is_checked(self):
+        make_token(self.user, "111111", age=timedelta(minutes=5))
+        make_token(self.user, "222222")
+        self.assertEqual(self.verify_email("111111").json(), {"error": "invalid_token"})
+        self.assertEqual(self.verify_email("222222").status_code, 200)
+
+    def test_token_types_are_separate(self):
+        make_token(self.user, "111111", token_type="sms")
+        self.assertEqual(self.verify_email("111111").status_code, 404)
+        self.assertEqual(self.verify_sms("111111").status_code, 200)
+
+    def test_unknown_user_or_no_token(self):
+        self.assertEqual(self.verify_email("111111").json(), {"error": "no_token"})
+        self.assertEqual(self.verify_email("111111", username="nobody").status_code, 404)
+
+    def test_expired_token(self):
+        vt = make_token(self.user, "111111", expires_in=timedelta(seconds=-1))
+        response = self.verify_email("111111")
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "token_expired"}))
+        vt.refresh_from_db()
+        self.assertEqual(vt.attempts, 0)
+
+    def test_attempts_are_limited(self):
+        vt = make_token(self.user, "111111", token_type="sms")
+        for _ in range(3):
+            self.assertEqual(self.verify_sms("000000").status_code, 400)
+        # even the right token is refused once the attempts are used up
+        response = self.verify_sms("111111")
+        self.assertEqual((response.status_code, response.json()), (429, {"error": "too_many_attempts"}))
+        vt.refresh_from_db()
+        self.assertEqual(vt.attempts, 3)
+
+    def test_successful_attempt_counts(self):
+        vt = make_token(self.user, "111111")
+        self.assertEqual(self.verify_email("111111").status_code, 200)
+        vt.refresh_from_db()
+        self.assertEqual(vt.attempts, 1)
+
+
+class PurgeTokensCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice")
+
+    def test_deletes_only_expired_tokens(self):
+        expired = [make_token(self.user, "1", expires_in=timedelta(minutes=-m)) for m in range(1, 6)]
+        live = make_token(self.user, "2")
+        out = StringIO()
+        call_command("purge_tokens", "--batch-size", "2", stdout=out)
+        self.assertIn("Deleted 5 expired token(s).", out.getvalue())
+        self.assertFalse(VerificationToken.objects.filter(pk__in=[vt.pk for vt in expired]).exists())
+        self.assertTrue(VerificationToken.objects.filter(pk=live.pk).exists())
+
+    def test_grace_and_dry_run(self):
+        recent = make_token(self.user, "1", expires_in=timedelta(minutes=-1))
+        make_token(self.user, "1", expires_in=timedelta(hours=-1))
+        out = StringIO()
+        call_command("purge_tokens", "--dry-run", stdout=out)
+        self.assertIn("2 expired token(s) would be deleted.", out.getvalue())
+        call_command("purge_tokens", "--grace-minutes", "10", stdout=StringIO())
+        self.assertEqual(list(VerificationToken.objects.values_list("pk", flat=True)), [recent.pk])
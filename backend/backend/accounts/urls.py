@@ -1,7 +1,11 @@
 # backend/accounts/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# async argon2 variant (offloaded to backend.offload.crypto_pool), on by default under ASGI (asgi.py)
+ASYNC = getattr(settings, "ASYNC_CRYPTO_VIEWS", False)
+
 urlpatterns = [
     path("register/", views.RegisterView.as_view(), name="register"),
     path("verify-email/", views.VerifyEmailView.as_view(), name="verify-email"),
@@ -12,8 +16,13 @@ urlpatterns = [
     path("sms/verify/", views.VerifySMSView.as_view(), name="verify-sms"),
     path("totp/setup/", views.TOTPSetupView.as_view(), name="totp-setup"),
     path("totp/verify/", views.TOTPVerifyView.as_view(), name="totp-verify"),
-    path("password/hash-info/", views.PasswordHashInfoView.as_view(), name="password-hash-info"),
+    path("password/hash-info/", (views.AsyncPasswordHashInfoView if ASYNC else views.PasswordHashInfoView).as_view(),
+         name="password-hash-info"),
     path("role/request/", views.RoleRequestView.as_view(), name="role-request"),
     path("role/approve/", views.RoleApproveView.as_view(), name="role-approve"),
     path("logs/", views.LogsListView.as_view(), name="logs"),
+    path("logs/count/", views.LogsCountView.as_view(), name="logs-count"),
+    path("logs/histogram/", views.LogsHistogramView.as_view(), name="logs-histogram"),
+    path("logs/stream/", views.logs_stream, name="logs-stream"),
+    path("logs/metrics/", views.AuditMetricsView.as_view(), name="logs-metrics"),
 ]
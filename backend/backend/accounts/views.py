@@ -1,14 +1,19 @@
 # backend/accounts/views.py
+import asyncio
+import json
 import secrets
 from datetime import timedelta
 from django.utils import timezone
 from django.contrib.auth import authenticate, login as django_login, logout as django_logout, get_user_model
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 from django.views.decorators.csrf import ensure_csrf_cookie
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -17,16 +22,32 @@ from rest_framework import status, permissions
 import pyotp
 from argon2 import PasswordHasher
 
+from backend.offload import AsyncAPIView, crypto_pool
+from backend.demo.keycache import parsed_key_cache
+from backend.demo.keypool import rsa_key_pool
+from backend.demo.utils import vault_key_cache
+from backend.pagination import KeysetPagination
+
+from .audit import audit_sink
+from .logbus import log_bus
+from .logquery import LogQueryError, event_matcher, filter_log_events, histogram
 from .models import VerificationToken, InboxMessage, Profile, RoleRequest, LogEvent
+from .roles import is_admin
 from .serializers import RegisterSerializer, LoginSerializer, InboxSerializer, RoleRequestSerializer, LogEventSerializer
 
 User = get_user_model()
 PH = PasswordHasher()
 
 def log_event(user, event_type, payload=None):
-    LogEvent.objects.create(user=user if user and getattr(user, 'is_authenticated', False) else None,
-                            event_type=event_type,
-                            payload=payload or {})
+    # queued and written in batches by the audit sink (see audit.py)
+    event = LogEvent(user=user if user and getattr(user, 'is_authenticated', False) else None,
+                     event_type=event_type,
+                     payload=payload or {})
+    audit_sink.emit(event)
+    if log_bus.has_subscribers:
+        # serialized once, shared by every live tail connection
+        data = LogEventSerializer(event).data
+        log_bus.publish(data, f"id: {data['id']}\nevent: log\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n")
 
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -61,6 +82,32 @@ class RegisterView(APIView):
 
         return Response({"detail": "verification_sent"}, status=status.HTTP_201_CREATED)
 
+def latest_token(token_type, **user_lookup):
+    """Latest token of one type for a user, with the user, in one indexed query (None if there is none)."""
+    return (VerificationToken.objects.select_related('user')
+            .filter(type=token_type, **user_lookup)
+            .order_by('-created_at')
+            .first())
+
+TOKEN_ERROR_STATUS = {
+    "token_expired": status.HTTP_400_BAD_REQUEST,
+    "too_many_attempts": status.HTTP_429_TOO_MANY_REQUESTS,
+    "invalid_token": status.HTTP_400_BAD_REQUEST,
+}
+
+def check_token(vt, raw):
+    """Error code for a verification attempt, or None when raw matches; every try counts toward the attempt limit."""
+    if vt.expires_at < timezone.now():
+        return "token_expired"
+    if not vt.register_attempt(settings.VERIFICATION_MAX_ATTEMPTS):
+        return "too_many_attempts"
+    if not vt.verify(raw):
+        return "invalid_token"
+    return None
+
+def token_error_response(error):
+    return Response({"error": error}, status=TOKEN_ERROR_STATUS[error])
+
 class VerifyEmailView(APIView):
     permission_classes = [permissions.AllowAny]
     def post(self, request):
@@ -68,19 +115,18 @@ class VerifyEmailView(APIView):
         token = request.data.get('token')
         if not username or not token:
             return Response({"error":"username_and_token_required"}, status=status.HTTP_400_BAD_REQUEST)
-        user = get_object_or_404(User, username=username)
+        # last token for user, joined on username (an unknown user is no_token too)
+        vt = latest_token('email', user__username=username)
+        if vt is None:
+            return Response({"error":"no_token"}, status=status.HTTP_404_NOT_FOUND)
+        user = vt.user
+        error = check_token(vt, token)
+        if error:
+            if error == "invalid_token":
+                log_event(user, "verify_email_failed", {"token_prefix": token[:2]})
+            return token_error_response(error)
         # ensure profile exists (create if not)
         Profile.objects.get_or_create(user=user)
-        # find last token for user
-        try:
-            vt = VerificationToken.objects.filter(user=user, type='email').latest('created_at')
-        except VerificationToken.DoesNotExist:
-            return Response({"error":"no_token"}, status=status.HTTP_404_NOT_FOUND)
-        if vt.expires_at < timezone.now():
-            return Response({"error":"token_expired"}, status=status.HTTP_400_BAD_REQUEST)
-        if not vt.verify(token):
-            log_event(user, "verify_email_failed", {"token_prefix": token[:2]})
-            return Response({"error":"invalid_token"}, status=status.HTTP_400_BAD_REQUEST)
         log_event(user, "verify_email_success", {})
         return Response({"detail":"verified"})
 
@@ -110,11 +156,14 @@ class InboxListView(APIView):
     def get(self, request):
         # optional query param type=email|sms
         t = request.query_params.get('type')
-        qs = InboxMessage.objects.all().order_by('-created_at')
+        qs = InboxMessage.objects.all()
         if t in ('email','sms'):
             qs = qs.filter(type=t)
-        ser = InboxSerializer(qs, many=True)
-        return Response(ser.data)
+        # keyset pagination: ?page_size=N&cursor=...
+        paginator = KeysetPagination(time_field='created_at')
+        page = paginator.paginate_queryset(qs, request, view=self)
+        ser = InboxSerializer(page, many=True)
+        return paginator.get_paginated_response(ser.data)
 
 class SendSMSView(APIView):
     """
@@ -142,15 +191,14 @@ class VerifySMSView(APIView):
         if not token:
             return Response({"error":"token_required"}, status=status.HTTP_400_BAD_REQUEST)
         # find latest sms token for this user
-        try:
-            vt = VerificationToken.objects.filter(user=request.user, type='sms').latest('created_at')
-        except VerificationToken.DoesNotExist:
+        vt = latest_token('sms', user=request.user)
+        if vt is None:
             return Response({"error":"no_token"}, status=status.HTTP_404_NOT_FOUND)
-        if vt.expires_at < timezone.now():
-            return Response({"error":"token_expired"}, status=status.HTTP_400_BAD_REQUEST)
-        if not vt.verify(token):
-            log_event(request.user, "verify_sms_failed", {})
-            return Response({"error":"invalid_token"}, status=status.HTTP_400_BAD_REQUEST)
+        error = check_token(vt, token)
+        if error:
+            if error == "invalid_token":
+                log_event(request.user, "verify_sms_failed", {})
+            return token_error_response(error)
         log_event(request.user, "verify_sms_success", {})
         return Response({"detail":"sms_verified"})
 
@@ -186,6 +234,13 @@ class TOTPVerifyView(APIView):
             return Response({"detail":"totp_ok"})
         return Response({"error":"invalid_code"}, status=status.HTTP_400_BAD_REQUEST)
 
+def hash_password_timed(pw):
+    """argon2 hash of pw and the time it took (ms)."""
+    t0 = timezone.now()
+    hashed = PH.hash(pw)
+    t1 = timezone.now()
+    return hashed, (t1 - t0).total_seconds() * 1000
+
 class PasswordHashInfoView(APIView):
     """
     For visualization: compute an argon2 hash for given password and return hash + time (measured).
@@ -195,14 +250,20 @@ class PasswordHashInfoView(APIView):
         pw = request.data.get('password')
         if not pw:
             return Response({"error":"password_required"}, status=status.HTTP_400_BAD_REQUEST)
-        t0 = timezone.now()
-        ph = PH
-        hashed = ph.hash(pw)
-        t1 = timezone.now()
-        elapsed_ms = (t1 - t0).total_seconds() * 1000
+        hashed, elapsed_ms = hash_password_timed(pw)
         # don't store password; return hash and measured time
         return Response({"hash": hashed, "time_ms": elapsed_ms})
 
+class AsyncPasswordHashInfoView(AsyncAPIView):
+    """Async variant of PasswordHashInfoView: argon2 runs on the crypto pool (503 when saturated)."""
+    permission_classes = [permissions.AllowAny]
+    async def post(self, request):
+        pw = request.data.get('password')
+        if not pw or not isinstance(pw, str):
+            return Response({"error":"password_required"}, status=status.HTTP_400_BAD_REQUEST)
+        hashed, elapsed_ms = await crypto_pool.run(hash_password_timed, pw)
+        return Response({"hash": hashed, "time_ms": elapsed_ms})
+
 class RoleRequestView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def post(self, request):
@@ -217,26 +278,126 @@ class RoleApproveView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     def post(self, request):
         # only admins can approve
-        if getattr(request.user, 'profile', None) and request.user.profile.role != 'admin':
+        if not is_admin(request):
             return Response({"error":"forbidden"}, status=status.HTTP_403_FORBIDDEN)
         rr_id = request.data.get('id')
-        rr = get_object_or_404(RoleRequest, id=rr_id)
-        rr.status = 'approved'
-        rr.approved_by = request.user
-        rr.approved_at = timezone.now()
-        # for demo: grant role to user and set expiry for 15 minutes
-        rr.expires_at = timezone.now() + timedelta(minutes=15)
-        rr.save()
-        # apply role
-        profile, _ = Profile.objects.get_or_create(user=rr.user)
-        profile.role = rr.role_requested
-        profile.save()
+        with transaction.atomic():
+            # locked, so two admins cannot both approve (or approve what was just rejected)
+            rr = get_object_or_404(RoleRequest.objects.select_for_update(), id=rr_id)
+            if rr.status != 'pending':
+                return Response({"error":"not_pending", "status": rr.status}, status=status.HTTP_409_CONFLICT)
+            rr.status = 'approved'
+            rr.approved_by = request.user
+            rr.approved_at = timezone.now()
+            # for demo: grant role to user and set expiry for 15 minutes
+            rr.expires_at = timezone.now() + timedelta(minutes=15)
+            # the grant applies through the effective-role resolver (roles.py) until
+            # expires_at; Profile.role stays the user's base role. Saving drops the
+            # user's cached role (signals.py)
+            rr.save()
         log_event(request.user, "role_approved", {"role_request": str(rr.id)})
         return Response({"detail":"approved", "expires_at": rr.expires_at})
 
 class LogsListView(APIView):
+    """
+    Filters (see logquery.filter_log_events): user, username, event_type, since, until,
+    payload.<key>=<value>, has_key. Keyset pagination: ?page_size=N&cursor=...
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    def get(self, request):
+        try:
+            qs = filter_log_events(LogEvent.objects.all(), request.query_params)
+        except LogQueryError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = KeysetPagination(time_field='timestamp')
+        page = paginator.paginate_queryset(qs, request, view=self)
+        ser = LogEventSerializer(page, many=True)
+        return paginator.get_paginated_response(ser.data)
+
+class LogsCountView(APIView):
+    """Number of events matching the same filters as /logs/, counted in SQL."""
     permission_classes = [permissions.IsAuthenticated]
     def get(self, request):
-        qs = LogEvent.objects.all().order_by('-timestamp')[:200]
-        ser = LogEventSerializer(qs, many=True)
-        return Response(ser.data)
+        try:
+            qs = filter_log_events(LogEvent.objects.all(), request.query_params)
+        except LogQueryError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"count": qs.count()})
+
+class LogsHistogramView(APIView):
+    """
+    Events per time bucket by event_type, grouped in SQL.
+    ?interval=minute|hour|day plus the /logs/ filters.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    def get(self, request):
+        try:
+            qs = filter_log_events(LogEvent.objects.all(), request.query_params)
+            data = histogram(qs, request.query_params)
+        except LogQueryError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+async def logs_stream(request):
+    """
+    Live tail of new log events as server-sent events (text/event-stream).
+    Filters: user, username, event_type, payload.<key>=<value>, has_key (as /logs/).
+    Frames: "event: log" with the serialized event, "event: dropped" with the number
+    of events skipped because the client fell behind, and ": ping" comments while idle.
+    Needs the ASGI server (backend.asgi); under WSGI a stream would pin a worker thread.
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "method not allowed"}, status=405)
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": "live tail requires the ASGI server"}, status=501)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=403)
+
+    params = request.GET.copy()
+    if params.get("username"):
+        uid = await User.objects.filter(username=params["username"]).values_list("id", flat=True).afirst()
+        params["user"] = str(uid if uid is not None else -1)
+    try:
+        matches = event_matcher(params)
+    except LogQueryError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    sub = log_bus.subscribe(matches)
+    if sub is None:
+        return JsonResponse({"error": "too many live log clients"}, status=503)
+
+    heartbeat = getattr(settings, "LOG_STREAM_HEARTBEAT", 15)
+
+    async def frames():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if sub.dropped:
+                    dropped, sub.dropped = sub.dropped, 0
+                    yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+                yield frame
+        finally:
+            log_bus.unsubscribe(sub)
+
+    response = StreamingHttpResponse(frames(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+class AuditMetricsView(APIView):
+    """
+    Counters of the buffered audit writer in this process (queued, written, dropped...),
+    plus the stream, crypto pool, key pool and key cache stats. Admin only.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    def get(self, request):
+        if not is_admin(request):
+            return Response({"error":"forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        return Response({**audit_sink.stats(), "stream": log_bus.stats(), "crypto_pool": crypto_pool.stats(),
+                         "rsa_key_pool": rsa_key_pool.stats(),
+                         "rsa_key_cache": parsed_key_cache.stats(), "vault_key_cache": vault_key_cache.stats()})
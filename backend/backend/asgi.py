@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# the async crypto views (backend/offload.py) only pay off on an event loop
+os.environ.setdefault('ASYNC_CRYPTO_VIEWS', 'True')
 
 application = get_asgi_application()
+
+# server processes only: pre-generate RSA key pairs so the first keygen requests hit the pool
+from backend.demo.keypool import warm_from_settings  # noqa: E402
+
+warm_from_settings()
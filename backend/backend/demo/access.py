@@ -0,0 +1,51 @@
+# backend/demo/access.py
+# Vault access checks shared by the vault views: one query for the vault, the owner
+# compared by owner_id (the User row is never loaded), and the requester's role read
+# through accounts.roles (cached) only when they are not the owner.
+from django.http import Http404
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from backend.accounts.roles import is_admin
+from .models import Vault, WrappedSecret
+
+
+class VaultForbidden(APIException):
+    status_code = status.HTTP_403_FORBIDDEN
+    default_detail = {"error": "forbidden"}
+    default_code = "forbidden"
+
+
+def can_access(request, vault: Vault) -> bool:
+    """Owner or admin."""
+    return vault.owner_id == request.user.pk or is_admin(request)
+
+
+def get_vault(request, vault_id, queryset=None) -> Vault:
+    """
+    Load vault_id for request.user in one query (queryset may add annotations or
+    .only()). Raises Http404 when it does not exist and VaultForbidden (403,
+    {"error": "forbidden"}) when the user is neither its owner nor an admin.
+    """
+    qs = queryset if queryset is not None else Vault.objects.all()
+    vault = qs.filter(pk=vault_id).first()
+    if vault is None:
+        raise Http404("No Vault matches the given query.")
+    if not can_access(request, vault):
+        raise VaultForbidden()
+    return vault
+
+
+def get_secret(request, vault_id, secret_id) -> WrappedSecret:
+    """
+    Load a secret together with its vault (select_related) in one query, with the same
+    checks as get_vault; a missing secret in an accessible vault raises Http404.
+    """
+    secret = WrappedSecret.objects.select_related("vault").filter(pk=secret_id, vault_id=vault_id).first()
+    if secret is None:
+        # 404 or 403 for the vault itself take precedence, as with get_vault
+        get_vault(request, vault_id)
+        raise Http404("No WrappedSecret matches the given query.")
+    if not can_access(request, secret.vault):
+        raise VaultForbidden()
+    return secret
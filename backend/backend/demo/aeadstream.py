@@ -0,0 +1,137 @@
+# backend/demo/aeadstream.py
+# Chunked AES-256-GCM for payloads too large to hold in memory (segmented AEAD in
+# the style of the STREAM construction). Memory use is O(chunk_size) both ways.
+#
+# Framing (all integers big-endian):
+#
+#   header (16 bytes) = magic "SBXC" (4) | version 0x01 (1) | chunk_size uint32 (4) | nonce_prefix (7, random)
+#   chunk i           = AES-GCM(key, nonce_i, plaintext_i, aad=header)  -> len(plaintext_i) + 16 bytes
+#   nonce_i  (12)     = nonce_prefix (7) | i uint32 (4) | final flag (1: 0x01 on the last chunk, else 0x00)
+#
+# Every chunk but the last carries exactly chunk_size plaintext bytes; the last one
+# carries 0..chunk_size bytes (empty input still produces one empty final chunk).
+# The counter in the nonce stops reordering or dropping chunks, the final flag stops
+# truncation at a chunk boundary, and the header as AAD binds chunk_size and prefix.
+# Bytes after the final chunk are rejected: as trailing_data when the final chunk is
+# full-size, otherwise they are read as part of it and fail authentication.
+# A fresh random prefix per stream keeps nonces unique under a reused key (up to
+# 2**32 chunks per stream).
+import os
+import struct
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+MAGIC = b"SBXC"
+VERSION = 1
+HEADER_SIZE = 16
+TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MIN_CHUNK_SIZE = 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+MAX_CHUNKS = 2 ** 32
+
+
+class ChunkedAEADError(ValueError):
+    """Malformed, truncated or tampered chunked ciphertext (or wrong key)."""
+
+
+def _read_exact(reader, n):
+    # file-like reads may return short; keep reading until n bytes or EOF
+    parts, remaining = [], n
+    while remaining > 0:
+        data = reader.read(remaining)
+        if not data:
+            break
+        parts.append(data)
+        remaining -= len(data)
+    return b"".join(parts)
+
+
+def _nonce(prefix, index, final):
+    if index >= MAX_CHUNKS:
+        raise ChunkedAEADError("too_many_chunks")
+    return prefix + struct.pack(">IB", index, 1 if final else 0)
+
+
+def make_header(chunk_size, nonce_prefix=None):
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE}")
+    return MAGIC + struct.pack(">BI", VERSION, chunk_size) + (nonce_prefix or os.urandom(7))
+
+
+def parse_header(header):
+    """-> (chunk_size, nonce_prefix); raises ChunkedAEADError."""
+    if len(header) != HEADER_SIZE or header[:4] != MAGIC:
+        raise ChunkedAEADError("bad_header")
+    version, chunk_size = struct.unpack(">BI", header[4:9])
+    if version != VERSION:
+        raise ChunkedAEADError("unsupported_version")
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise ChunkedAEADError("bad_chunk_size")
+    return chunk_size, header[9:]
+
+
+def encrypt_stream(key, reader, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the header, then one encrypted chunk per chunk_size bytes read from reader."""
+    aead = AESGCM(key)
+    header = make_header(chunk_size)
+    prefix = header[9:]
+    yield header
+    index = 0
+    current = _read_exact(reader, chunk_size)
+    while True:
+        # look one chunk ahead to know whether the current one is the last
+        following = _read_exact(reader, chunk_size) if len(current) == chunk_size else b""
+        final = not following
+        yield aead.encrypt(_nonce(prefix, index, final), current, header)
+        if final:
+            return
+        current = following
+        index += 1
+
+
+def open_decrypt_stream(key, reader):
+    """
+    Read the header and the first chunk, raising ChunkedAEADError right away for a
+    wrong key or malformed input, and return a generator of the plaintext chunks.
+    Later chunks are authenticated before they are yielded; if one fails (tampering,
+    truncation) the generator raises ChunkedAEADError and the output is incomplete.
+    """
+    aead = AESGCM(key)
+    header = _read_exact(reader, HEADER_SIZE)
+    chunk_size, prefix = parse_header(header)
+    sealed = chunk_size + TAG_SIZE
+
+    def open_chunk(data, index, final):
+        if len(data) < TAG_SIZE:
+            raise ChunkedAEADError("truncated")
+        try:
+            return aead.decrypt(_nonce(prefix, index, final), data, header)
+        except InvalidTag:
+            pass
+        if not final:
+            # a valid final chunk with more input after it
+            try:
+                aead.decrypt(_nonce(prefix, index, True), data, header)
+            except InvalidTag:
+                pass
+            else:
+                raise ChunkedAEADError("trailing_data")
+        raise ChunkedAEADError("authentication_failed")
+
+    current = _read_exact(reader, sealed)
+    following = _read_exact(reader, sealed) if len(current) == sealed else b""
+    first = open_chunk(current, 0, not following)
+
+    def chunks():
+        nonlocal current, following
+        yield first
+        index = 0
+        while following:
+            index += 1
+            current = following
+            following = _read_exact(reader, sealed) if len(current) == sealed else b""
+            yield open_chunk(current, index, not following)
+
+    return chunks()
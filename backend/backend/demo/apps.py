@@ -5,3 +5,8 @@ class DemoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend.demo"
     label= "demo"
+
+    def ready(self):
+        # SIGHUP re-reads the vault root keyring without restarting the worker
+        from .rootkeys import install_sighup_reload
+        install_sighup_reload()
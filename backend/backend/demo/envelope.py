@@ -0,0 +1,86 @@
+# backend/demo/envelope.py
+# Envelope encryption of vault secrets.
+#
+# Each secret is encrypted under its own random 256-bit data key (DEK); only the DEK
+# is encrypted under the vault key. Rotating a vault key then rewraps the small
+# WrappedSecret.wrapped_dek values and never touches the payload ciphertexts.
+#
+#   wrapped     = nonce (12) | AES-256-GCM(dek, nonce, plaintext)
+#   wrapped_dek = format version 0x01 (1) | nonce (12) | AES-256-GCM(kek, nonce, dek, aad=version) (48)
+#
+# The key-encryption key (kek) is derived from the vault's Fernet key with HKDF, so
+# the same vault key is not used directly by two algorithms. Secrets written before
+# this format have wrapped_dek = NULL and wrapped = Fernet(vault key) token; they
+# stay readable and are converted on rotation or by the convert_legacy_secrets command.
+import base64
+import os
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+FORMAT_V1 = 1
+NONCE_SIZE = 12
+WRAPPED_DEK_SIZE = 1 + NONCE_SIZE + 32 + 16
+_KEK_INFO = b"security-sandbox vault secret kek v1"
+
+
+def derive_kek(vault_key_b64: bytes) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=_KEK_INFO).derive(
+        base64.urlsafe_b64decode(vault_key_b64))
+
+
+class VaultCipher:
+    """
+    Secret encryption for one vault. vault_keys are Fernet keys (urlsafe base64
+    bytes), the one new secrets go under first; the others only decrypt (older key
+    versions, or the current key while a rotation job moves the vault to a new one).
+    version is the key version of the first key. Decrypt failures raise InvalidToken.
+    """
+
+    def __init__(self, vault_keys, version=1):
+        self.version = version
+        self.fernet = MultiFernet([Fernet(k) for k in vault_keys])
+        self._keks = [AESGCM(derive_kek(k)) for k in vault_keys]
+
+    def wrap_data_key(self, dek: bytes) -> bytes:
+        header = bytes([FORMAT_V1])
+        nonce = os.urandom(NONCE_SIZE)
+        return header + nonce + self._keks[0].encrypt(nonce, dek, header)
+
+    def unwrap_data_key(self, wrapped_dek: bytes) -> bytes:
+        if len(wrapped_dek) != WRAPPED_DEK_SIZE or wrapped_dek[0] != FORMAT_V1:
+            raise InvalidToken("unsupported wrapped data key format")
+        header, nonce, sealed = wrapped_dek[:1], wrapped_dek[1:1 + NONCE_SIZE], wrapped_dek[1 + NONCE_SIZE:]
+        for kek in self._keks:
+            try:
+                return kek.decrypt(nonce, sealed, header)
+            except InvalidTag:
+                continue
+        raise InvalidToken("data key not wrapped by this vault's keys")
+
+    def encrypt(self, plaintext: bytes):
+        """-> (wrapped, wrapped_dek) under a fresh data key."""
+        dek = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + AESGCM(dek).encrypt(nonce, plaintext, None), self.wrap_data_key(dek)
+
+    def decrypt(self, wrapped: bytes, wrapped_dek) -> bytes:
+        if wrapped_dek is None:
+            return self.fernet.decrypt(bytes(wrapped))
+        dek = self.unwrap_data_key(bytes(wrapped_dek))
+        wrapped = bytes(wrapped)
+        try:
+            return AESGCM(dek).decrypt(wrapped[:NONCE_SIZE], wrapped[NONCE_SIZE:], None)
+        except InvalidTag:
+            raise InvalidToken("secret ciphertext failed authentication")
+
+    def rewrap_data_key(self, wrapped_dek: bytes) -> bytes:
+        """Re-encrypt a wrapped data key under the first vault key."""
+        return self.wrap_data_key(self.unwrap_data_key(bytes(wrapped_dek)))
+
+    def convert_legacy(self, wrapped: bytes):
+        """Legacy Fernet ciphertext -> (wrapped, wrapped_dek) in the envelope format."""
+        return self.encrypt(self.fernet.decrypt(bytes(wrapped)))
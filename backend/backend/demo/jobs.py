@@ -0,0 +1,197 @@
+# backend/demo/jobs.py
+# Background, resumable vault rotation (RotationJob).
+#
+# A job first stores a new vault key in Vault.pending_wrapped_key. From then on
+# utils.vault_cipher() encrypts with the new key and decrypts with either, so the
+# vault stays fully usable while the secrets' data keys are rewrapped batch by batch. Each batch
+# commits together with the job's checkpoint; when all are done the new key replaces
+# wrapped_key and the old one is dropped. A failed job leaves the pending key in place:
+# a new job resumes with it, and rotate_vault / rotate_vault_lazy (so also the
+# rotate_vaults scheduler) adopt it as the vault's next key.
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import utils
+from .models import RotationJob, Vault, WrappedSecret
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = RotationJob.ACTIVE_STATES
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _stale_before():
+    return timezone.now() - timedelta(seconds=getattr(settings, "ROTATION_JOB_STALE_SECONDS", 300))
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "ROTATION_JOB_WORKERS", 2),
+                thread_name_prefix="rotation-job",
+            )
+            # first use in this process: pick up jobs a previous process left behind
+            _executor.submit(_in_thread, resume_interrupted_jobs)
+        return _executor
+
+
+def _in_thread(fn, *args):
+    try:
+        fn(*args)
+    except Exception:
+        logger.exception("Rotation job worker error")
+    finally:
+        # worker threads hold their own DB connections
+        connections.close_all()
+
+
+def dispatch(job_id):
+    """Run the job on the local thread pool, unless jobs are left to the run_rotation_jobs worker."""
+    if getattr(settings, "ROTATION_JOBS_IN_PROCESS", True):
+        _get_executor().submit(_in_thread, run_job, job_id)
+
+
+def submit_rotation(vault: Vault, user=None) -> RotationJob:
+    """
+    Queue a rotation job for vault and dispatch it once committed. If the vault
+    already has an active job, that job is returned (and re-dispatched, which
+    resumes it if its worker died).
+    """
+    with transaction.atomic():
+        # serialize submissions for the same vault
+        Vault.objects.select_for_update().filter(pk=vault.pk).first()
+        job = RotationJob.objects.filter(vault_id=vault.pk, state__in=ACTIVE_STATES).order_by("created_at").first()
+        if job is None:
+            job = RotationJob.objects.create(
+                vault=vault,
+                requested_by=user if user is not None and user.is_authenticated else None,
+            )
+        transaction.on_commit(lambda: dispatch(job.id))
+    return job
+
+
+def claimable_jobs():
+    """Jobs waiting to run: queued, or running with a heartbeat older than the stale window."""
+    return RotationJob.objects.filter(Q(state="queued") | Q(state="running", heartbeat_at__lt=_stale_before()))
+
+
+def resume_interrupted_jobs():
+    for job_id in claimable_jobs().values_list("id", flat=True):
+        run_job(job_id)
+
+
+def _claim(job_id):
+    """Mark the job running for this worker; None if it is finished or owned by a live worker."""
+    now = timezone.now()
+    # a single conditional UPDATE: of several workers racing for the same job, exactly one matches
+    claimed = claimable_jobs().filter(pk=job_id).update(
+        state="running", started_at=Coalesce("started_at", now), heartbeat_at=now,
+    )
+    if not claimed:
+        return None
+    return RotationJob.objects.get(pk=job_id)
+
+
+def run_job(job_id, batch_size=None):
+    """Claim and run (or resume) one job in the calling thread. Returns the job, or None if not claimed."""
+    job = _claim(job_id)
+    if job is None:
+        return None
+    if batch_size is None:
+        batch_size = getattr(settings, "VAULT_ROTATION_BATCH_SIZE", utils.DEFAULT_ROTATION_BATCH_SIZE)
+    try:
+        _rotate(job, batch_size)
+    except Exception as e:
+        # the vault keeps its pending key; see the module docstring for how it is finished
+        logger.warning("Rotation job %s failed: %s", job.id, e)
+        job.state = "failed"
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["state", "error", "finished_at"])
+    return job
+
+
+def _rotate(job, batch_size):
+    vault = Vault.objects.get(pk=job.vault_id)
+    if not vault.wrapped_key:
+        raise RuntimeError("Vault has no wrapped_key to rotate")
+    if not vault.pending_wrapped_key:
+        with transaction.atomic():
+            vault = Vault.objects.select_for_update().get(pk=job.vault_id)
+            if not vault.pending_wrapped_key:
+                vault.pending_wrapped_key = utils.wrap_vault_key_with_root(utils.generate_vault_key())
+                vault.save(update_fields=["pending_wrapped_key"])
+    # encrypts with the pending key, decrypts with either
+    cipher = utils.vault_cipher(vault)
+
+    job.secrets_total = WrappedSecret.objects.filter(vault_id=vault.id).count()
+    job.save(update_fields=["secrets_total"])
+
+    while True:
+        qs = WrappedSecret.objects.filter(vault_id=vault.id).only("id", "wrapped_dek").order_by("pk")
+        if job.checkpoint:
+            qs = qs.filter(pk__gt=job.checkpoint)
+        batch = list(qs[:batch_size])
+        if not batch:
+            break
+        with transaction.atomic():
+            utils.rewrap_secrets(cipher, batch)
+            job.checkpoint = batch[-1].pk
+            job.secrets_processed += len(batch)
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=["checkpoint", "secrets_processed", "heartbeat_at"])
+
+    now = timezone.now()
+    with transaction.atomic():
+        vault = Vault.objects.select_for_update().get(pk=vault.pk)
+        # secrets stored while the job ran may sort before the checkpoint or carry the old
+        # key (request read the vault before the pending key existed): rewrap every row not
+        # yet under the pending key. Stores commit under this lock (create_secret), so none
+        # can slip in between this pass and the swap.
+        late = (WrappedSecret.objects
+                .filter(Q(key_version__lt=cipher.version) | Q(wrapped_dek__isnull=True), vault_id=vault.id)
+                .only("id", "wrapped_dek").order_by("pk"))
+        while True:
+            # rewrapped rows leave the filter, so each pass takes the next batch
+            batch = list(late[:batch_size])
+            if not batch:
+                break
+            utils.rewrap_secrets(cipher, batch)
+        vault.wrapped_key = vault.pending_wrapped_key
+        vault.pending_wrapped_key = None
+        # every secret is on the new key now, so retired versions can go too
+        vault.key_version = cipher.version
+        vault.previous_wrapped_keys = {}
+        vault.last_rotated = now
+        vault.next_rotation = utils.compute_next_rotation(now, vault.rotation_period)
+        vault.save(update_fields=["wrapped_key", "pending_wrapped_key", "key_version", "previous_wrapped_keys",
+                                  "last_rotated", "next_rotation"])
+        job.state = "succeeded"
+        job.secrets_total = max(job.secrets_total, job.secrets_processed)
+        job.finished_at = job.heartbeat_at = now
+        job.save(update_fields=["state", "secrets_total", "finished_at", "heartbeat_at"])
+
+
+def run_worker(poll_interval=5.0, once=False):
+    """Process loop for the run_rotation_jobs command: run claimable jobs one at a time."""
+    while True:
+        ran = False
+        for job_id in claimable_jobs().order_by("created_at").values_list("id", flat=True):
+            ran = run_job(job_id) is not None or ran
+        if once:
+            return
+        if not ran:
+            time.sleep(poll_interval)
@@ -0,0 +1,71 @@
+# backend/demo/keycache.py
+# Cache of parsed RSA key objects for the sign/verify endpoints.
+#
+# Loading a PEM (parsing plus key validation, expensive for private keys) dominates
+# a sign or verify call when clients keep sending the same keys. Parsed keys are kept
+# in an LRU keyed by the SHA-256 of the PEM bytes, so any change to the PEM is a
+# different entry. Registered public keys are also cached under their key_id.
+import hashlib
+
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+
+from .cache import LRUCache
+
+parsed_key_cache = LRUCache(
+    max_size=getattr(settings, "RSA_KEY_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "RSA_KEY_CACHE_TTL", 3600),
+)
+
+
+def pem_fingerprint(pem: bytes) -> str:
+    return hashlib.sha256(pem).hexdigest()
+
+
+def load_private_key(pem: bytes):
+    cache_key = ("private", pem_fingerprint(pem))
+    key = parsed_key_cache.get(cache_key)
+    if key is None:
+        key = serialization.load_pem_private_key(pem, password=None)
+        parsed_key_cache.set(cache_key, key)
+    return key
+
+
+def load_public_key(pem: bytes):
+    cache_key = ("public", pem_fingerprint(pem))
+    key = parsed_key_cache.get(cache_key)
+    if key is None:
+        key = serialization.load_pem_public_key(pem)
+        parsed_key_cache.set(cache_key, key)
+    return key
+
+
+def public_key_id(public_key) -> str:
+    """Stable id of a public key: SHA-256 (hex) of its DER SubjectPublicKeyInfo."""
+    der = public_key.public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()
+
+
+def cached_registered_key(key_id):
+    return parsed_key_cache.get(("key_id", key_id))
+
+
+def remember_registered_key(key_id, pem: str):
+    key = load_public_key(pem.encode("utf-8"))
+    parsed_key_cache.set(("key_id", key_id), key)
+    return key
+
+
+def registered_public_key(key_id):
+    """Parsed key for a registered key_id, or None if it is not registered."""
+    from .models import RegisteredPublicKey
+    key = cached_registered_key(key_id)
+    if key is None:
+        pem = RegisteredPublicKey.objects.filter(key_id=key_id).values_list("public_key", flat=True).first()
+        if pem is None:
+            return None
+        key = remember_registered_key(key_id, pem)
+    return key
@@ -0,0 +1,167 @@
+# backend/demo/keypool.py
+# Pool of pre-generated RSA key pairs for RSAKeyGenView.
+#
+# RSA keygen costs tens to hundreds of ms with a long tail. The pool keeps up to
+# `target` PEM key pairs per key size and serves requests from memory; when a size
+# drops below `low_water`, background worker processes refill it. A size's pool is
+# created on its first request, so 4096-bit keys are only generated if someone asks;
+# the sizes in RSA_KEY_POOL_WARM are filled when a server process starts (wsgi.py /
+# asgi.py call warm_from_settings(); other processes never start refill workers).
+# When a pool is empty the caller generates the key itself (counted as a miss).
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+KEY_SIZES = (2048, 3072, 4096)
+DEFAULT_KEY_SIZE = 2048
+RATE_WINDOW = 60.0  # seconds, for the refill rate
+
+
+def generate_pem(key_size=DEFAULT_KEY_SIZE):
+    """Generate an RSA key pair; returns {"private_key", "public_key"} as PEM strings."""
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    priv_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    pub_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return {
+        "private_key": priv_pem.decode('utf-8'),
+        "public_key": pub_pem.decode('utf-8')
+    }
+
+
+class RSAKeyPool:
+    """
+    - target: key pairs kept ready per key size
+    - low_water: refill a size when fewer than this many are left
+    - workers: refill processes (spawned, so forking a threaded server is avoided)
+    Settings are read on first use (RSA_KEY_POOL_TARGET / _LOW_WATER / _WORKERS).
+    """
+
+    def __init__(self, target=None, low_water=None, workers=None):
+        self._config = (target, low_water, workers)
+        self.target = self.low_water = self.workers = None
+        # re-entrant: a future that is already done runs its callback inside submit()
+        self._lock = threading.RLock()
+        self._keys = {size: deque() for size in KEY_SIZES}
+        self._inflight = {size: 0 for size in KEY_SIZES}
+        self._active = set()
+        self._executor = None
+        self._pid = None
+        self._generated_at = deque()
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.errors = 0
+
+    def _configure(self):
+        if self.target is not None:
+            return
+        from django.conf import settings
+        target, low_water, workers = self._config
+        self.target = target or getattr(settings, "RSA_KEY_POOL_TARGET", 8)
+        self.low_water = min(low_water or getattr(settings, "RSA_KEY_POOL_LOW_WATER", 3), self.target)
+        self.workers = workers or getattr(settings, "RSA_KEY_POOL_WORKERS", 1)
+
+    def _get_executor(self):
+        # called with the lock held; a forked child must not reuse the parent's pool
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            self._pid = os.getpid()
+        return self._executor
+
+    def take(self, key_size=DEFAULT_KEY_SIZE):
+        """Pop a ready key pair, or None if the pool for key_size is empty. Triggers a refill when low."""
+        if key_size not in KEY_SIZES:
+            raise ValueError(f"Unsupported key size: {key_size}")
+        self._configure()
+        with self._lock:
+            self._active.add(key_size)
+            keys = self._keys[key_size]
+            pair = keys.popleft() if keys else None
+            if pair is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            if len(keys) + self._inflight[key_size] < self.low_water:
+                self._refill(key_size)
+        return pair
+
+    def warm(self, key_sizes=(DEFAULT_KEY_SIZE,)):
+        """Start filling the pools for key_sizes ahead of the first request."""
+        self._configure()
+        with self._lock:
+            for size in key_sizes:
+                self._active.add(size)
+                self._refill(size)
+
+    def _refill(self, key_size):
+        # called with the lock held
+        missing = self.target - len(self._keys[key_size]) - self._inflight[key_size]
+        if missing <= 0:
+            return
+        executor = self._get_executor()
+        for _ in range(missing):
+            try:
+                future = executor.submit(generate_pem, key_size)
+            except BrokenProcessPool:
+                # a worker died; start a fresh pool on the next refill
+                self._executor = None
+                self.errors += 1
+                return
+            self._inflight[key_size] += 1
+            future.add_done_callback(lambda f, size=key_size: self._on_generated(size, f))
+
+    def _on_generated(self, key_size, future):
+        with self._lock:
+            self._inflight[key_size] -= 1
+            try:
+                pair = future.result()
+            except Exception:
+                # e.g. a worker process died; the next take() schedules a new refill
+                self.errors += 1
+                return
+            self._keys[key_size].append(pair)
+            self.generated += 1
+            self._generated_at.append(time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            cutoff = time.monotonic() - RATE_WINDOW
+            while self._generated_at and self._generated_at[0] < cutoff:
+                self._generated_at.popleft()
+            return {
+                "target": self.target,
+                "low_water": self.low_water,
+                "depth": {str(size): len(self._keys[size]) for size in sorted(self._active)},
+                "refilling": {str(size): self._inflight[size] for size in sorted(self._active)},
+                "refill_rate_per_min": len(self._generated_at) * 60.0 / RATE_WINDOW,
+                "hits": self.hits,
+                "misses": self.misses,
+                "generated": self.generated,
+                "errors": self.errors,
+            }
+
+
+rsa_key_pool = RSAKeyPool()
+
+
+def warm_from_settings():
+    """Start filling the RSA_KEY_POOL_WARM sizes; called by wsgi.py / asgi.py once the app is loaded."""
+    from django.conf import settings
+    sizes = [size for size in getattr(settings, "RSA_KEY_POOL_WARM", []) if size in KEY_SIZES]
+    if sizes:
+        rsa_key_pool.warm(sizes)
@@ -0,0 +1,53 @@
+# backend/demo/management/commands/convert_legacy_secrets.py
+import time
+
+from django.core.management.base import BaseCommand
+from backend.demo.models import WrappedSecret
+from backend.demo import utils
+
+
+class Command(BaseCommand):
+    help = ("Convert secrets still in the legacy format (whole value under the vault's Fernet key) "
+            "to envelope encryption, one batch per transaction. Safe to stop and rerun at any time; "
+            "vaults with a running rotation job are skipped (the job converts them).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Secrets converted per transaction (default: settings.VAULT_ROTATION_BATCH_SIZE).")
+        parser.add_argument("--vault", default=None, help="Only convert this vault id.")
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches, to throttle the load (default: 0).")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the legacy secrets per vault.")
+
+    def handle(self, *args, **options):
+        legacy = WrappedSecret.objects.filter(wrapped_dek__isnull=True)
+        if options["vault"]:
+            legacy = legacy.filter(vault_id=options["vault"])
+        vault_ids = list(legacy.order_by().values_list("vault_id", flat=True).distinct())
+        self.stdout.write(f"Found {len(vault_ids)} vault(s) with legacy secrets.")
+
+        total = 0
+        for vault_id in vault_ids:
+            if options["dry_run"]:
+                self.stdout.write(f"Vault {vault_id}: {legacy.filter(vault_id=vault_id).count()} legacy secret(s)")
+                continue
+            converted = 0
+            try:
+                while True:
+                    n = utils.convert_legacy_secrets(vault_id, options["batch_size"])
+                    if not n:
+                        break
+                    converted += n
+                    if options["sleep"]:
+                        time.sleep(options["sleep"])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Failed to convert vault {vault_id} after {converted} secret(s): {e}"))
+                total += converted
+                continue
+            total += converted
+            if converted:
+                self.stdout.write(self.style.SUCCESS(f"Converted {converted} secret(s) in vault {vault_id}"))
+            else:
+                self.stdout.write(f"Skipped vault {vault_id} (rotation job in progress or no vault key)")
+        if not options["dry_run"]:
+            self.stdout.write(f"Converted {total} secret(s) in total.")
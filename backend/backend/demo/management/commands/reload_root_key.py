@@ -0,0 +1,79 @@
+# backend/demo/management/commands/reload_root_key.py
+import os
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from backend.demo.models import Vault
+from backend.demo.rootkeys import root_keys
+
+
+class Command(BaseCommand):
+    help = ("Validate the vault root keyring, ask running processes to reload it (SIGHUP), "
+            "and optionally rewrap every vault key under the primary root key.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pid", type=int, action="append", default=[],
+                            help="PID of a running server process to send SIGHUP to (repeatable).")
+        parser.add_argument("--pidfile", action="append", default=[],
+                            help="File containing a PID to send SIGHUP to (repeatable).")
+        parser.add_argument("--rewrap", action="store_true",
+                            help="Re-encrypt every vault key (current, pending and retired versions) under the primary "
+                                 "root key so old root keys can be retired.")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Vaults rewrapped per transaction with --rewrap (default: 500).")
+
+    def handle(self, *args, **options):
+        # load (and validate) the keyring as this process sees it
+        try:
+            root_keys.reload()
+        except Exception as e:
+            raise CommandError(f"Invalid root keyring: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Root keyring OK: {root_keys.key_count} key(s)."))
+
+        pids = list(options["pid"])
+        for path in options["pidfile"]:
+            try:
+                with open(path, "r", encoding="utf-8") as fh:
+                    pids.append(int(fh.read().strip()))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read pid from {path}: {e}")
+        if pids and not hasattr(signal, "SIGHUP"):
+            raise CommandError("SIGHUP is not available on this platform.")
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGHUP)
+                self.stdout.write(f"Sent SIGHUP to {pid}")
+            except OSError as e:
+                self.stdout.write(self.style.ERROR(f"Could not signal {pid}: {e}"))
+
+        if options["rewrap"]:
+            self._rewrap(options["batch_size"])
+
+    def _rewrap(self, batch_size):
+        # MultiFernet.rotate decrypts with any key in the ring and re-encrypts with the primary
+        f = root_keys.fernet()
+        count, last_pk = 0, None
+        while True:
+            # one transaction per batch, with the rows locked until it commits, so a rotation
+            # running meanwhile is never overwritten with the old vault key
+            with transaction.atomic():
+                qs = Vault.objects.exclude(wrapped_key=None).order_by("pk")
+                if last_pk is not None:
+                    qs = qs.filter(pk__gt=last_pk)
+                batch = list(qs.select_for_update().only("id", "wrapped_key", "pending_wrapped_key", "previous_wrapped_keys")[:batch_size])
+                if not batch:
+                    break
+                for vault in batch:
+                    vault.wrapped_key = f.rotate(bytes(vault.wrapped_key))
+                    if vault.pending_wrapped_key:
+                        vault.pending_wrapped_key = f.rotate(bytes(vault.pending_wrapped_key))
+                    # retired key versions of a lazy rotation are root-wrapped tokens too
+                    vault.previous_wrapped_keys = {
+                        v: f.rotate(token.encode("utf-8")).decode("utf-8")
+                        for v, token in vault.previous_wrapped_keys.items()
+                    }
+                Vault.objects.bulk_update(batch, ["wrapped_key", "pending_wrapped_key", "previous_wrapped_keys"])
+            count += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(self.style.SUCCESS(f"Rewrapped {count} vault key(s) under the primary root key."))
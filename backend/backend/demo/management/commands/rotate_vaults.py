@@ -1,19 +1,209 @@
 # backend/demo/management/commands/rotate_vaults.py
-from django.core.management.base import BaseCommand
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Q
 from django.utils import timezone
-from backend.demo.models import Vault
+from backend.demo.models import RotationJob, Vault
 from backend.demo import utils
 
+
+def _due_vaults(now):
+    # due vaults, plus those a failed rotation job left with a pending key (the rotation
+    # adopts it); vaults with an active job are left to that job
+    return (Vault.objects
+            .filter(managed=True)
+            .filter(Q(next_rotation__isnull=False, next_rotation__lte=now) | Q(pending_wrapped_key__isnull=False))
+            .exclude(rotation_jobs__state__in=RotationJob.ACTIVE_STATES))
+
+
+def _split(items, n):
+    """Deal items round-robin into at most n non-empty slices."""
+    return [items[i::n] for i in range(n) if items[i::n]]
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))  # ceil without floats
+    return ordered[int(rank) - 1]
+
+
+def _init_worker():
+    # runs once per worker process: make sure Django is set up and never reuse
+    # a DB socket inherited from the parent process
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _rotate_one(vault_id, batch_size, lazy=False):
+    """
+    Claim and rotate a single vault. The row lock is held until the rotation commits,
+    so another worker (or another host running this command) skips it instead of
+    rotating it twice. Returns a plain dict so results can cross process boundaries.
+    """
+    t0 = time.perf_counter()
+    result = {"id": str(vault_id)}
+    try:
+        with transaction.atomic():
+            vault = (_due_vaults(timezone.now())
+                     .select_for_update(skip_locked=True)
+                     .filter(pk=vault_id)
+                     .first())
+            if vault is None:
+                # locked by someone else, or already rotated since we listed it
+                result["status"] = "skipped"
+                return result
+            result["name"] = vault.name
+            result["secrets"] = vault.secrets.count()
+            if lazy:
+                # only the key changes now; the sweep below and reads move the secrets
+                utils.rotate_vault_lazy(vault)
+            else:
+                utils.rotate_vault(vault, batch_size=batch_size)
+            result["next_rotation"] = str(vault.next_rotation)
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = str(e)
+        return result
+    result["status"] = "rotated"
+    result["elapsed"] = time.perf_counter() - t0
+    return result
+
+
+def _rotate_ids(vault_ids, batch_size, lazy=False):
+    """Rotate vault_ids sequentially on this thread's own DB connection."""
+    try:
+        return [_rotate_one(vid, batch_size, lazy) for vid in vault_ids]
+    finally:
+        connections.close_all()
+
+
+def _rotate_chunk(vault_ids, batch_size, concurrency, lazy=False):
+    """Rotate one worker's share of the due set with `concurrency` threads."""
+    slices = _split(vault_ids, concurrency)
+    if len(slices) <= 1:
+        return _rotate_ids(vault_ids, batch_size, lazy)
+    results = []
+    with ThreadPoolExecutor(max_workers=len(slices)) as pool:
+        for part in pool.map(_rotate_ids, slices, [batch_size] * len(slices), [lazy] * len(slices)):
+            results.extend(part)
+    return results
+
+
 class Command(BaseCommand):
-    help = "Rotate due vaults (those with managed=True and next_rotation <= now)."
+    help = ("Rotate due vaults (those with managed=True and next_rotation <= now, or left with a pending "
+            "key by a failed rotation job), then sweep "
+            "secrets left on old key versions by lazy rotations and drop keys no secret uses. "
+            "Safe to run from several hosts at once on Postgres: vaults are claimed with "
+            "SELECT ... FOR UPDATE SKIP LOCKED.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Secrets re-encrypted per bulk UPDATE (default: settings.VAULT_ROTATION_BATCH_SIZE).")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Number of worker processes the due set is split across (default: 1, in-process).")
+        parser.add_argument("--concurrency", type=int, default=1,
+                            help="Threads per worker, each with its own DB connection (default: 1).")
+        parser.add_argument("--lazy", action=argparse.BooleanOptionalAction, default=None,
+                            help="Only swap in new vault keys and leave the secrets to reads and the sweep "
+                                 "(default: settings.VAULT_LAZY_ROTATION).")
+        parser.add_argument("--sweep", action=argparse.BooleanOptionalAction, default=True,
+                            help="Rewrap secrets still on retired key versions and drop unused keys (default: on).")
+        parser.add_argument("--sweep-batch-size", type=int, default=None,
+                            help="Secrets rewrapped per sweep transaction (default: settings.VAULT_SWEEP_BATCH_SIZE).")
+        parser.add_argument("--sweep-pause", type=float, default=None,
+                            help="Seconds to pause between sweep batches (default: settings.VAULT_SWEEP_PAUSE).")
+        parser.add_argument("--sweep-limit", type=int, default=0,
+                            help="Stop sweeping after this many secrets in one run (default: 0, no limit).")
 
     def handle(self, *args, **options):
-        now = timezone.now()
-        due = Vault.objects.filter(managed=True, next_rotation__isnull=False, next_rotation__lte=now)
-        self.stdout.write(f"Found {due.count()} vault(s) due for rotation.")
-        for v in due:
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        concurrency = options["concurrency"]
+        lazy = options["lazy"] if options["lazy"] is not None else getattr(settings, "VAULT_LAZY_ROTATION", False)
+        if workers < 1 or concurrency < 1:
+            raise CommandError("--workers and --concurrency must be >= 1")
+        if connections["default"].vendor == "sqlite" and (workers > 1 or concurrency > 1):
+            # sqlite allows a single writer; parallel rotations would just fail with "database is locked"
+            self.stdout.write(self.style.WARNING("SQLite does not support concurrent writers; rotating sequentially."))
+            workers = concurrency = 1
+
+        due_ids = list(_due_vaults(timezone.now()).values_list("id", flat=True))
+        self.stdout.write(f"Found {len(due_ids)} vault(s) due for rotation.")
+        if due_ids:
+            self._rotate_due(due_ids, batch_size, workers, concurrency, lazy)
+        if options["sweep"]:
+            self._sweep(options)
+
+    def _rotate_due(self, due_ids, batch_size, workers, concurrency, lazy):
+        started = time.perf_counter()
+        results = []
+        if workers == 1:
+            results = _rotate_chunk(due_ids, batch_size, concurrency, lazy)
+        else:
+            chunks = _split(due_ids, workers)
+            # the parent's connection must not be shared with forked children
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker) as pool:
+                futures = [pool.submit(_rotate_chunk, chunk, batch_size, concurrency, lazy) for chunk in chunks]
+                for fut in as_completed(futures):
+                    results.extend(fut.result())
+        wall = time.perf_counter() - started
+
+        for r in results:
+            if r["status"] == "rotated":
+                self.stdout.write(self.style.SUCCESS(f"Rotated vault {r['id']} ({r['name']}) -> next_rotation {r['next_rotation']}"))
+            elif r["status"] == "skipped":
+                self.stdout.write(f"Skipped vault {r['id']} (claimed elsewhere or no longer due)")
+            else:
+                self.stdout.write(self.style.ERROR(f"Failed to rotate vault {r['id']}: {r['error']}"))
+
+        self._write_summary(results, wall)
+
+    def _sweep(self, options):
+        """
+        Low-priority pass over vaults with retired key versions: rewrap their stale
+        secrets in small throttled batches, then drop the keys nothing references.
+        """
+        batch_size = options["sweep_batch_size"] or getattr(settings, "VAULT_SWEEP_BATCH_SIZE", 100)
+        pause = options["sweep_pause"] if options["sweep_pause"] is not None else getattr(settings, "VAULT_SWEEP_PAUSE", 0.1)
+        limit = options["sweep_limit"]
+        vault_ids = list(Vault.objects.exclude(previous_wrapped_keys={}).values_list("id", flat=True))
+        swept = 0
+        for vault_id in vault_ids:
             try:
-                utils.rotate_vault(v)
-                self.stdout.write(self.style.SUCCESS(f"Rotated vault {v.id} ({v.name}) -> next_rotation {v.next_rotation}"))
+                while not limit or swept < limit:
+                    n = utils.sweep_stale_secrets(vault_id, min(batch_size, limit - swept) if limit else batch_size)
+                    if not n:
+                        break
+                    swept += n
+                    if pause:
+                        time.sleep(pause)
+                dropped = utils.drop_retired_keys(vault_id)
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Failed to rotate vault {v.id}: {e}"))
+                self.stdout.write(self.style.ERROR(f"Failed to sweep vault {vault_id}: {e}"))
+                continue
+            if dropped:
+                self.stdout.write(f"Dropped key version(s) {', '.join(map(str, dropped))} of vault {vault_id}")
+        self.stdout.write(f"Swept {swept} secret(s) onto current keys in {len(vault_ids)} vault(s) with retired keys.")
+
+    def _write_summary(self, results, wall):
+        rotated = [r for r in results if r["status"] == "rotated"]
+        skipped = sum(1 for r in results if r["status"] == "skipped")
+        failed = sum(1 for r in results if r["status"] == "failed")
+        secrets = sum(r["secrets"] for r in rotated)
+        times_ms = [r["elapsed"] * 1000 for r in rotated]
+        wall = wall or 1e-9
+        self.stdout.write(
+            f"Rotated {len(rotated)}, skipped {skipped}, failed {failed} in {wall:.2f}s: "
+            f"{len(rotated) / wall:.1f} vaults/s, {secrets / wall:.1f} secrets/s, "
+            f"p50 {_percentile(times_ms, 50):.1f} ms, p99 {_percentile(times_ms, 99):.1f} ms per vault"
+        )
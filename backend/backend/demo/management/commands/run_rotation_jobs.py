@@ -0,0 +1,15 @@
+# backend/demo/management/commands/run_rotation_jobs.py
+from django.core.management.base import BaseCommand
+from backend.demo import jobs
+
+class Command(BaseCommand):
+    help = ("Run queued vault rotation jobs, and resume jobs whose worker died, in this process. "
+            "Use with ROTATION_JOBS_IN_PROCESS=False to keep rotations out of the web workers.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the current queue and exit instead of polling.")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between polls when idle (default: 5).")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rotation job worker started." if not options["once"] else "Running pending rotation jobs.")
+        jobs.run_worker(poll_interval=options["poll_interval"], once=options["once"])
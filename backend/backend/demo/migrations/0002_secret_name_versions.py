@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+def number_existing_versions(apps, schema_editor):
+    """Existing secrets that share a name become versions 1..n, oldest first."""
+    WrappedSecret = apps.get_model("demo", "WrappedSecret")
+    last = None
+    batch = []
+    qs = WrappedSecret.objects.only("id", "vault_id", "name").order_by("vault_id", "name", "created_at", "id")
+    for secret in qs.iterator(chunk_size=1000):
+        key = (secret.vault_id, secret.name)
+        version = version + 1 if key == last else 1
+        last = key
+        if version > 1:
+            secret.version = version
+            batch.append(secret)
+        if len(batch) >= 1000:
+            WrappedSecret.objects.bulk_update(batch, ["version"])
+            batch = []
+    if batch:
+        WrappedSecret.objects.bulk_update(batch, ["version"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vault',
+            name='secret_name_policy',
+            field=models.CharField(choices=[('versioned', 'Versioned'), ('unique', 'Unique')], default='versioned', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='wrappedsecret',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(number_existing_versions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='wrappedsecret',
+            constraint=models.UniqueConstraint(fields=('vault', 'name', 'version'), name='demo_secret_vault_name_version_uniq'),
+        ),
+    ]
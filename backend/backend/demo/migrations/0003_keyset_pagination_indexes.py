@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0002_secret_name_versions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vault',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='demo_vault_owner_created_idx'),
+        ),
+    ]
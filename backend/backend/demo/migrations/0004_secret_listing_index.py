@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0003_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wrappedsecret',
+            index=models.Index(fields=['vault', '-created_at', '-id'], name='demo_secret_vault_created_idx'),
+        ),
+    ]
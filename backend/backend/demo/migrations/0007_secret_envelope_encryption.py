@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0006_registered_public_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wrappedsecret',
+            name='wrapped_dek',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='wrappedsecret',
+            index=models.Index(condition=models.Q(('wrapped_dek__isnull', True)), fields=['vault', 'id'], name='demo_secret_legacy_idx'),
+        ),
+    ]
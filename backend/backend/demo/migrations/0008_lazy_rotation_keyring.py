@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0007_secret_envelope_encryption'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vault',
+            name='key_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='vault',
+            name='previous_wrapped_keys',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='wrappedsecret',
+            name='key_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddIndex(
+            model_name='wrappedsecret',
+            index=models.Index(fields=['vault', 'key_version'], name='demo_secret_key_version_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # backend/demo/models.py
 import uuid
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -11,6 +12,12 @@ ROTATION_CHOICES = (
     ("yearly", "Yearly"),
 )
 
+# what happens when a secret is stored under a name that already exists in the vault
+SECRET_NAME_POLICY_CHOICES = (
+    ("versioned", "Versioned"),  # store a new version; lookups by name return the latest
+    ("unique", "Unique"),        # reject the duplicate name
+)
+
 class Vault(models.Model):
     """
     Represents a Key Vault (demo).
@@ -18,7 +25,12 @@ class Vault(models.Model):
     - name: friendly name
     - managed: if True, backend generates and rotates the vault key per rotation_period
     - rotation_period: 'none', 'monthly', 'yearly'
+    - secret_name_policy: 'versioned' or 'unique' (see SECRET_NAME_POLICY_CHOICES)
     - wrapped_key: the vault's wrapping key encrypted with the root key (Binary)
+    - key_version: version of wrapped_key, bumped on every rotation
+    - previous_wrapped_keys: older key versions still referenced by secrets after a lazy rotation
+    - pending_wrapped_key: the next vault key while a RotationJob is running (or after one
+      failed, until a new job or rotation takes it over as key_version + 1)
     - created_at, last_rotated, next_rotation
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -26,21 +38,101 @@ class Vault(models.Model):
     name = models.CharField(max_length=200)
     managed = models.BooleanField(default=True)
     rotation_period = models.CharField(max_length=20, choices=ROTATION_CHOICES, default="monthly")
+    secret_name_policy = models.CharField(max_length=20, choices=SECRET_NAME_POLICY_CHOICES, default="versioned")
     wrapped_key = models.BinaryField(null=True, blank=True)  # encrypted vault key (bytes)
+    key_version = models.PositiveIntegerField(default=1)
+    # {"<version>": wrapped key token} for retired keys some secrets still use; a key is
+    # dropped once no secret references its version (see utils.drop_retired_keys)
+    previous_wrapped_keys = models.JSONField(default=dict, blank=True)
+    # new vault key (wrapped under root) while a rotation job is in progress; secrets may be
+    # under either key until the job swaps it into wrapped_key
+    pending_wrapped_key = models.BinaryField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     last_rotated = models.DateTimeField(null=True, blank=True)
     next_rotation = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of a user's vaults (VaultListCreateView)
+            models.Index(fields=["owner", "-created_at", "-id"], name="demo_vault_owner_created_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.name} ({self.owner.username})"
+        # only use the owner's name if it is already loaded; never query for it
+        owner = self.owner.username if Vault.owner.is_cached(self) else self.owner_id
+        return f"{self.name} ({owner})"
 
 class WrappedSecret(models.Model):
     """
-    Secret stored inside a Vault. The .wrapped field stores the ciphertext produced
-    by Fernet(vault_key). For demo simplicity it's a BinaryField.
+    Secret stored inside a Vault, envelope-encrypted (see envelope.py): .wrapped is the
+    ciphertext under the secret's own data key and .wrapped_dek that data key encrypted
+    under the vault key, with a leading format-version byte. Legacy rows have
+    wrapped_dek NULL and .wrapped produced by Fernet(vault_key).
+    Secrets sharing a name in a vault are versions 1, 2, 3...; the unique
+    (vault, name, version) index also serves lookups by name.
     """
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     vault = models.ForeignKey(Vault, on_delete=models.CASCADE, related_name="secrets")
     name = models.CharField(max_length=200)
+    version = models.PositiveIntegerField(default=1)
     wrapped = models.BinaryField()  # ciphertext bytes
+    wrapped_dek = models.BinaryField(null=True, blank=True)  # wrapped data key (61 bytes), NULL for legacy rows
+    key_version = models.PositiveIntegerField(default=1)  # vault key version wrapping the data key
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["vault", "name", "version"], name="demo_secret_vault_name_version_uniq"),
+        ]
+        indexes = [
+            # keyset pagination of a vault's secrets (VaultStoreSecretView.get)
+            models.Index(fields=["vault", "-created_at", "-id"], name="demo_secret_vault_created_idx"),
+            # legacy-format rows left to convert (convert_legacy_secrets); empty once done
+            models.Index(fields=["vault", "id"], condition=Q(wrapped_dek__isnull=True), name="demo_secret_legacy_idx"),
+            # secrets left on an old key version after a lazy rotation (sweeper, key drop check)
+            models.Index(fields=["vault", "key_version"], name="demo_secret_key_version_idx"),
+        ]
+
+class RotationJob(models.Model):
+    """
+    Background rotation of one Vault (see jobs.py).
+    Secrets are re-encrypted in batches ordered by id; checkpoint is the last id
+    committed, so an interrupted job resumes from there instead of starting over.
+    heartbeat_at is refreshed after every batch and lets another worker take over
+    a job whose worker died.
+    """
+    ACTIVE_STATES = ("queued", "running")
+    STATE_CHOICES = (
+        ("queued", "queued"),
+        ("running", "running"),
+        ("succeeded", "succeeded"),
+        ("failed", "failed"),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    vault = models.ForeignKey(Vault, on_delete=models.CASCADE, related_name="rotation_jobs")
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    state = models.CharField(max_length=10, choices=STATE_CHOICES, default="queued")
+    secrets_total = models.PositiveIntegerField(default=0)
+    secrets_processed = models.PositiveIntegerField(default=0)
+    checkpoint = models.UUIDField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["state", "heartbeat_at"], name="demo_rotjob_state_idx"),
+        ]
+
+class RegisteredPublicKey(models.Model):
+    """
+    RSA public key registered for /demo/rsa/verify/, so clients can send its key_id
+    (SHA-256 of the DER SubjectPublicKeyInfo, hex) instead of the PEM body.
+    """
+    key_id = models.CharField(max_length=64, primary_key=True)
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    public_key = models.TextField()
+    key_size = models.PositiveIntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
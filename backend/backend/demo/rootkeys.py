@@ -0,0 +1,119 @@
+# backend/demo/rootkeys.py
+import os
+import base64
+import logging
+import signal
+import threading
+
+from cryptography.fernet import Fernet, MultiFernet
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _derive_from_secret_key(raw: str) -> bytes:
+    # fallback (DEMO ONLY): pad/truncate to 32 bytes and encode as a fernet key
+    return base64.urlsafe_b64encode(raw.encode("utf-8").ljust(32, b"0")[:32])
+
+
+def _read_root_keys():
+    """
+    Return the root fernet keys (list of bytes), primary first.
+    Sources, in order:
+    - VAULT_ROOT_KEY_FILE: path to a file with one key per line (e.g. a mounted secret)
+    - VAULT_ROOT_KEY: a single key, or a comma-separated keyring "new,old,..."
+    - fallback derived from SECRET_KEY (demo only)
+    Only the primary key encrypts; every key in the ring can decrypt, so a new root
+    key can be prepended without breaking vault keys wrapped under the old one.
+    A running process cannot see changes to its environment, so hot reload is meant
+    to be used with VAULT_ROOT_KEY_FILE.
+    """
+    path = os.getenv("VAULT_ROOT_KEY_FILE")
+    if path:
+        with open(path, "r", encoding="utf-8") as fh:
+            raw = [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+    else:
+        raw = [k.strip() for k in (os.getenv("VAULT_ROOT_KEY") or "").split(",") if k.strip()]
+    if raw:
+        return [k.encode("utf-8") for k in raw]
+    return [_derive_from_secret_key(settings.SECRET_KEY)]
+
+
+def _read_master_key() -> bytes:
+    mk = os.getenv("VAULT_MASTER_KEY")
+    if mk:
+        # ensure it's 32-bytes base64 or a raw passphrase — for demo we'll derive a fernet key
+        if len(mk) == 44 and mk.endswith('='):
+            return mk.encode('utf-8')
+        return _derive_from_secret_key(mk)
+    # fallback: use Django SECRET_KEY
+    return _derive_from_secret_key(settings.SECRET_KEY)
+
+
+class RootKeyProvider:
+    """
+    Process-wide holder of the root key material. The keyring is parsed and the
+    MultiFernet built once, then served from memory. It is re-read only when
+    reload() is called, or lazily after request_reload() (what the SIGHUP handler does).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fernet = None
+        self._master_key = None
+        self._reload_requested = False
+        self.key_count = 0
+
+    def _load(self):
+        keys = _read_root_keys()
+        fernet = MultiFernet([Fernet(k) for k in keys])
+        master_key = _read_master_key()
+        self._fernet, self._master_key = fernet, master_key
+        self.key_count = len(keys)
+        self._reload_requested = False
+
+    def fernet(self) -> MultiFernet:
+        if self._fernet is None or self._reload_requested:
+            with self._lock:
+                if self._fernet is None:
+                    self._load()
+                elif self._reload_requested:
+                    try:
+                        self._load()
+                        logger.info("Vault root keyring reloaded: %d key(s)", self.key_count)
+                    except Exception:
+                        # a bad key file must not take the running process down
+                        self._reload_requested = False
+                        logger.exception("Vault root keyring reload failed; keeping the previous keys")
+        return self._fernet
+
+    def master_key(self) -> bytes:
+        self.fernet()
+        return self._master_key
+
+    def reload(self):
+        """Re-read the keyring now. Raises (keeping the old keys) if the new ones are invalid."""
+        with self._lock:
+            self._load()
+        logger.info("Vault root keyring reloaded: %d key(s)", self.key_count)
+
+    def request_reload(self):
+        """Mark the keyring stale; the next fernet() call re-reads it. Safe to call from a signal handler."""
+        self._reload_requested = True
+
+
+root_keys = RootKeyProvider()
+
+
+def install_sighup_reload():
+    """
+    Make SIGHUP reload the root keyring. Skipped where SIGHUP does not exist, off the
+    main thread, or when another handler (e.g. the app server's) already owns it.
+    """
+    sighup = getattr(signal, "SIGHUP", None)
+    if sighup is None or threading.current_thread() is not threading.main_thread():
+        return False
+    if signal.getsignal(sighup) is not signal.SIG_DFL:
+        return False
+    signal.signal(sighup, lambda signum, frame: root_keys.request_reload())
+    return True
@@ -1,13 +1,22 @@
 # backend/demo/serializers.py
 from rest_framework import serializers
-from .models import Vault, WrappedSecret
+from .models import RotationJob, Vault, WrappedSecret
 
 #return vault info.
 class VaultSerializer(serializers.ModelSerializer):
+    # filled from a Count("secrets") annotation on the queryset, not a per-vault query
+    secret_count = serializers.IntegerField(read_only=True, default=0)
+
     class Meta:
         model = Vault
-        fields = ["id","owner","name","managed","rotation_period","created_at","last_rotated","next_rotation"]
-        read_only_fields = ["owner","created_at","last_rotated","next_rotation"]
+        fields = ["id","owner","name","managed","rotation_period","secret_name_policy","created_at","last_rotated","next_rotation","key_version","secret_count"]
+        read_only_fields = ["owner","created_at","last_rotated","next_rotation","key_version"]
+
+#secret listing: metadata only, never the ciphertext
+class SecretMetadataSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WrappedSecret
+        fields = ["id","name","version","created_at"]
 
 #handles vault creation input
 class CreateVaultSerializer(serializers.Serializer):
@@ -15,5 +24,23 @@ class CreateVaultSerializer(serializers.Serializer):
     # if managed True the backend will create a vault key; if False, user must provide key_b64
     managed = serializers.BooleanField(default=True)
     rotation_period = serializers.ChoiceField(choices=[("none","none"),("monthly","monthly"),("yearly","yearly")], default="monthly")
+    # 'versioned': storing an existing name adds a new version; 'unique': duplicate names are rejected
+    secret_name_policy = serializers.ChoiceField(choices=[("versioned","versioned"),("unique","unique")], default="versioned")
     # optional base64 urlsafe key provided by user; should be 44 chars if valid fernet
     key_b64 = serializers.CharField(required=False, allow_blank=True)
+
+#rotation job progress
+class RotationJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RotationJob
+        fields = ["id","vault","state","secrets_total","secrets_processed","progress","error",
+                  "created_at","started_at","finished_at"]
+
+    def get_progress(self, job):
+        if job.state == "succeeded":
+            return 1.0
+        if not job.secrets_total:
+            return 0.0
+        return min(1.0, job.secrets_processed / job.secrets_total)
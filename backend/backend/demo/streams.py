@@ -0,0 +1,144 @@
+# backend/demo/streams.py
+# Incremental readers for request bodies too large to load in memory at once, and a
+# streaming response that stays incremental under both WSGI and ASGI.
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+READ_CHUNK = 64 * 1024
+MAX_ITEM_BYTES = 1024 * 1024
+
+
+class StreamItemError(ValueError):
+    """A single item in the stream could not be decoded; reading can continue."""
+
+
+def iter_ndjson(stream, max_line=MAX_ITEM_BYTES):
+    """
+    Yield (line_no, obj_or_error) for each non-blank line of an NDJSON stream.
+    Bad lines yield a StreamItemError instead of stopping the stream.
+    """
+    line_no = 0
+    while True:
+        line = stream.readline(max_line + 1)
+        if not line:
+            return
+        line_no += 1
+        if len(line) > max_line and not line.endswith(b"\n"):
+            # skip the rest of the oversized line
+            while True:
+                rest = stream.readline(READ_CHUNK)
+                if not rest or rest.endswith(b"\n"):
+                    break
+            yield line_no, StreamItemError("line_too_long")
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, StreamItemError("invalid_json")
+
+
+def iter_json_array(stream, max_item=MAX_ITEM_BYTES):
+    """
+    Yield (position, obj) for each element of a top-level JSON array of objects,
+    reading the stream in chunks. Malformed input raises StreamItemError
+    (the array framing is lost, so reading cannot continue).
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    index = 1  # 1-based, like NDJSON line numbers
+    eof = False
+    pending = b""
+
+    def fill():
+        nonlocal buf, pos, eof, pending
+        data = stream.read(READ_CHUNK)
+        if not data:
+            eof = True
+            return
+        # keep incomplete utf-8 sequences for the next read
+        data = pending + data
+        try:
+            text = data.decode("utf-8")
+            pending = b""
+        except UnicodeDecodeError as e:
+            if e.start < len(data) - 3:
+                raise StreamItemError("invalid_utf8")
+            text, pending = data[:e.start].decode("utf-8"), data[e.start:]
+        buf = buf[pos:] + text
+        pos = 0
+
+    while True:
+        # skip whitespace and separators
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            if buf[pos] == "," and not started:
+                raise StreamItemError("invalid_json")
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise StreamItemError("unterminated_array")
+            fill()
+            continue
+        if not started:
+            if buf[pos] != "[":
+                raise StreamItemError("expected_json_array")
+            started = True
+            pos += 1
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            if eof:
+                raise StreamItemError("invalid_json")
+            if len(buf) - pos > max_item:
+                raise StreamItemError("item_too_large")
+            fill()
+            continue
+        if end == len(buf) and not eof and not isinstance(obj, (dict, list)):
+            # a scalar touching the end of the buffer may be cut short ("12" + "3")
+            fill()
+            continue
+        yield index, obj
+        index += 1
+        pos = end
+
+
+_END = object()
+
+
+async def _pull(iterator):
+    # one chunk at a time on the request's sync thread (thread_sensitive), where any
+    # database work in the iterator gets the same connection as the view
+    try:
+        while True:
+            chunk = await sync_to_async(next)(iterator, _END)
+            if chunk is _END:
+                return
+            yield chunk
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, iterator, content_type):
+    """
+    StreamingHttpResponse over a sync iterator. Under ASGI Django reads a sync iterator
+    to the end before sending anything, so there it is wrapped in an async iterator
+    that pulls one chunk per send; under WSGI the iterator is used as is. Note that
+    ASGI spools the whole request body (to disk past FILE_UPLOAD_MAX_MEMORY_SIZE)
+    before the view runs.
+    """
+    http_request = getattr(request, "_request", request)
+    if isinstance(http_request, ASGIRequest):
+        iterator = _pull(iter(iterator))
+    return StreamingHttpResponse(iterator, content_type=content_type)
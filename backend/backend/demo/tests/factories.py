@@ -0,0 +1,39 @@
+# backend/demo/tests/factories.py
+# Small helpers shared by the demo tests.
+from django.contrib.auth import get_user_model
+
+from backend.accounts.models import Profile
+from backend.demo import utils
+from backend.demo.models import Vault, WrappedSecret
+
+User = get_user_model()
+
+
+def make_user(username, role="reader"):
+    user = User.objects.create_user(username=username)
+    Profile.objects.update_or_create(user=user, defaults={"role": role})
+    return user
+
+
+def make_vault(owner, name="vault", **fields):
+    return Vault.objects.create(owner=owner, name=name,
+                                wrapped_key=utils.wrap_vault_key_with_root(utils.generate_vault_key()), **fields)
+
+
+def store(vault, name, value: bytes):
+    """Store a secret the way VaultStoreSecretView does."""
+    cipher = utils.vault_cipher(vault)
+    return utils.create_secret(vault, cipher, name, *cipher.encrypt(value))
+
+
+def store_legacy(vault, name, value: bytes):
+    """Store a secret in the pre-envelope format (whole value under the vault's Fernet key)."""
+    return WrappedSecret.objects.create(vault=vault, name=name, wrapped=utils.vault_cipher(vault).fernet.encrypt(value),
+                                        key_version=vault.key_version)
+
+
+def read(vault_id, secret_id) -> bytes:
+    """Decrypt a secret from a freshly loaded vault and row."""
+    vault = Vault.objects.get(pk=vault_id)
+    secret = WrappedSecret.objects.get(pk=secret_id)
+    return utils.vault_cipher(vault).decrypt(secret.wrapped, secret.wrapped_dek)
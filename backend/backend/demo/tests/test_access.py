@@ -0,0 +1,62 @@
+# backend/demo/tests/test_access.py
+# Query budget of the vault read endpoints. With session auth every request costs two
+# queries (session, user) before the view runs.
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend.demo import utils
+from .factories import make_user, make_vault, store
+
+AUTH_QUERIES = 2
+
+
+class VaultReadQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.admin = make_user("admin", role="admin")
+        self.other = make_user("other")
+        self.vault = make_vault(self.owner)
+        self.secret = store(self.vault, "api-key", b"value")
+        self.detail_url = f"/demo/vaults/{self.vault.pk}/"
+        self.secret_url = f"/demo/vaults/{self.vault.pk}/secrets/{self.secret.pk}/"
+
+    def get(self, user, url, expected_status, queries):
+        self.client.force_login(user)
+        with self.assertNumQueries(AUTH_QUERIES + queries):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, expected_status)
+        return response
+
+    def test_owner_detail(self):
+        # vault and secret count in one query; the owner's role is never looked up
+        response = self.get(self.owner, self.detail_url, 200, 1)
+        self.assertEqual(response.json()["secret_count"], 1)
+
+    def test_owner_retrieve(self):
+        # secret and vault in one query
+        response = self.get(self.owner, self.secret_url, 200, 1)
+        self.assertEqual(response.json()["value"], "value")
+
+    def test_admin_detail(self):
+        # plus the role (profile, grants); admin is not cached in a per-process cache
+        self.get(self.admin, self.detail_url, 200, 3)
+        self.get(self.admin, self.detail_url, 200, 3)
+
+    def test_admin_retrieve(self):
+        self.get(self.admin, self.secret_url, 200, 3)
+
+    def test_forbidden_detail(self):
+        self.get(self.other, self.detail_url, 403, 3)
+        # the reader role is cached now
+        self.get(self.other, self.detail_url, 403, 1)
+
+    def test_forbidden_retrieve(self):
+        self.get(self.other, self.secret_url, 403, 3)
+        self.get(self.other, self.secret_url, 403, 1)
+
+    def test_missing_secret(self):
+        # the vault is checked so a forbidden vault still answers 403
+        self.get(self.owner, f"/demo/vaults/{self.vault.pk}/secrets/{self.vault.pk}/", 404, 2)
@@ -0,0 +1,89 @@
+# backend/demo/tests/test_aeadstream.py
+import base64
+import io
+import os
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.test import SimpleTestCase, TestCase
+
+from backend.demo import aeadstream
+from backend.demo.aeadstream import ChunkedAEADError, HEADER_SIZE, MIN_CHUNK_SIZE, TAG_SIZE
+from .factories import make_user
+
+KEY = AESGCM.generate_key(bit_length=256)
+SEALED = MIN_CHUNK_SIZE + TAG_SIZE
+
+
+def encrypt(data, chunk_size=MIN_CHUNK_SIZE):
+    return b"".join(aeadstream.encrypt_stream(KEY, io.BytesIO(data), chunk_size))
+
+
+def decrypt(blob, key=KEY):
+    return b"".join(aeadstream.open_decrypt_stream(key, io.BytesIO(blob)))
+
+
+class ChunkedAEADTests(SimpleTestCase):
+    def test_round_trip_across_chunk_boundaries(self):
+        for size in (0, 1, MIN_CHUNK_SIZE - 1, MIN_CHUNK_SIZE, 2 * MIN_CHUNK_SIZE, 3 * MIN_CHUNK_SIZE + 5):
+            data = os.urandom(size)
+            blob = encrypt(data)
+            chunks = max(1, -(-size // MIN_CHUNK_SIZE))
+            self.assertEqual(len(blob), HEADER_SIZE + size + chunks * TAG_SIZE, size)
+            self.assertEqual(decrypt(blob), data, size)
+
+    def test_tampering_is_detected(self):
+        blob = encrypt(os.urandom(3 * MIN_CHUNK_SIZE))
+        header, body = blob[:HEADER_SIZE], blob[HEADER_SIZE:]
+        chunks = [body[i:i + SEALED] for i in range(0, len(body), SEALED)]
+        flipped = bytearray(blob)
+        flipped[HEADER_SIZE + SEALED + 3] ^= 1
+        cases = {
+            "flipped byte": bytes(flipped),
+            "reordered": header + chunks[1] + chunks[0] + chunks[2],
+            "dropped last chunk": header + chunks[0] + chunks[1],
+            "cut mid-chunk": blob[:-10],
+        }
+        for name, tampered in cases.items():
+            with self.assertRaises(ChunkedAEADError, msg=name):
+                decrypt(tampered)
+
+    def test_trailing_data_and_bad_input(self):
+        blob = encrypt(os.urandom(MIN_CHUNK_SIZE))
+        with self.assertRaisesMessage(ChunkedAEADError, "trailing_data"):
+            decrypt(blob + encrypt(b"x")[HEADER_SIZE:])
+        with self.assertRaisesMessage(ChunkedAEADError, "authentication_failed"):
+            decrypt(blob, AESGCM.generate_key(bit_length=256))
+        with self.assertRaisesMessage(ChunkedAEADError, "bad_header"):
+            decrypt(b"nope" + blob[4:])
+        with self.assertRaises(ValueError):
+            encrypt(b"x", chunk_size=MIN_CHUNK_SIZE - 1)
+
+
+class StreamEndpointTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_user("alice"))
+
+    def test_encrypt_then_decrypt(self):
+        data = os.urandom(3 * MIN_CHUNK_SIZE + 7)
+        response = self.client.post(f"/demo/symmetric/encrypt:stream?chunk_size={MIN_CHUNK_SIZE}", data,
+                                    content_type="application/octet-stream")
+        self.assertEqual((response.status_code, response["X-Chunk-Size"]), (200, str(MIN_CHUNK_SIZE)))
+        blob = b"".join(response.streaming_content)
+        key = response["X-Encryption-Key"]
+        response = self.client.post("/demo/symmetric/decrypt:stream", blob, content_type="application/octet-stream",
+                                    headers={"X-Encryption-Key": key})
+        self.assertEqual(b"".join(response.streaming_content), data)
+        self.assertEqual(decrypt(blob, base64.b64decode(key)), data)
+
+    def test_bad_requests(self):
+        blob = encrypt(b"secret")
+        cases = [
+            ("/demo/symmetric/encrypt:stream?chunk_size=10", b"x", {}, "invalid_chunk_size"),
+            ("/demo/symmetric/encrypt:stream", b"x", {"X-Encryption-Key": "AAAA"}, "invalid_key"),
+            ("/demo/symmetric/decrypt:stream", blob, {}, "invalid_key"),
+            ("/demo/symmetric/decrypt:stream", blob,
+             {"X-Encryption-Key": base64.b64encode(AESGCM.generate_key(bit_length=256)).decode()}, "decrypt_failed"),
+        ]
+        for url, body, headers, error in cases:
+            response = self.client.post(url, body, content_type="application/octet-stream", headers=headers)
+            self.assertEqual((response.status_code, response.json()["error"]), (400, error), url)
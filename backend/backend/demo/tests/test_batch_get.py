@@ -0,0 +1,68 @@
+# backend/demo/tests/test_batch_get.py
+import uuid
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from backend.demo import utils
+from backend.demo.views import BATCH_GET_MAX_ITEMS
+from .factories import make_user, make_vault, store, store_legacy
+
+
+class BatchGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.vault = make_vault(self.owner)
+        self.url = f"/demo/vaults/{self.vault.pk}/secrets:batchGet"
+        self.client.force_login(self.owner)
+
+    def batch(self, **payload):
+        return self.client.post(self.url, payload, content_type="application/json")
+
+    def test_results_in_input_order(self):
+        a, b = store(self.vault, "a", b"va"), store(self.vault, "b", b"vb")
+        missing = uuid.uuid4()
+        response = self.batch(ids=[str(b.pk), str(missing), "nope"], names=["a", "zzz"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"], [
+            {"id": str(b.pk), "name": "b", "version": 1, "value": "vb"},
+            {"id": str(missing), "error": "not_found"},
+            {"id": "nope", "error": "invalid_id"},
+            {"id": str(a.pk), "name": "a", "version": 1, "value": "va"},
+            {"name": "zzz", "error": "not_found"},
+        ])
+
+    def test_names_resolve_to_latest_version(self):
+        store(self.vault, "k", b"old")
+        store(self.vault, "k", b"new")
+        self.assertEqual(self.batch(names=["k"]).json()["results"][0]["value"], "new")
+
+    def test_non_string_names_are_rejected(self):
+        store(self.vault, "None", b"x")
+        store(self.vault, "1", b"x")
+        results = self.batch(names=[None, 1, {}, "", "x" * 201]).json()["results"]
+        self.assertEqual([r["error"] for r in results],
+                         ["invalid_name", "invalid_name", "invalid_name", "invalid_name", "name_too_long"])
+        self.assertEqual([r["name"] for r in results[:3]], [None, 1, {}])
+
+    def test_one_query_for_the_secrets(self):
+        secrets = [store(self.vault, f"s{i}", b"v") for i in range(20)]
+        store_legacy(self.vault, "legacy", b"old")
+        utils.vault_cipher(self.vault)
+        # session, user, vault, secrets
+        with self.assertNumQueries(4):
+            response = self.batch(ids=[str(s.pk) for s in secrets], names=["legacy"])
+        self.assertEqual(len([r for r in response.json()["results"] if "value" in r]), 21)
+
+    def test_request_errors(self):
+        self.assertEqual(self.batch().json(), {"error": "ids_or_names_required"})
+        self.assertEqual(self.batch(ids="a").json(), {"error": "ids_and_names_must_be_lists"})
+        response = self.batch(names=["n"] * (BATCH_GET_MAX_ITEMS + 1))
+        self.assertEqual(response.json(), {"error": "too_many_items", "max": BATCH_GET_MAX_ITEMS})
+
+    def test_other_users_vault(self):
+        store(self.vault, "a", b"va")
+        self.client.force_login(make_user("mallory"))
+        self.assertEqual(self.batch(names=["a"]).status_code, 403)
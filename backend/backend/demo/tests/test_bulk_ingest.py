@@ -0,0 +1,93 @@
+# backend/demo/tests/test_bulk_ingest.py
+import io
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from backend.demo import streams, utils, views
+from backend.demo.models import WrappedSecret
+from backend.demo.streams import StreamItemError, iter_json_array, iter_ndjson
+from .factories import make_user, make_vault, read, store
+
+
+class StreamReaderTests(SimpleTestCase):
+    def test_ndjson_reports_bad_lines_and_continues(self):
+        body = b'{"name": "a"}\n\nnot json\n{"name": "b"}'
+        items = list(iter_ndjson(io.BytesIO(body)))
+        self.assertEqual([n for n, _ in items], [1, 3, 4])
+        self.assertIsInstance(items[1][1], StreamItemError)
+        self.assertEqual((items[0][1], items[2][1]), ({"name": "a"}, {"name": "b"}))
+
+    def test_ndjson_oversized_line(self):
+        items = list(iter_ndjson(io.BytesIO(b'{"v": "' + b"x" * 50 + b'"}\n{"v": 1}\n'), max_line=20))
+        self.assertEqual(str(items[0][1]), "line_too_long")
+        self.assertEqual(items[1], (2, {"v": 1}))
+
+    @mock.patch.object(streams, "READ_CHUNK", 3)
+    def test_json_array_across_read_boundaries(self):
+        values = [{"name": "é€", "value": "ü" * 5}, {"name": "n", "value": "123"}, {"name": "x", "value": ""}]
+        items = list(iter_json_array(io.BytesIO(json.dumps(values, ensure_ascii=False).encode("utf-8"))))
+        self.assertEqual(items, list(enumerate(values, 1)))
+
+    def test_json_array_framing_errors(self):
+        for body, error in ((b'{"name": "a"}', "expected_json_array"), (b'[{"name": "a"}', "unterminated_array"),
+                            (b'[{"name": ', "invalid_json")):
+            with self.assertRaisesMessage(StreamItemError, error):
+                list(iter_json_array(io.BytesIO(body)))
+
+
+class BulkIngestTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.vault = make_vault(self.owner)
+        self.url = f"/demo/vaults/{self.vault.pk}/secrets:bulkIngest"
+        self.client.force_login(self.owner)
+
+    def ingest(self, body, content_type="application/x-ndjson"):
+        response = self.client.post(self.url, body, content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_ndjson_items_are_created_or_reported(self):
+        lines = [{"name": "a", "value": "1"}, "{broken", {"name": "b"}, {"name": ["a"], "value": "x"},
+                 {"name": "c" * 201, "value": "x"}, {"name": "a", "value": "2"}]
+        body = "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        with mock.patch.object(views, "BULK_INGEST_CHUNK_SIZE", 1):
+            out = self.ingest(body)
+        self.assertEqual(out[-1], {"summary": {"created": 2, "failed": 4}})
+        by_item = {line["item"]: line for line in out[:-1]}
+        self.assertEqual({n: line.get("error", line["status"]) for n, line in by_item.items()},
+                         {1: "created", 2: "invalid_json", 3: "name_and_value_required", 4: "invalid_name",
+                          5: "name_too_long", 6: "created"})
+        self.assertEqual((by_item[1]["version"], by_item[6]["version"]), (1, 2))
+        self.assertEqual(read(self.vault.pk, by_item[6]["id"]), b"2")
+
+    def test_json_array(self):
+        out = self.ingest(json.dumps([{"name": f"k{i}", "value": f"v{i}"} for i in range(3)]), "application/json")
+        self.assertEqual(out[-1], {"summary": {"created": 3, "failed": 0}})
+        self.assertEqual(WrappedSecret.objects.filter(vault=self.vault).count(), 3)
+
+    def test_broken_array_stops_reading(self):
+        out = self.ingest('[{"name": "a", "value": "1"}, {"name": ', "application/json")
+        # items read before the break are still inserted
+        self.assertIn({"status": "error", "error": "invalid_json"}, out)
+        self.assertEqual(out[-1], {"summary": {"created": 1, "failed": 0}})
+
+    def test_unique_policy_rejects_taken_names(self):
+        self.vault.secret_name_policy = "unique"
+        self.vault.save()
+        store(self.vault, "taken", b"x")
+        out = self.ingest('{"name": "taken", "value": "y"}\n{"name": "free", "value": "z"}\n')
+        self.assertEqual([line.get("error", line.get("status")) for line in out[:-1]], ["name_exists", "created"])
+
+    def test_unsupported_content_type(self):
+        response = self.client.post(self.url, "a,b", content_type="text/csv")
+        self.assertEqual(response.status_code, 415)
+
+    def test_other_users_vault(self):
+        self.client.force_login(make_user("mallory"))
+        response = self.client.post(self.url, '{"name": "a", "value": "1"}', content_type="application/x-ndjson")
+        self.assertIn(response.status_code, (403, 404))
+        self.assertFalse(WrappedSecret.objects.exists())
@@ -0,0 +1,96 @@
+# backend/demo/tests/test_envelope.py
+from io import StringIO
+
+from cryptography.fernet import Fernet, InvalidToken
+from django.core.management import call_command
+from django.test import TestCase
+
+from backend.demo import envelope, utils
+from backend.demo.envelope import VaultCipher
+from backend.demo.models import WrappedSecret
+from .factories import make_user, make_vault, read, store, store_legacy
+
+
+class VaultCipherTests(TestCase):
+    def setUp(self):
+        self.key = Fernet.generate_key()
+        self.cipher = VaultCipher([self.key])
+
+    def test_round_trip(self):
+        wrapped, wrapped_dek = self.cipher.encrypt(b"hunter2")
+        self.assertEqual(self.cipher.decrypt(wrapped, wrapped_dek), b"hunter2")
+        self.assertEqual(len(wrapped_dek), envelope.WRAPPED_DEK_SIZE)
+        self.assertEqual(wrapped_dek[0], envelope.FORMAT_V1)
+        self.assertNotIn(b"hunter2", wrapped)
+
+    def test_fresh_data_key_per_secret(self):
+        first, second = self.cipher.encrypt(b"same"), self.cipher.encrypt(b"same")
+        self.assertNotEqual(first[0], second[0])
+        self.assertNotEqual(self.cipher.unwrap_data_key(first[1]), self.cipher.unwrap_data_key(second[1]))
+
+    def test_tampering_is_detected(self):
+        wrapped, wrapped_dek = self.cipher.encrypt(b"value")
+        flipped = bytes([wrapped[-1] ^ 1])
+        with self.assertRaises(InvalidToken):
+            self.cipher.decrypt(wrapped[:-1] + flipped, wrapped_dek)
+        with self.assertRaises(InvalidToken):
+            self.cipher.decrypt(wrapped, wrapped_dek[:-1] + bytes([wrapped_dek[-1] ^ 1]))
+        with self.assertRaises(InvalidToken):
+            self.cipher.decrypt(wrapped, wrapped_dek[:20])
+
+    def test_other_vault_key_cannot_unwrap(self):
+        wrapped, wrapped_dek = self.cipher.encrypt(b"value")
+        with self.assertRaises(InvalidToken):
+            VaultCipher([Fernet.generate_key()]).decrypt(wrapped, wrapped_dek)
+
+    def test_older_keys_decrypt_and_rewrap_moves_to_first(self):
+        wrapped, wrapped_dek = self.cipher.encrypt(b"value")
+        new_key = Fernet.generate_key()
+        rotated = VaultCipher([new_key, self.key], version=2)
+        rewrapped = rotated.rewrap_data_key(wrapped_dek)
+        self.assertEqual(VaultCipher([new_key]).decrypt(wrapped, rewrapped), b"value")
+
+    def test_legacy_fernet_tokens(self):
+        token = Fernet(self.key).encrypt(b"old")
+        self.assertEqual(self.cipher.decrypt(token, None), b"old")
+        wrapped, wrapped_dek = self.cipher.convert_legacy(token)
+        self.assertEqual(self.cipher.decrypt(wrapped, wrapped_dek), b"old")
+
+
+class VaultSecretStorageTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.vault = make_vault(make_user("owner"))
+
+    def test_legacy_rows_stay_readable(self):
+        legacy = store_legacy(self.vault, "old", b"legacy-value")
+        self.assertIsNone(legacy.wrapped_dek)
+        self.assertEqual(read(self.vault.pk, legacy.pk), b"legacy-value")
+
+    def test_rewrap_secrets_leaves_payload_untouched(self):
+        secrets = [store(self.vault, f"s{i}", b"value-%d" % i) for i in range(3)]
+        before = {s.pk: bytes(s.wrapped) for s in secrets}
+        cipher = VaultCipher([utils.generate_vault_key()] + utils.vault_keys(self.vault), version=2)
+        utils.rewrap_secrets(cipher, list(WrappedSecret.objects.filter(vault=self.vault).only("id", "wrapped_dek")))
+        for secret in WrappedSecret.objects.filter(vault=self.vault):
+            self.assertEqual(bytes(secret.wrapped), before[secret.pk])
+            self.assertEqual(secret.key_version, 2)
+            self.assertEqual(cipher.decrypt(secret.wrapped, secret.wrapped_dek), b"value-%d" % int(secret.name[1:]))
+
+    def test_convert_legacy_secrets_in_batches(self):
+        legacy = [store_legacy(self.vault, f"old{i}", b"v%d" % i) for i in range(5)]
+        current = store(self.vault, "new", b"new")
+        self.assertEqual(utils.convert_legacy_secrets(self.vault.pk, batch_size=2), 2)
+        self.assertEqual(utils.convert_legacy_secrets(self.vault.pk, batch_size=10), 3)
+        self.assertEqual(utils.convert_legacy_secrets(self.vault.pk), 0)
+        self.assertFalse(WrappedSecret.objects.filter(vault=self.vault, wrapped_dek__isnull=True).exists())
+        for i, secret in enumerate(legacy):
+            self.assertEqual(read(self.vault.pk, secret.pk), b"v%d" % i)
+        self.assertEqual(read(self.vault.pk, current.pk), b"new")
+
+    def test_convert_legacy_secrets_command(self):
+        store_legacy(self.vault, "old", b"v")
+        call_command("convert_legacy_secrets", "--dry-run", stdout=StringIO())
+        self.assertTrue(WrappedSecret.objects.filter(wrapped_dek__isnull=True).exists())
+        call_command("convert_legacy_secrets", "--batch-size", "1", stdout=StringIO())
+        self.assertFalse(WrappedSecret.objects.filter(wrapped_dek__isnull=True).exists())
@@ -0,0 +1,158 @@
+# backend/demo/tests/test_jobs.py
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from backend.demo import jobs, utils
+from backend.demo.management.commands.rotate_vaults import _due_vaults
+from backend.demo.models import RotationJob, Vault, WrappedSecret
+from .factories import make_user, make_vault, read, store, store_legacy
+
+
+def failing_after(calls):
+    """rewrap_secrets that fails once it has been called `calls` times."""
+    real, count = utils.rewrap_secrets, [0]
+
+    def rewrap(cipher, secrets):
+        count[0] += 1
+        if count[0] > calls:
+            raise RuntimeError("boom")
+        real(cipher, secrets)
+    return rewrap
+
+
+class RotationJobTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.vault = make_vault(self.owner, managed=True)
+        self.values = {}
+        for i in range(5):
+            secret = (store_legacy if i == 0 else store)(self.vault, f"s{i}", b"value-%d" % i)
+            self.values[secret.pk] = b"value-%d" % i
+
+    def assertAllReadable(self):
+        for pk, value in self.values.items():
+            self.assertEqual(read(self.vault.pk, pk), value)
+
+    def new_job(self):
+        return RotationJob.objects.create(vault=self.vault)
+
+    def test_job_rotates_every_secret(self):
+        old_key = bytes(self.vault.wrapped_key)
+        job = jobs.run_job(self.new_job().pk, batch_size=2)
+        self.assertEqual((job.state, job.secrets_processed, job.secrets_total), ("succeeded", 5, 5))
+        vault = Vault.objects.get(pk=self.vault.pk)
+        self.assertEqual(vault.key_version, 2)
+        self.assertIsNone(vault.pending_wrapped_key)
+        self.assertNotEqual(bytes(vault.wrapped_key), old_key)
+        self.assertEqual(set(WrappedSecret.objects.values_list("key_version", flat=True)), {2})
+        self.assertFalse(WrappedSecret.objects.filter(wrapped_dek__isnull=True).exists())
+        self.assertAllReadable()
+
+    def test_finished_job_is_not_claimed_again(self):
+        job = jobs.run_job(self.new_job().pk)
+        self.assertIsNone(jobs.run_job(job.pk))
+
+    def test_vault_usable_while_job_runs(self):
+        def store_mid_job(cipher, secrets):
+            # a request that read the vault before the job created its pending key
+            if not hasattr(self, "late"):
+                self.late = utils.create_secret(self.vault, stale_cipher, "late", *stale_cipher.encrypt(b"late"))
+                self.values[self.late.pk] = b"late"
+            real(cipher, secrets)
+
+        stale_cipher, real = utils.vault_cipher(self.vault), utils.rewrap_secrets
+        with mock.patch.object(utils, "rewrap_secrets", store_mid_job):
+            job = jobs.run_job(self.new_job().pk, batch_size=2)
+        self.assertEqual(job.state, "succeeded")
+        # stored under the old key while the job ran, moved before the key swap
+        self.assertEqual(WrappedSecret.objects.get(pk=self.late.pk).key_version, 2)
+        self.assertAllReadable()
+
+    def fail_job(self):
+        with mock.patch.object(utils, "rewrap_secrets", failing_after(1)):
+            job = jobs.run_job(self.new_job().pk, batch_size=2)
+        self.assertEqual((job.state, job.error), ("failed", "boom"))
+        return Vault.objects.get(pk=self.vault.pk)
+
+    def test_failed_job_keeps_pending_key(self):
+        vault = self.fail_job()
+        self.assertIsNotNone(vault.pending_wrapped_key)
+        self.assertEqual(vault.key_version, 1)
+        # new secrets go under the pending key
+        secret = store(vault, "after", b"after")
+        self.values[secret.pk] = b"after"
+        self.assertEqual(secret.key_version, 2)
+        self.assertAllReadable()
+
+    def test_rotate_vault_adopts_pending_key_of_failed_job(self):
+        vault = self.fail_job()
+        pending = utils.unwrap_vault_key_with_root(vault.pending_wrapped_key)
+        utils.rotate_vault(vault, batch_size=2)
+        vault = Vault.objects.get(pk=self.vault.pk)
+        self.assertEqual(vault.key_version, 2)
+        self.assertIsNone(vault.pending_wrapped_key)
+        self.assertEqual(utils.unwrap_vault_key_with_root(vault.wrapped_key), pending)
+        self.assertEqual(set(WrappedSecret.objects.values_list("key_version", flat=True)), {2})
+        self.assertAllReadable()
+
+    def test_rotate_lazy_adopts_pending_key_of_failed_job(self):
+        vault = self.fail_job()
+        pending = utils.unwrap_vault_key_with_root(vault.pending_wrapped_key)
+        utils.rotate_vault_lazy(vault)
+        vault = Vault.objects.get(pk=self.vault.pk)
+        self.assertEqual((vault.key_version, list(vault.previous_wrapped_keys)), (2, ["1"]))
+        self.assertEqual(utils.unwrap_vault_key_with_root(vault.wrapped_key), pending)
+        while utils.sweep_stale_secrets(vault.pk, batch_size=2):
+            pass
+        self.assertEqual(utils.drop_retired_keys(vault.pk, grace=0), [1])
+        self.assertAllReadable()
+
+    def test_failed_job_vault_is_due(self):
+        vault = self.fail_job()
+        self.assertEqual(list(_due_vaults(timezone.now())), [vault])
+        self.new_job()
+        self.assertEqual(list(_due_vaults(timezone.now())), [])
+
+    def test_no_rotation_while_job_active(self):
+        vault = self.fail_job()
+        self.new_job()
+        with self.assertRaisesMessage(RuntimeError, "rotation job in progress"):
+            utils.rotate_vault(vault)
+        with self.assertRaisesMessage(RuntimeError, "rotation job in progress"):
+            utils.rotate_vault_lazy(vault)
+
+    def test_interrupted_job_resumes_from_checkpoint(self):
+        with mock.patch.object(utils, "rewrap_secrets", failing_after(1)):
+            job = jobs.run_job(self.new_job().pk, batch_size=2)
+        checkpoint = job.checkpoint
+        self.assertEqual(job.secrets_processed, 2)
+        # its worker died rather than failing: another one takes the job over
+        RotationJob.objects.filter(pk=job.pk).update(state="running",
+                                                     heartbeat_at=timezone.now() - timedelta(hours=1))
+        rewrapped = []
+        real = utils.rewrap_secrets
+
+        def record(cipher, secrets):
+            rewrapped.extend(s.pk for s in secrets)
+            real(cipher, secrets)
+        with mock.patch.object(utils, "rewrap_secrets", record):
+            job = jobs.run_job(job.pk, batch_size=2)
+        self.assertEqual((job.state, job.secrets_processed), ("succeeded", 5))
+        self.assertTrue(all(pk > checkpoint for pk in rewrapped))
+        self.assertAllReadable()
+
+    def test_live_job_is_not_taken_over(self):
+        job = self.new_job()
+        RotationJob.objects.filter(pk=job.pk).update(state="running", heartbeat_at=timezone.now())
+        self.assertIsNone(jobs.run_job(job.pk))
+
+    def test_submit_returns_active_job(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            first = jobs.submit_rotation(self.vault, self.owner)
+            second = jobs.submit_rotation(self.vault, self.owner)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(len(callbacks), 2)
@@ -0,0 +1,74 @@
+# backend/demo/tests/test_key_cache.py
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from backend.demo import utils
+from backend.demo.cache import LRUCache
+from backend.demo.models import Vault
+from .factories import make_user, make_vault, read, store
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual({k: cache.stats()[k] for k in ("size", "hits", "misses", "evictions")},
+                         {"size": 2, "hits": 3, "misses": 1, "evictions": 1})
+
+    def test_ttl_expiry(self):
+        cache = LRUCache(ttl=10)
+        with mock.patch("backend.demo.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=60)
+        with mock.patch("backend.demo.cache.time.monotonic", return_value=120.0):
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_pop_and_invalid_size(self):
+        cache = LRUCache()
+        cache.set("a", 1)
+        self.assertTrue(cache.pop("a"))
+        self.assertFalse(cache.pop("a"))
+        with self.assertRaises(ValueError):
+            LRUCache(max_size=0)
+
+
+class VaultKeyCacheTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.addCleanup(utils.vault_key_cache.clear)
+        self.vault = make_vault(make_user("alice"))
+
+    def test_root_unwrap_only_on_miss(self):
+        with mock.patch.object(utils, "unwrap_vault_key_with_root", wraps=utils.unwrap_vault_key_with_root) as unwrap:
+            first = utils.vault_cipher(self.vault)
+            self.assertIs(utils.vault_cipher(Vault.objects.get(pk=self.vault.pk)), first)
+        self.assertEqual(unwrap.call_count, 1)
+
+    def test_rotated_key_is_not_served_stale(self):
+        secret = store(self.vault, "db", b"hunter2")
+        before = utils.vault_cipher(self.vault)
+        utils.rotate_vault_lazy(self.vault)
+        # another process rotated: this one only sees the new wrapped_key in the row
+        after = utils.vault_cipher(Vault.objects.get(pk=self.vault.pk))
+        self.assertIsNot(after, before)
+        self.assertEqual(after.version, before.version + 1)
+        self.assertEqual(read(self.vault.pk, secret.pk), b"hunter2")
+
+    def test_metrics_report_cache(self):
+        # user ids are reused between tests; drop effective roles cached by earlier ones
+        cache.clear()
+        utils.vault_cipher(self.vault)
+        self.client.force_login(make_user("root", "admin"))
+        body = self.client.get(reverse("logs-metrics")).json()
+        self.assertEqual(body["vault_key_cache"]["size"], 1)
+        self.assertIn("rsa_key_cache", body)
@@ -0,0 +1,85 @@
+# backend/demo/tests/test_keypool.py
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.apps import apps
+from django.test import SimpleTestCase, override_settings
+
+from backend.demo import keypool
+from backend.demo.keypool import RSAKeyPool
+
+
+def fake_pem(key_size):
+    return {"private_key": f"priv-{key_size}", "public_key": f"pub-{key_size}"}
+
+
+class RSAKeyPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+        patcher = mock.patch.object(keypool, "generate_pem", fake_pem)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_pool(self, **kwargs):
+        pool = RSAKeyPool(**kwargs)
+        pool._get_executor = lambda: self.executor
+        return pool
+
+    def drain(self):
+        # runs after every queued generation job
+        self.executor.submit(lambda: None).result()
+
+    def test_miss_then_refill_to_target(self):
+        pool = self.make_pool(target=3, low_water=2)
+        self.assertIsNone(pool.take(2048))
+        self.drain()
+        stats = pool.stats()
+        self.assertEqual(stats["depth"], {"2048": 3})
+        self.assertEqual(stats["refilling"], {"2048": 0})
+        self.assertEqual((stats["hits"], stats["misses"], stats["generated"]), (0, 1, 3))
+
+    def test_hit_only_refills_below_low_water(self):
+        pool = self.make_pool(target=3, low_water=2)
+        pool.warm([3072])
+        self.drain()
+        self.assertEqual(pool.take(3072), fake_pem(3072))
+        self.drain()
+        self.assertEqual(pool.stats()["generated"], 3)
+        pool.take(3072)
+        self.drain()
+        stats = pool.stats()
+        self.assertEqual(stats["depth"], {"3072": 3})
+        self.assertEqual((stats["hits"], stats["generated"]), (2, 5))
+
+    def test_unsupported_size(self):
+        with self.assertRaises(ValueError):
+            self.make_pool(target=1).take(1024)
+
+    def test_worker_failure_is_counted(self):
+        pool = self.make_pool(target=1, low_water=1)
+        with mock.patch.object(keypool, "generate_pem", side_effect=RuntimeError):
+            pool.take(2048)
+            self.drain()
+        stats = pool.stats()
+        self.assertEqual((stats["errors"], stats["depth"]), (1, {"2048": 0}))
+
+
+class WarmFromSettingsTests(SimpleTestCase):
+    def test_app_ready_does_not_start_workers(self):
+        pool = RSAKeyPool()
+        with mock.patch.object(keypool, "rsa_key_pool", pool):
+            apps.get_app_config("demo").ready()
+        self.assertIsNone(pool._executor)
+
+    @override_settings(RSA_KEY_POOL_WARM=[2048, 1024, 4096])
+    def test_warms_supported_sizes(self):
+        with mock.patch.object(keypool.rsa_key_pool, "warm") as warm:
+            keypool.warm_from_settings()
+        warm.assert_called_once_with([2048, 4096])
+
+    @override_settings(RSA_KEY_POOL_WARM=[])
+    def test_nothing_to_warm(self):
+        with mock.patch.object(keypool.rsa_key_pool, "warm") as warm:
+            keypool.warm_from_settings()
+        warm.assert_not_called()
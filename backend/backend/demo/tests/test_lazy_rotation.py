@@ -0,0 +1,133 @@
+# backend/demo/tests/test_lazy_rotation.py
+import os
+from io import StringIO
+from unittest import mock
+
+from cryptography.fernet import Fernet
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase
+
+from backend.demo import utils
+from backend.demo.models import Vault, WrappedSecret
+from backend.demo.rootkeys import _read_root_keys, root_keys
+from .factories import make_user, make_vault, read, store
+
+
+class LazyRotationTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.vault = make_vault(self.owner)
+        self.secrets = [store(self.vault, f"s{i}", b"value-%d" % i) for i in range(5)]
+
+    def assertAllReadable(self):
+        for i, secret in enumerate(self.secrets):
+            self.assertEqual(read(self.vault.pk, secret.pk), b"value-%d" % i)
+
+    def versions(self):
+        return sorted(WrappedSecret.objects.filter(vault=self.vault).values_list("key_version", flat=True))
+
+    def test_rotate_lazy_leaves_secrets_untouched(self):
+        before = {s.pk: bytes(s.wrapped_dek) for s in self.secrets}
+        utils.rotate_vault_lazy(self.vault)
+        self.vault.refresh_from_db()
+        self.assertEqual(self.vault.key_version, 2)
+        self.assertEqual(list(self.vault.previous_wrapped_keys), ["1"])
+        for secret in WrappedSecret.objects.filter(vault=self.vault):
+            self.assertEqual(secret.key_version, 1)
+            self.assertEqual(bytes(secret.wrapped_dek), before[secret.pk])
+        self.assertAllReadable()
+
+    def test_read_moves_secret_to_current_key(self):
+        secret = self.secrets[0]
+        wrapped = bytes(secret.wrapped)
+        utils.rotate_vault_lazy(self.vault)
+        self.client.force_login(self.owner)
+        response = self.client.get(f"/demo/vaults/{self.vault.pk}/secrets/{secret.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["value"], "value-0")
+        secret.refresh_from_db()
+        self.assertEqual(secret.key_version, 2)
+        self.assertEqual(bytes(secret.wrapped), wrapped)
+        self.assertEqual(self.versions(), [1, 1, 1, 1, 2])
+        self.assertAllReadable()
+
+    def test_refresh_is_conditional_on_the_version_read(self):
+        stale = WrappedSecret.objects.get(pk=self.secrets[0].pk)
+        utils.rotate_vault_lazy(self.vault)
+        self.assertEqual(utils.sweep_stale_secrets(self.vault.pk), 5)
+        swept = bytes(WrappedSecret.objects.get(pk=stale.pk).wrapped_dek)
+        # a reader that loaded the row before the sweep must not overwrite it
+        utils.refresh_stale_secret(self.vault, utils.vault_cipher(self.vault), stale)
+        self.assertEqual(bytes(WrappedSecret.objects.get(pk=stale.pk).wrapped_dek), swept)
+        self.assertAllReadable()
+
+    def test_refresh_with_stale_cipher_is_skipped(self):
+        utils.rotate_vault_lazy(self.vault)
+        vault_v2 = Vault.objects.get(pk=self.vault.pk)
+        cipher_v2 = utils.vault_cipher(vault_v2)
+        utils.rotate_vault_lazy(Vault.objects.get(pk=self.vault.pk))
+        utils.refresh_stale_secret(vault_v2, cipher_v2, WrappedSecret.objects.get(pk=self.secrets[0].pk))
+        self.assertEqual(WrappedSecret.objects.get(pk=self.secrets[0].pk).key_version, 1)
+        self.assertAllReadable()
+
+    def test_sweep_in_batches(self):
+        utils.rotate_vault_lazy(self.vault)
+        self.assertEqual([utils.sweep_stale_secrets(self.vault.pk, batch_size=2) for _ in range(4)], [2, 2, 1, 0])
+        self.assertEqual(self.versions(), [2] * 5)
+        self.assertAllReadable()
+
+    def test_drop_retired_keys(self):
+        utils.rotate_vault_lazy(self.vault)
+        # within the grace period, then still in use
+        self.assertEqual(utils.drop_retired_keys(self.vault.pk), [])
+        self.assertEqual(utils.drop_retired_keys(self.vault.pk, grace=0), [])
+        utils.sweep_stale_secrets(self.vault.pk)
+        self.assertEqual(utils.drop_retired_keys(self.vault.pk, grace=0), [1])
+        self.vault.refresh_from_db()
+        self.assertEqual(self.vault.previous_wrapped_keys, {})
+        self.assertAllReadable()
+
+    def test_store_with_cipher_from_before_the_key_was_dropped(self):
+        # a writer holding the version 1 cipher while the vault rotates, is swept and
+        # version 1 is dropped
+        stale_vault = Vault.objects.get(pk=self.vault.pk)
+        stale_cipher = utils.vault_cipher(stale_vault)
+        payload = stale_cipher.encrypt(b"late")
+        utils.rotate_vault_lazy(self.vault)
+        utils.sweep_stale_secrets(self.vault.pk)
+        self.assertEqual(utils.drop_retired_keys(self.vault.pk, grace=0), [1])
+        late = utils.create_secret(stale_vault, stale_cipher, "late", *payload)
+        self.assertEqual(WrappedSecret.objects.get(pk=late.pk).key_version, 2)
+        self.assertEqual(read(self.vault.pk, late.pk), b"late")
+
+    def test_settle_key_versions_for_bulk_inserts(self):
+        stale_cipher = utils.vault_cipher(Vault.objects.get(pk=self.vault.pk))
+        batch = [WrappedSecret(vault=self.vault, name=f"bulk{i}", key_version=stale_cipher.version)
+                 for i in range(3)]
+        for i, secret in enumerate(batch):
+            secret.wrapped, secret.wrapped_dek = stale_cipher.encrypt(b"bulk-%d" % i)
+        utils.rotate_vault_lazy(self.vault)
+        utils.sweep_stale_secrets(self.vault.pk)
+        utils.drop_retired_keys(self.vault.pk, grace=0)
+        with transaction.atomic():
+            utils.settle_key_versions(utils.lock_vault(self.vault.pk), stale_cipher, batch)
+            WrappedSecret.objects.bulk_create(batch)
+        for i, secret in enumerate(batch):
+            self.assertEqual(secret.key_version, 2)
+            self.assertEqual(read(self.vault.pk, secret.pk), b"bulk-%d" % i)
+
+    def test_reload_root_key_rewraps_retired_keys(self):
+        utils.rotate_vault_lazy(self.vault)
+        old_roots = [k.decode() for k in _read_root_keys()]
+        new_root = Fernet.generate_key().decode()
+        self.addCleanup(root_keys.reload)
+        environ = {k: v for k, v in os.environ.items() if k != "VAULT_ROOT_KEY_FILE"}
+        with mock.patch.dict(os.environ, {**environ, "VAULT_ROOT_KEY": ",".join([new_root] + old_roots)}, clear=True):
+            call_command("reload_root_key", "--rewrap", "--batch-size", "1", stdout=StringIO())
+        # the old root keys are retired: every key version must now be wrapped under the new one
+        with mock.patch.dict(os.environ, {**environ, "VAULT_ROOT_KEY": new_root}, clear=True):
+            root_keys.reload()
+            utils.vault_key_cache.clear()
+            self.assertAllReadable()
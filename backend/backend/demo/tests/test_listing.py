@@ -0,0 +1,56 @@
+# backend/demo/tests/test_listing.py
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backend.demo import utils
+from .factories import make_user, make_vault, store
+
+
+class SecretListingTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.vault = make_vault(self.owner)
+        for name in ("a", "b", "a"):
+            store(self.vault, name, b"value")
+        self.client.force_login(self.owner)
+
+    def test_lists_metadata_without_ciphertext(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/demo/vaults/{self.vault.pk}/secrets/?page_size=2")
+        # read before the next request resets the query log
+        listing = [q["sql"] for q in queries.captured_queries if "demo_wrappedsecret" in q["sql"]]
+        body = response.json()
+        self.assertEqual([set(item) for item in body["results"]], [{"id", "name", "version", "created_at"}] * 2)
+        self.assertIsNotNone(body["next"])
+        rest = self.client.get(body["next"]).json()["results"]
+        self.assertEqual(sorted((s["name"], s["version"]) for s in body["results"] + rest),
+                         [("a", 1), ("a", 2), ("b", 1)])
+        self.assertTrue(listing)
+        self.assertFalse(any('"wrapped"' in sql or '"wrapped_dek"' in sql for sql in listing))
+
+    def test_other_users_vault(self):
+        self.client.force_login(make_user("mallory"))
+        self.assertIn(self.client.get(f"/demo/vaults/{self.vault.pk}/secrets/").status_code, (403, 404))
+
+
+class VaultListingTests(TestCase):
+    def setUp(self):
+        self.owner = make_user("owner")
+        self.client.force_login(self.owner)
+
+    def test_secret_count_without_a_query_per_vault(self):
+        first = make_vault(self.owner, "first")
+        store(first, "a", b"1")
+        store(first, "b", b"2")
+        make_vault(make_user("other"), "not mine")
+        with CaptureQueriesContext(connection) as one_vault:
+            self.client.get("/demo/vaults/")
+        self.assertGreater(len(one_vault), 0)
+        for i in range(3):
+            make_vault(self.owner, f"more{i}")
+        with self.assertNumQueries(len(one_vault)):
+            body = self.client.get("/demo/vaults/").json()
+        counts = {v["name"]: v["secret_count"] for v in body["results"]}
+        self.assertEqual(counts, {"first": 2, "more0": 0, "more1": 0, "more2": 0})
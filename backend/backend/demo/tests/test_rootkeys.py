@@ -0,0 +1,81 @@
+# backend/demo/tests/test_rootkeys.py
+import os
+import signal
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from cryptography.fernet import Fernet
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from backend.demo import rootkeys
+from backend.demo.rootkeys import RootKeyProvider
+
+
+class RootKeyProviderTests(SimpleTestCase):
+    def setUp(self):
+        fd, self.key_file = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.key_file)
+        self.old, self.new = Fernet.generate_key(), Fernet.generate_key()
+        self.write_keys(self.old)
+        patcher = mock.patch.dict(os.environ, {"VAULT_ROOT_KEY_FILE": self.key_file})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_keys(self, *keys, extra=""):
+        with open(self.key_file, "w", encoding="utf-8") as fh:
+            fh.write("# root keys, primary first\n" + "".join(k.decode() + "\n" for k in keys) + extra)
+
+    def test_keyring_is_read_once(self):
+        provider = RootKeyProvider()
+        with mock.patch.object(rootkeys, "_read_root_keys", wraps=rootkeys._read_root_keys) as read_keys:
+            self.assertIs(provider.fernet(), provider.fernet())
+            provider.master_key()
+        self.assertEqual(read_keys.call_count, 1)
+
+    def test_requested_reload_adds_new_primary(self):
+        provider = RootKeyProvider()
+        token = provider.fernet().encrypt(b"vault key")
+        self.write_keys(self.new, self.old)
+        self.assertEqual(provider.key_count, 1)
+        provider.request_reload()
+        fernet = provider.fernet()
+        self.assertEqual(provider.key_count, 2)
+        self.assertEqual(fernet.decrypt(token), b"vault key")
+        self.assertEqual(Fernet(self.new).decrypt(fernet.encrypt(b"x")), b"x")
+
+    def test_bad_key_file_keeps_previous_keys(self):
+        provider = RootKeyProvider()
+        fernet = provider.fernet()
+        self.write_keys(extra="not-a-key\n")
+        with self.assertRaises(ValueError):
+            provider.reload()
+        provider.request_reload()
+        with self.assertLogs("backend.demo.rootkeys", "ERROR"):
+            self.assertIs(provider.fernet(), fernet)
+        self.assertFalse(provider._reload_requested)
+
+    def test_sighup_requests_reload(self):
+        handler = signal.getsignal(signal.SIGHUP)
+        self.assertTrue(callable(handler))
+        self.assertFalse(rootkeys.install_sighup_reload())
+        provider = RootKeyProvider()
+        with mock.patch.object(rootkeys, "root_keys", provider):
+            handler(signal.SIGHUP, None)
+        self.assertTrue(provider._reload_requested)
+
+
+class ReloadRootKeyCommandTests(SimpleTestCase):
+    def test_validates_and_signals(self):
+        with mock.patch.object(rootkeys.root_keys, "reload"), mock.patch("os.kill") as kill:
+            out = StringIO()
+            call_command("reload_root_key", "--pid", "4242", stdout=out)
+        kill.assert_called_once_with(4242, signal.SIGHUP)
+        self.assertIn("Sent SIGHUP to 4242", out.getvalue())
+
+    def test_invalid_keyring(self):
+        with mock.patch.object(rootkeys.root_keys, "reload", side_effect=ValueError("bad key")):
+            with self.assertRaisesMessage(CommandError, "Invalid root keyring: bad key"):
+                call_command("reload_root_key", stdout=StringIO())
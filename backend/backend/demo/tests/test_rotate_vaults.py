@@ -0,0 +1,84 @@
+# backend/demo/tests/test_rotate_vaults.py
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from backend.demo import utils
+from backend.demo.management.commands import rotate_vaults
+from backend.demo.models import Vault
+from .factories import make_user, make_vault, read, store
+
+
+class HelperTests(SimpleTestCase):
+    def test_split_round_robin(self):
+        self.assertEqual(rotate_vaults._split([1, 2, 3, 4, 5], 2), [[1, 3, 5], [2, 4]])
+        self.assertEqual(rotate_vaults._split([1, 2], 4), [[1], [2]])
+        self.assertEqual(rotate_vaults._split([], 3), [])
+
+    def test_percentile_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(rotate_vaults._percentile(values, 50), 3)
+        self.assertEqual(rotate_vaults._percentile(values, 99), 5)
+        self.assertEqual(rotate_vaults._percentile([7], 1), 7)
+        self.assertEqual(rotate_vaults._percentile([], 50), 0.0)
+
+    def test_chunk_uses_one_thread_per_slice(self):
+        with mock.patch.object(rotate_vaults, "_rotate_ids", side_effect=lambda ids, *a: [{"id": i} for i in ids]) as run:
+            results = rotate_vaults._rotate_chunk([1, 2, 3], 100, 2)
+        self.assertEqual(sorted(r["id"] for r in results), [1, 2, 3])
+        self.assertEqual(sorted(c.args[0] for c in run.call_args_list), [[1, 3], [2]])
+
+
+# the command closes its thread's connection after each share; the test transaction must survive
+@mock.patch.object(rotate_vaults.connections, "close_all")
+class RotateVaultsCommandTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        owner = make_user("owner")
+        past = timezone.now() - timedelta(days=1)
+        self.due = [make_vault(owner, f"due{i}", next_rotation=past) for i in range(2)]
+        self.later = make_vault(owner, "later", next_rotation=timezone.now() + timedelta(days=1))
+        self.unmanaged = make_vault(owner, "unmanaged", managed=False, next_rotation=past)
+        self.secret = store(self.due[0], "db", b"hunter2")
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("rotate_vaults", *args, stdout=out)
+        return out.getvalue()
+
+    def versions(self):
+        return {v.name: v.key_version for v in Vault.objects.all()}
+
+    def test_rotates_due_vaults_only(self, close_all):
+        out = self.run_command("--concurrency", "2")
+        self.assertIn("rotating sequentially", out)
+        self.assertIn("Found 2 vault(s) due for rotation.", out)
+        self.assertIn("Rotated 2, skipped 0, failed 0", out)
+        self.assertEqual(self.versions(), {"due0": 2, "due1": 2, "later": 1, "unmanaged": 1})
+        self.assertGreater(Vault.objects.get(name="due0").next_rotation, timezone.now())
+        self.assertEqual(read(self.due[0].pk, self.secret.pk), b"hunter2")
+        self.assertIn("Found 0 vault(s)", self.run_command())
+
+    def test_failure_is_reported(self, close_all):
+        with mock.patch.object(utils, "rotate_vault", side_effect=RuntimeError("boom")):
+            out = self.run_command("--no-sweep")
+        self.assertIn(f"Failed to rotate vault {self.due[0].pk}: boom", out)
+        self.assertIn("Rotated 0, skipped 0, failed 2", out)
+        self.assertEqual(self.versions()["due0"], 1)
+
+    @override_settings(VAULT_RETIRED_KEY_GRACE=0)
+    def test_lazy_rotation_then_sweep(self, close_all):
+        out = self.run_command("--lazy", "--sweep-pause", "0")
+        self.assertIn("Swept 1 secret(s) onto current keys", out)
+        self.assertIn("Dropped key version(s) 1", out)
+        vault = Vault.objects.get(pk=self.due[0].pk)
+        self.assertEqual((vault.key_version, vault.previous_wrapped_keys), (2, {}))
+        self.assertEqual(read(vault.pk, self.secret.pk), b"hunter2")
+
+    def test_invalid_worker_count(self, close_all):
+        with self.assertRaises(CommandError):
+            self.run_command("--workers", "0")
@@ -0,0 +1,55 @@
+# backend/demo/tests/test_rotation.py
+from unittest import mock
+
+from django.test import TestCase
+
+from backend.demo import utils
+from backend.demo.models import Vault, WrappedSecret
+from .factories import make_user, make_vault, read, store, store_legacy
+
+
+class RotateVaultTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.vault = make_vault(make_user("owner"), managed=True, rotation_period="monthly")
+        self.secrets = [store(self.vault, f"s{i}", b"value-%d" % i) for i in range(4)]
+        self.secrets.append(store_legacy(self.vault, "legacy", b"value-4"))
+
+    def snapshot(self):
+        return {s.pk: (bytes(s.wrapped), s.wrapped_dek and bytes(s.wrapped_dek), s.key_version)
+                for s in WrappedSecret.objects.filter(vault=self.vault)}
+
+    def test_rotates_in_batches(self):
+        before = self.snapshot()
+        old_key = utils.unwrap_vault_key_with_root(self.vault.wrapped_key)
+        with mock.patch.object(utils, "rewrap_secrets", wraps=utils.rewrap_secrets) as rewrap:
+            utils.rotate_vault(self.vault, batch_size=2)
+        self.assertEqual([len(c.args[1]) for c in rewrap.call_args_list], [2, 2, 1])
+        vault = Vault.objects.get(pk=self.vault.pk)
+        self.assertEqual(vault.key_version, 2)
+        self.assertNotEqual(utils.unwrap_vault_key_with_root(vault.wrapped_key), old_key)
+        self.assertIsNotNone(vault.next_rotation)
+        for pk, (wrapped, wrapped_dek, _) in before.items():
+            secret = WrappedSecret.objects.get(pk=pk)
+            self.assertEqual(secret.key_version, 2)
+            self.assertNotEqual(bytes(secret.wrapped_dek), wrapped_dek)
+            if wrapped_dek is not None:
+                # only the data key is rewrapped
+                self.assertEqual(bytes(secret.wrapped), wrapped)
+        for i, secret in enumerate(self.secrets):
+            self.assertEqual(read(self.vault.pk, secret.pk), b"value-%d" % i)
+
+    def test_decrypt_failure_rolls_back_everything(self):
+        bad = self.secrets[3]
+        tampered = bytes(bad.wrapped_dek[:-1]) + bytes([bad.wrapped_dek[-1] ^ 1])
+        WrappedSecret.objects.filter(pk=bad.pk).update(wrapped_dek=tampered)
+        before, wrapped_key = self.snapshot(), bytes(self.vault.wrapped_key)
+        with self.assertRaisesMessage(RuntimeError, f"Failed to decrypt secret {bad.pk}"):
+            utils.rotate_vault(self.vault, batch_size=2)
+        self.assertEqual(self.snapshot(), before)
+        vault = Vault.objects.get(pk=self.vault.pk)
+        self.assertEqual((bytes(vault.wrapped_key), vault.key_version), (wrapped_key, 1))
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            utils.rotate_vault(self.vault, batch_size=0)
@@ -0,0 +1,63 @@
+# backend/demo/tests/test_rsa_batch.py
+from unittest import mock
+
+from django.test import TestCase
+
+from backend.demo import keycache, views
+from backend.offload import PoolBusy, crypto_pool
+from backend.tests.test_offload import PEM
+from .factories import make_user
+
+
+class RSABatchViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_user("alice"))
+
+    def post(self, url, body):
+        return self.client.post(url, body, content_type="application/json")
+
+    def sign(self, messages):
+        return self.post("/demo/rsa:batchSign", {"private_key": PEM["private_key"], "messages": messages})
+
+    def test_sign_and_verify_in_input_order(self):
+        results = self.sign(["a", 7, "c"]).json()["results"]
+        self.assertEqual(results[1], {"error": "message_must_be_string"})
+        key_id = self.post("/demo/rsa/keys/", {"public_key": PEM["public_key"]}).json()["key_id"]
+        keycache.parsed_key_cache.clear()
+        items = [
+            {"message": "a", "signature": results[0]["signature"]},
+            {"message": "c", "signature": results[0]["signature"]},
+            {"message": "c", "signature": results[2]["signature"], "public_key": PEM["public_key"]},
+            {"message": "a", "signature": "%%%"},
+            {"message": "a", "signature": results[0]["signature"], "key_id": "0" * 64},
+            "not an object",
+        ]
+        response = self.post("/demo/rsa:batchVerify", {"key_id": key_id, "items": items})
+        self.assertEqual(response.json()["results"], [
+            {"valid": True}, {"valid": False}, {"valid": True}, {"error": "invalid_signature_encoding"},
+            {"error": "unknown_key_id"}, {"error": "invalid_item"},
+        ])
+
+    def test_item_without_a_key(self):
+        response = self.post("/demo/rsa:batchVerify", {"items": [{"message": "a", "signature": "AA=="}]})
+        self.assertEqual(response.json()["results"], [{"error": "key_required"}])
+
+    def test_invalid_batches(self):
+        cases = [
+            ("/demo/rsa:batchSign", {"messages": ["a"]}, {"error": "private_key_required"}),
+            ("/demo/rsa:batchSign", {"private_key": PEM["private_key"], "messages": []}, {"error": "messages_required"}),
+            ("/demo/rsa:batchSign", {"private_key": "not a pem", "messages": ["a"]}, {"error": "invalid_key"}),
+            ("/demo/rsa:batchVerify", {"items": {}}, {"error": "items_required"}),
+        ]
+        for url, body, error in cases:
+            response = self.post(url, body)
+            self.assertEqual((response.status_code, response.json()), (400, error))
+        with mock.patch.object(views, "RSA_BATCH_MAX_ITEMS", 2):
+            response = self.sign(["a", "b", "c"])
+        self.assertEqual(response.json(), {"error": "too_many_items", "max": 2})
+
+    def test_busy_pool_answers_503(self):
+        with mock.patch.object(crypto_pool, "run_batch_sync", side_effect=PoolBusy):
+            response = self.sign(["a"])
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("Retry-After", response)
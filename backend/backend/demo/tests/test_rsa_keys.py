@@ -0,0 +1,73 @@
+# backend/demo/tests/test_rsa_keys.py
+from unittest import mock
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.test import TestCase
+
+from backend.demo import keycache
+from backend.tests.test_offload import PEM
+from .factories import make_user
+
+
+class ParsedKeyCacheTests(TestCase):
+    def setUp(self):
+        keycache.parsed_key_cache.clear()
+        self.addCleanup(keycache.parsed_key_cache.clear)
+
+    def test_pem_is_parsed_once(self):
+        pem = PEM["private_key"].encode()
+        with mock.patch.object(serialization, "load_pem_private_key",
+                               wraps=serialization.load_pem_private_key) as parse:
+            first = keycache.load_private_key(pem)
+            self.assertIs(keycache.load_private_key(pem), first)
+            # a different PEM for the same key is a different entry
+            keycache.load_private_key(pem.replace(b"\n", b"\r\n"))
+        self.assertEqual(parse.call_count, 2)
+
+    def test_registered_key_is_read_from_the_database_once(self):
+        self.client.force_login(make_user("alice"))
+        key_id = self.client.post("/demo/rsa/keys/", {"public_key": PEM["public_key"]},
+                                  content_type="application/json").json()["key_id"]
+        keycache.parsed_key_cache.clear()
+        with self.assertNumQueries(1):
+            key = keycache.registered_public_key(key_id)
+            self.assertIs(keycache.registered_public_key(key_id), key)
+        with self.assertNumQueries(1):
+            self.assertIsNone(keycache.registered_public_key("0" * 64))
+
+
+class RegisteredKeyViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_user("alice"))
+
+    def post(self, url, body):
+        return self.client.post(url, body, content_type="application/json")
+
+    def test_register_is_idempotent(self):
+        first = self.post("/demo/rsa/keys/", {"public_key": PEM["public_key"]})
+        again = self.post("/demo/rsa/keys/", {"public_key": PEM["public_key"]})
+        self.assertEqual((first.status_code, again.status_code), (201, 200))
+        self.assertEqual(first.json(), again.json())
+        self.assertEqual(first.json()["key_size"], 2048)
+
+    def test_register_rejects_bad_keys(self):
+        ec_pem = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+        for body, error in (({}, "public_key_required"), ({"public_key": ["x"]}, "invalid_key"),
+                            ({"public_key": "not a pem"}, "invalid_key"), ({"public_key": ec_pem}, "not_an_rsa_key")):
+            response = self.post("/demo/rsa/keys/", body)
+            self.assertEqual((response.status_code, response.json()), (400, {"error": error}))
+
+    def test_sign_then_verify_by_key_id_or_pem(self):
+        key_id = self.post("/demo/rsa/keys/", {"public_key": PEM["public_key"]}).json()["key_id"]
+        signature = self.post("/demo/rsa/sign/", {"private_key": PEM["private_key"], "message": "hi"}).json()["signature"]
+        for ref in ({"key_id": key_id}, {"public_key": PEM["public_key"]}):
+            self.assertEqual(self.post("/demo/rsa/verify/", {**ref, "message": "hi", "signature": signature}).json(),
+                             {"valid": True})
+            self.assertEqual(self.post("/demo/rsa/verify/", {**ref, "message": "ho", "signature": signature}).json(),
+                             {"valid": False})
+        response = self.post("/demo/rsa/verify/", {"key_id": "0" * 64, "message": "hi", "signature": signature})
+        self.assertEqual((response.status_code, response.json()), (404, {"error": "unknown_key_id"}))
+        response = self.post("/demo/rsa/sign/", {"private_key": "not a pem"})
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "invalid_key"}))
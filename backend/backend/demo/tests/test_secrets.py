@@ -0,0 +1,55 @@
+# backend/demo/tests/test_secrets.py
+from django.test import TestCase
+
+from backend.demo import utils
+from backend.demo.models import WrappedSecret
+from .factories import make_user, make_vault
+
+
+class StoreSecretTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.owner = make_user("owner")
+        self.vault = make_vault(self.owner)
+        self.url = f"/demo/vaults/{self.vault.pk}/secrets/"
+        self.client.force_login(self.owner)
+
+    def store(self, name, value="v", vault=None):
+        url = f"/demo/vaults/{vault.pk}/secrets/" if vault else self.url
+        return self.client.post(url, {"name": name, "value": value}, content_type="application/json")
+
+    def by_name(self, name, query=""):
+        return self.client.get(f"/demo/vaults/{self.vault.pk}/secrets/by-name/{name}/{query}")
+
+    def test_invalid_names(self):
+        for name, error in ((["y"], "invalid_name"), ({"a": 1}, "invalid_name"), (7, "invalid_name"),
+                            ("x" * 201, "name_too_long")):
+            response = self.store(name)
+            self.assertEqual((response.status_code, response.json()), (400, {"error": error}))
+        self.assertEqual(self.store("").json(), {"error": "name_and_value_required"})
+        self.assertEqual(self.store("x" * 200).status_code, 200)
+
+    def test_repeated_name_is_a_new_version(self):
+        versions = [self.store("api-key", f"v{i}").json()["version"] for i in range(3)]
+        self.assertEqual(versions, [1, 2, 3])
+        response = self.by_name("api-key")
+        self.assertEqual((response.json()["version"], response.json()["value"]), (3, "v2"))
+        self.assertEqual(self.by_name("api-key", "?version=1").json()["value"], "v0")
+        self.assertEqual(self.by_name("api-key", "?version=9").status_code, 404)
+        self.assertEqual(self.by_name("api-key", "?version=x").json(), {"error": "invalid_version"})
+
+    def test_names_with_slashes(self):
+        self.store("db/prod/password", "pw")
+        self.assertEqual(self.by_name("db/prod/password").json()["value"], "pw")
+
+    def test_unique_policy(self):
+        vault = make_vault(self.owner, name="unique", secret_name_policy="unique")
+        self.assertEqual(self.store("k", vault=vault).status_code, 200)
+        response = self.store("k", vault=vault)
+        self.assertEqual((response.status_code, response.json()), (409, {"error": "name_exists"}))
+        self.assertEqual(WrappedSecret.objects.filter(vault=vault).count(), 1)
+
+    def test_other_users_vault(self):
+        self.client.force_login(make_user("mallory"))
+        self.assertEqual(self.store("k").status_code, 403)
+        self.assertEqual(self.by_name("k").status_code, 403)
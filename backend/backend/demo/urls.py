@@ -1,18 +1,31 @@
 # backend/demo/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 from backend.accounts import views as accounts_views
 
+# async crypto variants (offloaded to backend.offload.crypto_pool), on by default under ASGI (asgi.py)
+ASYNC = getattr(settings, "ASYNC_CRYPTO_VIEWS", False)
+
 urlpatterns = [
     path("symmetric/encrypt/", views.SymmetricEncryptView.as_view(), name="sym-encrypt"),
     path("symmetric/decrypt/", views.SymmetricDecryptView.as_view(), name="sym-decrypt"),
-    path("rsa/generate/", views.RSAKeyGenView.as_view(), name="rsa-gen"),
-    path("rsa/sign/", views.RSASignView.as_view(), name="rsa-sign"),
-    path("rsa/verify/", views.RSAVerifyView.as_view(), name="rsa-verify"),
+    path("symmetric/encrypt:stream", views.SymmetricEncryptStreamView.as_view(), name="sym-encrypt-stream"),
+    path("symmetric/decrypt:stream", views.SymmetricDecryptStreamView.as_view(), name="sym-decrypt-stream"),
+    path("rsa/generate/", (views.AsyncRSAKeyGenView if ASYNC else views.RSAKeyGenView).as_view(), name="rsa-gen"),
+    path("rsa/sign/", (views.AsyncRSASignView if ASYNC else views.RSASignView).as_view(), name="rsa-sign"),
+    path("rsa/keys/", views.RSARegisterKeyView.as_view(), name="rsa-register-key"),
+    path("rsa/verify/", (views.AsyncRSAVerifyView if ASYNC else views.RSAVerifyView).as_view(), name="rsa-verify"),
+    path("rsa:batchSign", (views.AsyncRSABatchSignView if ASYNC else views.RSABatchSignView).as_view(), name="rsa-batch-sign"),
+    path("rsa:batchVerify", (views.AsyncRSABatchVerifyView if ASYNC else views.RSABatchVerifyView).as_view(), name="rsa-batch-verify"),
     path("vaults/", views.VaultListCreateView.as_view(), name="vault-list-create"),
     path("vaults/<uuid:vault_id>/", views.VaultDetailView.as_view(), name="vault-detail"),
     path("vaults/<uuid:vault_id>/rotate/", views.VaultRotateView.as_view(), name="vault-rotate"),
+    path("vaults/<uuid:vault_id>/rotation-jobs/<uuid:job_id>/", views.VaultRotationJobView.as_view(), name="vault-rotation-job"),
     path("vaults/<uuid:vault_id>/secrets/", views.VaultStoreSecretView.as_view(), name="vault-store-secret"),
+    path("vaults/<uuid:vault_id>/secrets:batchGet", views.VaultBatchRetrieveSecretsView.as_view(), name="vault-batch-get-secrets"),
+    path("vaults/<uuid:vault_id>/secrets:bulkIngest", views.VaultBulkIngestSecretsView.as_view(), name="vault-bulk-ingest-secrets"),
+    path("vaults/<uuid:vault_id>/secrets/by-name/<path:name>/", views.VaultSecretByNameView.as_view(), name="vault-get-secret-by-name"),
     path("vaults/<uuid:vault_id>/secrets/<uuid:secret_id>/", views.VaultRetrieveSecretView.as_view(), name="vault-get-secret"),
     path("sms/send/", accounts_views.SendSMSView.as_view(), name="demo-sms-send"),
     path("sms/verify/", accounts_views.VerifySMSView.as_view(), name="demo-sms-verify"),
@@ -1,30 +1,28 @@
 # backend/demo/utils.py
 import os
 import base64
+import hashlib
+import logging
 from datetime import timedelta
 from django.conf import settings
-from cryptography.fernet import Fernet
+from cryptography.fernet import InvalidToken, MultiFernet
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
 from django.utils import timezone
 
-from .models import Vault
+from .cache import LRUCache
+from .envelope import VaultCipher
+from .models import RotationJob, Vault, WrappedSecret
+from .rootkeys import root_keys
 
-def _ensure_root_key():
-    """
-    Return a root fernet key (bytes). Expect VAULT_ROOT_KEY env var in urlsafe base64 form.
-    If not set, derive a key from SECRET_KEY (demo only).
-    """
-    root = os.getenv("VAULT_ROOT_KEY")
-    if root:
-        # if already bytes-like string, ensure it's bytes
-        if isinstance(root, str):
-            root = root.encode("utf-8")
-        return root
-    # fallback (DEMO ONLY): derive from Django SECRET_KEY
-    sk = settings.SECRET_KEY.encode("utf-8")
-    return base64.urlsafe_b64encode(sk.ljust(32, b"0")[:32])
+logger = logging.getLogger(__name__)
+
+# how many secrets are re-encrypted and written back per bulk UPDATE during rotation
+DEFAULT_ROTATION_BATCH_SIZE = 500
 
-def root_fernet() -> Fernet:
-    return Fernet(_ensure_root_key())
+def root_fernet() -> MultiFernet:
+    """Root keyring (primary key encrypts, all keys decrypt), memoized per process."""
+    return root_keys.fernet()
 
 def generate_vault_key() -> bytes:
     """Return a new vault key in urlsafe_b64 bytes (32 random bytes base64)."""
@@ -40,7 +38,7 @@ def wrap_vault_key_with_root(vault_key_b64: bytes) -> bytes:
 
 
 def unwrap_vault_key_with_root(wrapped_key: bytes) -> bytes:
-    """Decrypt wrapped_key with root fernet; return vault_key_b64 (bytes)."""
+    """Decrypt wrapped_key with the root keyring; return vault_key_b64 (bytes)."""
     f = root_fernet()
 
     # Ensure we pass bytes or str to Fernet.decrypt. Django's BinaryField
@@ -54,6 +52,291 @@ def unwrap_vault_key_with_root(wrapped_key: bytes) -> bytes:
     return f.decrypt(token)
 
 
+# Unwrapped vault ciphers (envelope.VaultCipher), keyed by vault id. Each entry remembers the digest of the
+# wrapped_key it came from, so a rotated key (new wrapped_key) is never served stale,
+# even when the rotation happened in another process.
+# Note: the ciphers keep their keys as immutable bytes which Python cannot zero; evicted
+# entries are simply dropped, and the raw unwrapped key is never stored in the cache.
+vault_key_cache = LRUCache(
+    max_size=getattr(settings, "VAULT_KEY_CACHE_SIZE", 1024),
+    ttl=getattr(settings, "VAULT_KEY_CACHE_TTL", 300),
+)
+
+
+def _wrapped_key_digest(*wrapped_keys) -> bytes:
+    h = hashlib.sha256()
+    for wk in wrapped_keys:
+        if wk is not None:
+            h.update(wk.encode("utf-8") if isinstance(wk, str) else bytes(wk))
+        h.update(b"|")
+    return h.digest()
+
+
+def _retired_keys(vault: Vault):
+    # previous key versions, newest first
+    return [vault.previous_wrapped_keys[v] for v in sorted(vault.previous_wrapped_keys, key=int, reverse=True)]
+
+
+def vault_keys(vault: Vault):
+    """Unwrapped keys of every version the vault's secrets may use, current first."""
+    return [unwrap_vault_key_with_root(k) for k in [vault.wrapped_key] + _retired_keys(vault)]
+
+
+def has_active_job(vault_id) -> bool:
+    return RotationJob.objects.filter(vault_id=vault_id, state__in=RotationJob.ACTIVE_STATES).exists()
+
+
+def live_key_versions(vault: Vault) -> set:
+    """Key versions the vault can decrypt: the current one, retired ones and a rotation job's pending one."""
+    versions = {vault.key_version} | {int(v) for v in vault.previous_wrapped_keys}
+    if vault.pending_wrapped_key:
+        versions.add(vault.key_version + 1)
+    return versions
+
+
+def lock_vault(vault_id) -> Vault:
+    """
+    Reload a vault with its row locked (call inside transaction.atomic()). Rotations and
+    drop_retired_keys take the same lock, so the vault's keys cannot change until the
+    caller's transaction ends.
+    """
+    return Vault.objects.select_for_update().get(pk=vault_id)
+
+
+def settle_key_versions(locked: Vault, cipher: VaultCipher, secrets):
+    """
+    Make unsaved secrets encrypted by cipher insertable into the locked vault. cipher may
+    have been built before a rotation committed; if the key version it used is no longer
+    one the vault can decrypt, the data keys are rewrapped under the vault's current key
+    (cipher still holds the old key in memory, so nothing is lost).
+    """
+    live = live_key_versions(locked)
+    stale = [s for s in secrets if s.key_version not in live]
+    if not stale:
+        return
+    current = vault_cipher(locked)
+    for secret in stale:
+        secret.wrapped_dek = current.wrap_data_key(cipher.unwrap_data_key(secret.wrapped_dek))
+        secret.key_version = current.version
+
+
+def vault_cipher(vault: Vault) -> VaultCipher:
+    """
+    Return the VaultCipher for the vault's current key, unwrapping it with the root key only
+    on a cache miss. It also decrypts with the retired key versions of a lazy rotation.
+    While a rotation job is running (pending_wrapped_key set) it encrypts with the new key
+    (version key_version + 1) and decrypts with any.
+    """
+    digest = _wrapped_key_digest(vault.wrapped_key, vault.pending_wrapped_key, *_retired_keys(vault))
+    cached = vault_key_cache.get(vault.id)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    keys, version = vault_keys(vault), vault.key_version
+    if vault.pending_wrapped_key:
+        keys.insert(0, unwrap_vault_key_with_root(vault.pending_wrapped_key))
+        version += 1
+    cipher = VaultCipher(keys, version)
+    vault_key_cache.set(vault.id, (digest, cipher))
+    return cipher
+
+
+def rewrap_secrets(cipher: VaultCipher, secrets):
+    """
+    Move secrets loaded with only("id", "wrapped_dek") onto cipher's first key (and its
+    key_version) and save them. Envelope secrets only get their data key rewrapped (the payload is never read);
+    legacy ones are loaded and converted to the envelope format.
+    Raises RuntimeError naming the first secret that cannot be decrypted.
+    """
+    envelope = [s for s in secrets if s.wrapped_dek is not None]
+    legacy_ids = [s.pk for s in secrets if s.wrapped_dek is None]
+    for secret in envelope:
+        try:
+            secret.wrapped_dek = cipher.rewrap_data_key(secret.wrapped_dek)
+        except InvalidToken:
+            raise RuntimeError(f"Failed to decrypt secret {secret.id}")
+        secret.key_version = cipher.version
+    if envelope:
+        WrappedSecret.objects.bulk_update(envelope, ["wrapped_dek", "key_version"])
+    if legacy_ids:
+        legacy = list(WrappedSecret.objects.filter(pk__in=legacy_ids).only("id", "wrapped", "wrapped_dek"))
+        for secret in legacy:
+            try:
+                secret.wrapped, secret.wrapped_dek = cipher.convert_legacy(secret.wrapped)
+            except InvalidToken:
+                raise RuntimeError(f"Failed to decrypt secret {secret.id}")
+            secret.key_version = cipher.version
+        WrappedSecret.objects.bulk_update(legacy, ["wrapped", "wrapped_dek", "key_version"])
+
+
+def _rewrap_batch(vault_id, batch_size, stale):
+    # one batch of the vault's secrets matching stale(vault) -> current key, under the
+    # vault row lock so no rotation changes the key meanwhile; a running rotation job
+    # rewraps everything itself, so its vault is skipped (the pending key a failed job
+    # left behind is simply the key secrets move to)
+    if batch_size is None:
+        batch_size = getattr(settings, "VAULT_ROTATION_BATCH_SIZE", DEFAULT_ROTATION_BATCH_SIZE)
+    with transaction.atomic():
+        vault = Vault.objects.select_for_update().filter(pk=vault_id).first()
+        if vault is None or not vault.wrapped_key:
+            return 0
+        if vault.pending_wrapped_key and has_active_job(vault.id):
+            return 0
+        secrets = list(WrappedSecret.objects.filter(stale(vault), vault_id=vault.id)
+                       .only("id", "wrapped_dek").order_by("pk")[:batch_size])
+        if secrets:
+            rewrap_secrets(vault_cipher(vault), secrets)
+    return len(secrets)
+
+
+def convert_legacy_secrets(vault_id, batch_size: int = None) -> int:
+    """
+    Convert up to batch_size of a vault's legacy secrets (wrapped_dek NULL) to the
+    envelope format in one transaction. Returns how many were converted: 0 once none
+    are left, or while a rotation job runs (the job converts them itself).
+    """
+    return _rewrap_batch(vault_id, batch_size, lambda vault: Q(wrapped_dek__isnull=True))
+
+
+def sweep_stale_secrets(vault_id, batch_size: int = None) -> int:
+    """
+    Lazy rotation sweeper: move up to batch_size secrets still on an older key version
+    (or in the legacy format) onto the vault's current key, in one transaction.
+    Returns how many were rewrapped; 0 once none are left.
+    """
+    return _rewrap_batch(vault_id, batch_size,
+                         lambda vault: Q(key_version__lt=vault.key_version) | Q(wrapped_dek__isnull=True))
+
+
+def refresh_stale_secret(vault: Vault, cipher: VaultCipher, secret: WrappedSecret):
+    """
+    Lazy rotation on read: move a secret just decrypted from an older key version (or the
+    legacy format) onto the current key. Only the data key is rewrapped. The UPDATE is
+    conditional on the version that was read, so a concurrent rotation or sweeper wins,
+    and runs under the vault row lock only while cipher's key is still the vault's
+    current one (a stale cipher skips the refresh). Failures are logged and ignored
+    since the read itself succeeded.
+    """
+    if vault.pending_wrapped_key or secret.key_version > cipher.version:
+        return
+    if secret.key_version == cipher.version and secret.wrapped_dek is not None:
+        return
+    try:
+        if secret.wrapped_dek is None:
+            wrapped, wrapped_dek = cipher.convert_legacy(secret.wrapped)
+            fields = {"wrapped": wrapped, "wrapped_dek": wrapped_dek}
+        else:
+            fields = {"wrapped_dek": cipher.rewrap_data_key(secret.wrapped_dek)}
+        with transaction.atomic():
+            locked = lock_vault(vault.pk)
+            if locked.pending_wrapped_key or locked.key_version != cipher.version:
+                return
+            WrappedSecret.objects.filter(pk=secret.pk, key_version=secret.key_version).update(
+                key_version=cipher.version, **fields)
+    except Exception:
+        logger.warning("Lazy re-encryption of secret %s failed", secret.pk, exc_info=True)
+
+
+def rotate_vault_lazy(vault: Vault) -> Vault:
+    """
+    Lazy rotation: make a new vault key current (key_version + 1) without touching any
+    secret. The old key moves to previous_wrapped_keys and keeps decrypting; secrets are
+    moved to the new key as they are read (refresh_stale_secret) or by the sweeper
+    (rotate_vaults), and retired keys are dropped once unused (drop_retired_keys).
+    The pending key of a failed rotation job, which may already encrypt secrets, is
+    adopted as the new key.
+    """
+    if not vault.wrapped_key:
+        raise RuntimeError("Vault has no wrapped_key to rotate")
+    now = timezone.now()
+    with transaction.atomic():
+        locked = lock_vault(vault.pk)
+        if locked.pending_wrapped_key and has_active_job(locked.pk):
+            raise RuntimeError("Vault has a rotation job in progress")
+        wrapped_key = bytes(locked.wrapped_key)
+        vault.previous_wrapped_keys = {**locked.previous_wrapped_keys, str(locked.key_version): wrapped_key.decode("utf-8")}
+        vault.wrapped_key = locked.pending_wrapped_key or wrap_vault_key_with_root(generate_vault_key())
+        vault.pending_wrapped_key = None
+        vault.key_version = locked.key_version + 1
+        vault.last_rotated = now
+        vault.next_rotation = compute_next_rotation(now, vault.rotation_period)
+        vault.save(update_fields=["wrapped_key", "pending_wrapped_key", "key_version", "previous_wrapped_keys",
+                                  "last_rotated", "next_rotation"])
+    return vault
+
+
+def drop_retired_keys(vault_id, grace: int = None) -> list:
+    """
+    Drop the retired key versions of a vault that no secret references; returns the dropped
+    versions. Nothing is dropped until grace seconds (settings.VAULT_RETIRED_KEY_GRACE)
+    after the vault's last rotation, so requests still holding an older cipher finish first.
+    """
+    if grace is None:
+        grace = getattr(settings, "VAULT_RETIRED_KEY_GRACE", 3600)
+    with transaction.atomic():
+        vault = Vault.objects.select_for_update().filter(pk=vault_id).first()
+        if vault is None or not vault.previous_wrapped_keys:
+            return []
+        if vault.last_rotated and vault.last_rotated > timezone.now() - timedelta(seconds=grace):
+            return []
+        versions = [int(v) for v in vault.previous_wrapped_keys]
+        used = set(WrappedSecret.objects.filter(vault_id=vault.id, key_version__in=versions)
+                   .order_by().values_list("key_version", flat=True).distinct())
+        dropped = [v for v in versions if v not in used]
+        if dropped:
+            vault.previous_wrapped_keys = {v: k for v, k in vault.previous_wrapped_keys.items() if int(v) in used}
+            vault.save(update_fields=["previous_wrapped_keys"])
+    return sorted(dropped)
+
+
+class SecretNameTaken(Exception):
+    """Raised when a secret name already exists in a vault whose policy is 'unique'."""
+
+
+def assign_secret_versions(vault: Vault, secrets) -> set:
+    """
+    Set .version on unsaved WrappedSecrets according to vault.secret_name_policy,
+    using one query for the current latest versions. Returns the ids of secrets
+    rejected because their name is taken in a 'unique' vault.
+    """
+    names = {s.name for s in secrets}
+    latest = dict(
+        WrappedSecret.objects.filter(vault_id=vault.id, name__in=names)
+        .values("name").annotate(latest=Max("version")).values_list("name", "latest")
+    )
+    rejected = set()
+    for s in secrets:
+        current = latest.get(s.name, 0)
+        if current and vault.secret_name_policy == "unique":
+            rejected.add(s.id)
+            continue
+        s.version = latest[s.name] = current + 1
+    return rejected
+
+
+def create_secret(vault: Vault, cipher: VaultCipher, name: str, wrapped: bytes, wrapped_dek: bytes,
+                  attempts: int = 3) -> WrappedSecret:
+    """
+    Create a WrappedSecret encrypted by cipher, honouring vault.secret_name_policy: a
+    repeated name becomes the next version, or raises SecretNameTaken for 'unique' vaults.
+    A concurrent writer taking the same version is retried. The insert runs under the
+    vault row lock (see settle_key_versions), so a rotation committed meanwhile cannot
+    leave the secret under a dropped key.
+    """
+    for attempt in range(attempts):
+        secret = WrappedSecret(vault=vault, name=name, wrapped=wrapped, wrapped_dek=wrapped_dek,
+                               key_version=cipher.version)
+        if assign_secret_versions(vault, [secret]):
+            raise SecretNameTaken(name)
+        try:
+            with transaction.atomic():
+                settle_key_versions(lock_vault(vault.pk), cipher, [secret])
+                secret.save(force_insert=True)
+            return secret
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
 def compute_next_rotation(now, rotation_period: str):
     if rotation_period == "monthly":
         return now + timedelta(days=30)
@@ -61,44 +344,62 @@ def compute_next_rotation(now, rotation_period: str):
         return now + timedelta(days=365)
     return None
 
-def rotate_vault(vault: Vault):
+def rotate_vault(vault: Vault, batch_size: int = None):
     """
     Rotate a single Vault:
     - unwrap existing vault key (if any)
     - generate new vault key
-    - rewrap every secret: decrypt with old key, encrypt with new key
+    - rewrap every secret's data key: decrypt with old key, encrypt with new key
+      (legacy secrets without a data key are converted to the envelope format)
     - store new wrapped_key encrypted under root
     - update last_rotated and next_rotation
-    """
-    from cryptography.fernet import Fernet
 
+    Only the fixed-size wrapped data keys are read and written, in chunks of batch_size
+    (defaults to settings.VAULT_ROTATION_BATCH_SIZE) with one bulk UPDATE per chunk.
+    Everything runs in a single transaction, so a failed decrypt leaves all secrets and
+    the vault on the old key. The pending key of a failed rotation job is adopted as the
+    new key, since secrets stored after that job started already use it.
+    """
     now = timezone.now()
     if not vault.wrapped_key:
         raise RuntimeError("Vault has no wrapped_key to rotate")
+    if batch_size is None:
+        batch_size = getattr(settings, "VAULT_ROTATION_BATCH_SIZE", DEFAULT_ROTATION_BATCH_SIZE)
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
 
-    # get old vault key (bytes, URL-safe base64)
-    old_vault_key_b64 = unwrap_vault_key_with_root(vault.wrapped_key)
-    old_fernet = Fernet(old_vault_key_b64)
+    with transaction.atomic():
+        # the row lock keeps secrets from being inserted under the old key after the
+        # rewrap below has passed them (create_secret waits for it, then settles)
+        locked = lock_vault(vault.pk)
+        if locked.pending_wrapped_key and has_active_job(locked.pk):
+            raise RuntimeError("Vault has a rotation job in progress")
+        if locked.pending_wrapped_key:
+            new_vault_key_b64 = unwrap_vault_key_with_root(locked.pending_wrapped_key)
+        else:
+            new_vault_key_b64 = generate_vault_key()
+        # new vault key first: encrypts; the current and any retired ones still decrypt
+        cipher = VaultCipher([new_vault_key_b64] + vault_keys(locked), locked.key_version + 1)
 
-    # generate new vault key
-    new_vault_key_b64 = generate_vault_key()
-    new_fernet = Fernet(new_vault_key_b64)
+        # rewrap all data keys, chunk by chunk; the payload ciphertexts are not loaded
+        # (a decrypt failure raises, rolling back the whole transaction to avoid data loss)
+        # keyset batches by pk: a cursor left open across the UPDATEs may return rows
+        # already rewritten (SQLite does), which would rewrap them twice
+        qs = WrappedSecret.objects.filter(vault_id=vault.id).only("id", "wrapped_dek").order_by("pk")
+        batch = list(qs[:batch_size])
+        while batch:
+            rewrap_secrets(cipher, batch)
+            batch = list(qs.filter(pk__gt=batch[-1].pk)[:batch_size])
 
-    # rewrap all secrets
-    for secret in vault.secrets.all():
-        try:
-            plaintext = old_fernet.decrypt(bytes(secret.wrapped))
-        except Exception as e:
-            # If decrypt fails, skip or raise depending on policy; here we raise to avoid data loss
-            raise RuntimeError(f"Failed to decrypt secret {secret.id}: {e}")
-        # encrypt with new key
-        new_ct = new_fernet.encrypt(plaintext)
-        secret.wrapped = new_ct
-        secret.save(update_fields=["wrapped"])
-
-    # store new wrapped_key using root fernet
-    vault.wrapped_key = wrap_vault_key_with_root(new_vault_key_b64)
-    vault.last_rotated = now
-    vault.next_rotation = compute_next_rotation(now, vault.rotation_period)
-    vault.save(update_fields=["wrapped_key", "last_rotated", "next_rotation"])
+        # store new wrapped_key using root fernet
+        vault.wrapped_key = wrap_vault_key_with_root(new_vault_key_b64)
+        vault.pending_wrapped_key = None
+        vault.key_version = cipher.version
+        vault.previous_wrapped_keys = {}
+        vault.last_rotated = now
+        vault.next_rotation = compute_next_rotation(now, vault.rotation_period)
+        vault.save(update_fields=["wrapped_key", "pending_wrapped_key", "key_version", "previous_wrapped_keys",
+                                  "last_rotated", "next_rotation"])
+        # drop the old key once the new one is committed
+        transaction.on_commit(lambda: vault_key_cache.pop(vault.id))
     return vault
@@ -1,127 +1,477 @@
 # backend/demo/views.py
-import os, base64
-from .serializers import VaultSerializer, CreateVaultSerializer
-from . import utils
+import os, base64, io, json, uuid
+from .serializers import VaultSerializer, CreateVaultSerializer, SecretMetadataSerializer, RotationJobSerializer
+from backend.offload import AsyncAPIView, PoolBusy, busy_response, crypto_pool
+from backend.pagination import KeysetPagination
+from backend import wire
+from backend.wire import BinaryWireMixin
+from . import access, aeadstream, jobs, keycache, utils
+from .keypool import DEFAULT_KEY_SIZE, KEY_SIZES, generate_pem, rsa_key_pool
+from .streams import iter_json_array, iter_ndjson, streaming_response, StreamItemError
+from .rootkeys import root_keys
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from .models import WrappedSecret, Vault
+from .models import RegisteredPublicKey, RotationJob, WrappedSecret, Vault
 from django.utils import timezone
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-from cryptography.hazmat.primitives import serialization, hashes
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.fernet import Fernet
 
 
 
-# helper: get vault master key as bytes. If not present, derive from SECRET_KEY
+# helper: get vault master key as bytes. If not present, derive from SECRET_KEY.
+# Parsed once per process by the root key provider (see rootkeys.py).
 def get_master_key():
-    mk = os.getenv("VAULT_MASTER_KEY")
-    if mk:
-        # ensure it's 32-bytes base64 or a raw passphrase — for demo we'll derive a fernet key
-        if len(mk) == 44 and mk.endswith('='):
-            return mk.encode('utf-8')
-        # derive a fernet key from passphrase
-        return base64.urlsafe_b64encode(mk.encode('utf-8').ljust(32, b'0')[:32])
-    # fallback: use Django SECRET_KEY
-    sk = settings.SECRET_KEY
-    return base64.urlsafe_b64encode(sk.encode('utf-8').ljust(32, b'0')[:32])
+    return root_keys.master_key()
+
+# Crypto and vault secret views also speak MessagePack (binary fields as raw bytes
+# instead of base64) and application/octet-stream for their single blob field;
+# JSON stays the default (see backend/wire.py).
+def not_utf8_body(field):
+    return {"error": f"{field}_not_utf8",
+            "detail": "not valid UTF-8 text; request application/msgpack or application/octet-stream"}
 
 # Symmetric AES-GCM encrypt
-class SymmetricEncryptView(APIView):
+class SymmetricEncryptView(BinaryWireMixin, APIView):
+    """octet-stream: the body is the plaintext."""
     permission_classes = [permissions.IsAuthenticated]
+    blob_in = "plaintext"
     def post(self, request):
-        plaintext = request.data.get('plaintext','').encode('utf-8')
+        plaintext = wire.text_in(request.data.get('plaintext',''))
         # generate random 256-bit key for demo and return it to user (in real system keys are kept secret)
         key = AESGCM.generate_key(bit_length=256)
         aesgcm = AESGCM(key)
         nonce = os.urandom(12)
         ct = aesgcm.encrypt(nonce, plaintext, None)
         return Response({
-            "key": base64.b64encode(key).decode('utf-8'),
-            "nonce": base64.b64encode(nonce).decode('utf-8'),
-            "ciphertext": base64.b64encode(ct).decode('utf-8'),
+            "key": wire.blob_out(request, key),
+            "nonce": wire.blob_out(request, nonce),
+            "ciphertext": wire.blob_out(request, ct),
         })
 
-class SymmetricDecryptView(APIView):
+class SymmetricDecryptView(BinaryWireMixin, APIView):
+    """Accept: application/octet-stream returns the plaintext as the body."""
     permission_classes = [permissions.IsAuthenticated]
+    blob_out = "plaintext"
     def post(self, request):
-        key_b64 = request.data.get('key')
-        nonce_b64 = request.data.get('nonce')
-        ct_b64 = request.data.get('ciphertext')
-        if not (key_b64 and nonce_b64 and ct_b64):
+        key_in = request.data.get('key')
+        nonce_in = request.data.get('nonce')
+        ct_in = request.data.get('ciphertext')
+        if not (key_in and nonce_in and ct_in):
             return Response({"error":"missing_fields"}, status=status.HTTP_400_BAD_REQUEST)
-        key = base64.b64decode(key_b64)
-        nonce = base64.b64decode(nonce_b64)
-        ct = base64.b64decode(ct_b64)
-        aesgcm = AESGCM(key)
         try:
+            key = wire.blob_in(key_in)
+            nonce = wire.blob_in(nonce_in)
+            ct = wire.blob_in(ct_in)
+        except ValueError:
+            return Response({"error":"invalid_encoding"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            aesgcm = AESGCM(key)
             pt = aesgcm.decrypt(nonce, ct, None)
         except Exception as e:
             return Response({"error":"decrypt_failed", "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        return Response({"plaintext": pt.decode('utf-8')})
+        try:
+            return Response({"plaintext": wire.text_out(request, pt, "plaintext")})
+        except UnicodeDecodeError:
+            return Response(not_utf8_body("plaintext"), status=status.HTTP_406_NOT_ACCEPTABLE)
+
+# Streaming AES-GCM for large payloads: raw binary body in, chunked AEAD stream out
+# (framing in aeadstream.py), O(chunk) memory. The key travels base64 in the
+# X-Encryption-Key header (returned on encrypt, required on decrypt).
+def _stream_key(request, required):
+    raw = request.headers.get("X-Encryption-Key")
+    if not raw:
+        return None if required else AESGCM.generate_key(bit_length=256)
+    try:
+        key = base64.b64decode(raw, validate=True)
+    except ValueError:
+        return None
+    return key if len(key) in (16, 24, 32) else None
+
+def _request_stream(request):
+    # empty body: DRF gives no stream
+    return request.stream if request.stream is not None else io.BytesIO(b"")
+
+class SymmetricEncryptStreamView(APIView):
+    """
+    POST raw bytes (any content type); the response body is the chunked AES-GCM
+    ciphertext. Optional: X-Encryption-Key request header (base64 AES key, else a
+    random 256-bit key is generated), ?chunk_size= (default 64 KiB).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    def post(self, request):
+        key = _stream_key(request, required=False)
+        if key is None:
+            return Response({"error":"invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            chunk_size = int(request.query_params.get("chunk_size") or aeadstream.DEFAULT_CHUNK_SIZE)
+            aeadstream.make_header(chunk_size)
+        except ValueError:
+            return Response({"error":"invalid_chunk_size", "min": aeadstream.MIN_CHUNK_SIZE,
+                             "max": aeadstream.MAX_CHUNK_SIZE}, status=status.HTTP_400_BAD_REQUEST)
+        body = aeadstream.encrypt_stream(key, _request_stream(request), chunk_size)
+        response = streaming_response(request, body, "application/octet-stream")
+        response["X-Encryption-Key"] = base64.b64encode(key).decode('utf-8')
+        response["X-Chunk-Size"] = str(chunk_size)
+        return response
+
+class SymmetricDecryptStreamView(APIView):
+    """
+    POST a chunked AES-GCM stream with its key in X-Encryption-Key; the response body
+    is the plaintext. A wrong key, bad header or bytes after the final chunk is a 400;
+    tampering detected after the first chunk aborts the response, so clients must treat
+    an incomplete body as failure.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    def post(self, request):
+        key = _stream_key(request, required=True)
+        if key is None:
+            return Response({"error":"invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            body = aeadstream.open_decrypt_stream(key, _request_stream(request))
+        except aeadstream.ChunkedAEADError as e:
+            return Response({"error":"decrypt_failed", "detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return streaming_response(request, body, "application/octet-stream")
 
 # Asymmetric RSA generate/sign/verify
-class RSAKeyGenView(APIView):
+# The crypto itself lives in plain functions so the sync views below and their async
+# variants (run on backend.offload.crypto_pool) share it.
+PSS_PADDING = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH)
+
+def parse_key_size(value):
+    """key_size request field -> int, or None if unsupported (default 2048)."""
+    if value in (None, ""):
+        return DEFAULT_KEY_SIZE
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return None
+    return size if size in KEY_SIZES else None
+
+def invalid_key_size_body():
+    return {"error": "invalid_key_size", "allowed": list(KEY_SIZES)}
+
+def rsa_sign(priv_pem: bytes, message: bytes) -> bytes:
+    private_key = keycache.load_private_key(priv_pem)
+    return private_key.sign(message, PSS_PADDING, hashes.SHA256())
+
+def rsa_verify(public_key, message: bytes, signature: bytes) -> bool:
+    try:
+        public_key.verify(signature, message, PSS_PADDING, hashes.SHA256())
+        return True
+    except Exception:
+        return False
+
+def rsa_verify_pem(pub_pem: bytes, message: bytes, signature: bytes) -> bool:
+    return rsa_verify(keycache.load_public_key(pub_pem), message, signature)
+
+class RSAKeyGenView(BinaryWireMixin, APIView):
+    """Key pairs come from the pre-generated pool (keypool.py); generated inline only when it is empty."""
     permission_classes = [permissions.IsAuthenticated]
     def post(self, request):
-        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
-        priv_pem = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        )
-        pub_pem = private_key.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        )
-        return Response({
-            "private_key": priv_pem.decode('utf-8'),
-            "public_key": pub_pem.decode('utf-8')
-        })
+        key_size = parse_key_size(request.data.get('key_size'))
+        if key_size is None:
+            return Response(invalid_key_size_body(), status=status.HTTP_400_BAD_REQUEST)
+        pair = rsa_key_pool.take(key_size) or generate_pem(key_size)
+        return Response({**pair, "key_size": key_size})
 
-class RSASignView(APIView):
+class RSASignView(BinaryWireMixin, APIView):
+    """Accept: application/octet-stream returns the signature as the body."""
     permission_classes = [permissions.IsAuthenticated]
+    blob_out = "signature"
     def post(self, request):
-        priv_pem = request.data.get('private_key').encode('utf-8')
-        message = request.data.get('message','').encode('utf-8')
-        private_key = serialization.load_pem_private_key(priv_pem, password=None)
-        signature = private_key.sign(
-            message,
-            padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
-            hashes.SHA256()
-        )
-        return Response({"signature": base64.b64encode(signature).decode('utf-8')})
+        if not request.data.get('private_key'):
+            return Response({"error": "private_key_required"}, status=status.HTTP_400_BAD_REQUEST)
+        priv_pem = wire.text_in(request.data['private_key'])
+        message = wire.text_in(request.data.get('message',''))
+        try:
+            signature = rsa_sign(priv_pem, message)
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"signature": wire.blob_out(request, signature, "signature")})
 
-class RSAVerifyView(APIView):
+class RSAVerifyView(BinaryWireMixin, APIView):
+    """Verify with either public_key (PEM) or key_id of a key registered at /demo/rsa/keys/."""
     permission_classes = [permissions.AllowAny]
     def post(self, request):
-        pub_pem = request.data.get('public_key').encode('utf-8')
-        message = request.data.get('message','').encode('utf-8')
-        signature_b64 = request.data.get('signature')
-        signature = base64.b64decode(signature_b64)
-        public_key = serialization.load_pem_public_key(pub_pem)
-        try:
-            public_key.verify(
-                signature,
-                message,
-                padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
-                hashes.SHA256()
-            )
-            return Response({"valid": True})
-        except Exception:
+        message = wire.text_in(request.data.get('message',''))
+        try:
+            signature = wire.blob_in(request.data.get('signature'))
+        except ValueError:
             return Response({"valid": False})
+        key_id = request.data.get('key_id')
+        try:
+            if key_id:
+                public_key = keycache.registered_public_key(str(key_id))
+                if public_key is None:
+                    return Response({"error": "unknown_key_id"}, status=status.HTTP_404_NOT_FOUND)
+            else:
+                public_key = keycache.load_public_key(wire.text_in(request.data.get('public_key')))
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"valid": rsa_verify(public_key, message, signature)})
+
+class RSARegisterKeyView(APIView):
+    """
+    Register an RSA public key; returns its key_id for /demo/rsa/verify/.
+    Idempotent: the same key always gets the same key_id.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    def post(self, request):
+        pem = request.data.get('public_key')
+        if not pem:
+            return Response({"error": "public_key_required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(pem, str):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            public_key = keycache.load_public_key(pem.encode('utf-8'))
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(public_key, rsa.RSAPublicKey):
+            return Response({"error": "not_an_rsa_key"}, status=status.HTTP_400_BAD_REQUEST)
+        key_id = keycache.public_key_id(public_key)
+        obj, created = RegisteredPublicKey.objects.get_or_create(
+            key_id=key_id,
+            defaults={"owner": request.user, "public_key": pem, "key_size": public_key.key_size},
+        )
+        return Response({"key_id": key_id, "key_size": obj.key_size},
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+# Async variants (ASGI): the event loop awaits crypto_pool instead of computing, and
+# a saturated pool answers 503. Routed instead of the views above when
+# ASYNC_CRYPTO_VIEWS is on (see urls.py).
+class AsyncRSAKeyGenView(BinaryWireMixin, AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    async def post(self, request):
+        key_size = parse_key_size(request.data.get('key_size'))
+        if key_size is None:
+            return Response(invalid_key_size_body(), status=status.HTTP_400_BAD_REQUEST)
+        pair = rsa_key_pool.take(key_size)
+        if pair is None:
+            pair = await crypto_pool.run(generate_pem, key_size)
+        return Response({**pair, "key_size": key_size})
+
+class AsyncRSASignView(BinaryWireMixin, AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    blob_out = "signature"
+    async def post(self, request):
+        if not request.data.get('private_key'):
+            return Response({"error": "private_key_required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            signature = await crypto_pool.run(rsa_sign, wire.text_in(request.data['private_key']),
+                                              wire.text_in(request.data.get('message', '')))
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"signature": wire.blob_out(request, signature, "signature")})
+
+class AsyncRSAVerifyView(BinaryWireMixin, AsyncAPIView):
+    permission_classes = [permissions.AllowAny]
+    async def post(self, request):
+        data = request.data
+        key_id, pem = data.get('key_id'), data.get('public_key')
+        if not ((key_id or pem) and data.get('signature')):
+            return Response({"error": "missing_fields"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            signature = wire.blob_in(data['signature'])
+        except ValueError:
+            return Response({"valid": False})
+        message = wire.text_in(data.get('message', ''))
+        try:
+            if key_id:
+                key_id = str(key_id)
+                public_key = keycache.cached_registered_key(key_id)
+                if public_key is None:
+                    row = await RegisteredPublicKey.objects.filter(key_id=key_id).values_list("public_key", flat=True).afirst()
+                    if row is None:
+                        return Response({"error": "unknown_key_id"}, status=status.HTTP_404_NOT_FOUND)
+                    public_key = await crypto_pool.run(keycache.remember_registered_key, key_id, row)
+                valid = await crypto_pool.run(rsa_verify, public_key, message, signature)
+            else:
+                valid = await crypto_pool.run(rsa_verify_pem, wire.text_in(pem), message, signature)
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"valid": valid})
+
+# Batch sign / verify: one request for many messages. Keys are parsed once per
+# distinct key, items are fanned out over crypto_pool, and results come back in
+# input order; a bad item gets an "error" entry instead of failing the batch.
+RSA_BATCH_MAX_ITEMS = 1000
+
+def _sign_item(item):
+    private_key, message = item
+    if not isinstance(message, (str, bytes)):
+        return {"error": "message_must_be_string"}
+    try:
+        signature = private_key.sign(wire.text_in(message), PSS_PADDING, hashes.SHA256())
+    except Exception:
+        return {"error": "sign_failed"}
+    return {"signature": signature}
+
+def encode_signatures(request, results):
+    # raw signatures from _sign_item -> the response's wire encoding
+    return [{"signature": wire.blob_out(request, r["signature"])} if "signature" in r else r for r in results]
+
+def _verify_item(item):
+    public_key, message, signature = item
+    if isinstance(public_key, str):
+        # key resolution failed; public_key holds the error code
+        return {"error": public_key}
+    if not isinstance(message, (str, bytes)) or not isinstance(signature, (str, bytes)):
+        return {"error": "invalid_item"}
+    try:
+        signature = wire.blob_in(signature)
+    except ValueError:
+        return {"error": "invalid_signature_encoding"}
+    return {"valid": rsa_verify(public_key, wire.text_in(message), signature)}
+
+def parse_sign_batch(data):
+    """-> (private key PEM bytes, messages), or an error body."""
+    pem, messages = data.get('private_key'), data.get('messages')
+    if not pem or not isinstance(pem, (str, bytes)):
+        return {"error": "private_key_required"}
+    if not isinstance(messages, list) or not messages:
+        return {"error": "messages_required"}
+    if len(messages) > RSA_BATCH_MAX_ITEMS:
+        return {"error": "too_many_items", "max": RSA_BATCH_MAX_ITEMS}
+    return wire.text_in(pem), messages
+
+def parse_verify_batch(data):
+    """
+    Payload: {"public_key"|"key_id": ..., "items": [{"message", "signature"}, ...]}
+    where an item may name its own "public_key"/"key_id" (N triples).
+    -> (list of (key ref, message, signature), distinct key refs), or an error body.
+    A key ref is ("pem", value), ("key_id", value), None when the item has no key,
+    or False when the item is not an object.
+    """
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return {"error": "items_required"}
+    if len(items) > RSA_BATCH_MAX_ITEMS:
+        return {"error": "too_many_items", "max": RSA_BATCH_MAX_ITEMS}
+    def key_ref(obj):
+        if obj.get('key_id'):
+            return ("key_id", str(obj['key_id']))
+        if obj.get('public_key'):
+            return ("pem", str(obj['public_key']))
+        return None
+    default = key_ref(data)
+    parsed = []
+    for item in items:
+        if not isinstance(item, dict):
+            parsed.append((False, None, None))
+            continue
+        parsed.append((key_ref(item) or default, item.get('message', ''), item.get('signature')))
+    refs = {ref for ref, _, _ in parsed if ref}
+    return parsed, refs
+
+def uncached_key_ids(refs):
+    return [value for kind, value in refs if kind == "key_id" and keycache.cached_registered_key(value) is None]
+
+def resolve_verify_keys(refs, registered_pems):
+    """
+    Parse each distinct key once. registered_pems maps uncached key_ids to their PEM.
+    -> {ref: key object, or an error code string}
+    """
+    keys = {}
+    for ref in refs:
+        kind, value = ref
+        try:
+            if kind == "key_id":
+                key = keycache.cached_registered_key(value)
+                if key is None:
+                    pem = registered_pems.get(value)
+                    key = keycache.remember_registered_key(value, pem) if pem else "unknown_key_id"
+            else:
+                key = keycache.load_public_key(value.encode('utf-8'))
+        except (ValueError, TypeError):
+            key = "invalid_key"
+        keys[ref] = key
+    return keys
+
+def verify_batch_work(parsed, keys):
+    errors = {None: "key_required", False: "invalid_item"}
+    return [(keys[ref] if ref else errors[ref], message, signature) for ref, message, signature in parsed]
+
+class RSABatchSignView(BinaryWireMixin, APIView):
+    """{"private_key": PEM, "messages": [...]} -> {"results": [{"signature"} | {"error"}, ...]}"""
+    permission_classes = [permissions.IsAuthenticated]
+    def post(self, request):
+        parsed = parse_sign_batch(request.data)
+        if isinstance(parsed, dict):
+            return Response(parsed, status=status.HTTP_400_BAD_REQUEST)
+        pem, messages = parsed
+        try:
+            private_key = keycache.load_private_key(pem)
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            results = crypto_pool.run_batch_sync(_sign_item, [(private_key, m) for m in messages])
+        except PoolBusy:
+            return busy_response()
+        return Response({"results": encode_signatures(request, results)})
+
+class RSABatchVerifyView(BinaryWireMixin, APIView):
+    """See parse_verify_batch for the payload. -> {"results": [{"valid"} | {"error"}, ...]}"""
+    permission_classes = [permissions.AllowAny]
+    def post(self, request):
+        parsed = parse_verify_batch(request.data)
+        if isinstance(parsed, dict):
+            return Response(parsed, status=status.HTTP_400_BAD_REQUEST)
+        items, refs = parsed
+        pems = dict(RegisteredPublicKey.objects.filter(key_id__in=uncached_key_ids(refs))
+                    .values_list("key_id", "public_key"))
+        keys = resolve_verify_keys(refs, pems)
+        try:
+            results = crypto_pool.run_batch_sync(_verify_item, verify_batch_work(items, keys))
+        except PoolBusy:
+            return busy_response()
+        return Response({"results": results})
+
+class AsyncRSABatchSignView(BinaryWireMixin, AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    async def post(self, request):
+        parsed = parse_sign_batch(request.data)
+        if isinstance(parsed, dict):
+            return Response(parsed, status=status.HTTP_400_BAD_REQUEST)
+        pem, messages = parsed
+        try:
+            private_key = await crypto_pool.run(keycache.load_private_key, pem)
+        except (ValueError, TypeError):
+            return Response({"error": "invalid_key"}, status=status.HTTP_400_BAD_REQUEST)
+        results = await crypto_pool.run_batch(_sign_item, [(private_key, m) for m in messages])
+        return Response({"results": encode_signatures(request, results)})
+
+class AsyncRSABatchVerifyView(BinaryWireMixin, AsyncAPIView):
+    permission_classes = [permissions.AllowAny]
+    async def post(self, request):
+        parsed = parse_verify_batch(request.data)
+        if isinstance(parsed, dict):
+            return Response(parsed, status=status.HTTP_400_BAD_REQUEST)
+        items, refs = parsed
+        pems = {key_id: pem async for key_id, pem in
+                RegisteredPublicKey.objects.filter(key_id__in=uncached_key_ids(refs)).values_list("key_id", "public_key")}
+        keys = await crypto_pool.run(resolve_verify_keys, refs, pems)
+        results = await crypto_pool.run_batch(_verify_item, verify_batch_work(items, keys))
+        return Response({"results": results})
 
 class VaultListCreateView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        qs = Vault.objects.filter(owner=request.user)
-        ser = VaultSerializer(qs, many=True)
-        return Response(ser.data)
+        qs = Vault.objects.filter(owner=request.user).annotate(secret_count=Count("secrets"))
+        # keyset pagination: ?page_size=N&cursor=...
+        paginator = KeysetPagination(time_field="created_at")
+        page = paginator.paginate_queryset(qs, request, view=self)
+        ser = VaultSerializer(page, many=True)
+        return paginator.get_paginated_response(ser.data)
 
     def post(self, request):
         """
@@ -131,6 +481,7 @@ class VaultListCreateView(APIView):
          "name": "my vault",
          "managed": true/false,
          "rotation_period": "monthly"/"yearly"/"none",
+         "secret_name_policy": "versioned"/"unique",
          "key_b64": optional base64 URL-safe key if user supplies their own (44 chars)
         }
         """
@@ -139,6 +490,7 @@ class VaultListCreateView(APIView):
         name = s.validated_data["name"]
         managed = s.validated_data["managed"]
         rotation_period = s.validated_data["rotation_period"]
+        secret_name_policy = s.validated_data["secret_name_policy"]
         key_b64 = s.validated_data.get("key_b64", "").strip()
 
         # Validate key_b64 if provided
@@ -153,7 +505,8 @@ class VaultListCreateView(APIView):
         if not managed and not key_b64:
             return Response({"error":"unmanaged_vault_requires_key"}, status=status.HTTP_400_BAD_REQUEST)
 
-        vault = Vault(owner=request.user, name=name, managed=managed, rotation_period=rotation_period)
+        vault = Vault(owner=request.user, name=name, managed=managed, rotation_period=rotation_period,
+                      secret_name_policy=secret_name_policy)
 
         # Determine vault key to use
         if key_b64:
@@ -167,6 +520,7 @@ class VaultListCreateView(APIView):
         vault.last_rotated = timezone.now()
         vault.next_rotation = utils.compute_next_rotation(vault.last_rotated, vault.rotation_period) if vault.managed else None
         vault.save()
+        vault.secret_count = 0
         ser = VaultSerializer(vault)
         return Response(ser.data, status=status.HTTP_201_CREATED)
 
@@ -174,9 +528,7 @@ class VaultDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request, vault_id):
-        vault = get_object_or_404(Vault, id=vault_id)
-        if vault.owner != request.user and request.user.profile.role != "admin":
-            return Response({"error":"forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        vault = access.get_vault(request, vault_id, Vault.objects.annotate(secret_count=Count("secrets")))
         ser = VaultSerializer(vault)
         return Response(ser.data)
 
@@ -186,55 +538,309 @@ class VaultRotateView(APIView):
     def post(self, request, vault_id):
         """
         Manual trigger of rotation. Allowed for owner of the vault or admin.
+        Returns 202 with the (new or already running) RotationJob.
+        With {"mode": "lazy"} (default when VAULT_LAZY_ROTATION is on) the new key is made
+        current right away and secrets move to it as they are read or swept; returns 200
+        with the vault.
         """
-        vault = get_object_or_404(Vault, id=vault_id)
-        if vault.owner != request.user and request.user.profile.role != "admin":
-            return Response({"error":"forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        vault = access.get_vault(request, vault_id)
         if not vault.managed:
             return Response({"error":"vault_not_managed"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            utils.rotate_vault(vault)
-        except Exception as e:
-            return Response({"error":"rotation_failed", "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return Response({"detail":"rotated", "next_rotation": vault.next_rotation})
+        if not vault.wrapped_key:
+            return Response({"error":"rotation_failed", "detail": "Vault has no wrapped_key to rotate"}, status=status.HTTP_400_BAD_REQUEST)
+        mode = request.data.get("mode") or ("lazy" if getattr(settings, "VAULT_LAZY_ROTATION", False) else "job")
+        if mode not in ("lazy", "job"):
+            return Response({"error":"invalid_mode", "allowed": ["lazy", "job"]}, status=status.HTTP_400_BAD_REQUEST)
+        if mode == "lazy":
+            try:
+                utils.rotate_vault_lazy(vault)
+            except RuntimeError as e:
+                return Response({"error":"rotation_failed", "detail": str(e)}, status=status.HTTP_409_CONFLICT)
+            vault.secret_count = WrappedSecret.objects.filter(vault_id=vault.id).count()
+            return Response({**VaultSerializer(vault).data, "mode": "lazy"})
+        # rotation runs as a background job; poll the status URL for progress
+        job = jobs.submit_rotation(vault, request.user)
+        ser = RotationJobSerializer(job)
+        return Response({**ser.data, "status_url": request.build_absolute_uri(
+            reverse("vault-rotation-job", kwargs={"vault_id": vault.id, "job_id": job.id}))},
+            status=status.HTTP_202_ACCEPTED)
+
+class VaultRotationJobView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, vault_id, job_id):
+        """Progress of a rotation job (state, secrets processed/total, timestamps, error)."""
+        vault = access.get_vault(request, vault_id)
+        job = get_object_or_404(RotationJob, id=job_id, vault=vault)
+        return Response(RotationJobSerializer(job).data)
 
-class VaultStoreSecretView(APIView):
+SECRET_NAME_MAX_LENGTH = WrappedSecret._meta.get_field("name").max_length
+
+def secret_name_error(name):
+    """Error code for a secret name that cannot be stored, or None."""
+    if not isinstance(name, str) or not name:
+        return "invalid_name"
+    if len(name) > SECRET_NAME_MAX_LENGTH:
+        return "name_too_long"
+    return None
+
+class VaultStoreSecretView(BinaryWireMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    blob_in = "value"
+
+    def get(self, request, vault_id):
+        """
+        List the secrets of a vault (metadata only: id, name, version, created_at),
+        keyset-paginated with ?page_size=N&cursor=... The ciphertext column is never fetched.
+        """
+        vault = access.get_vault(request, vault_id)
+        qs = WrappedSecret.objects.filter(vault_id=vault.id).only("id", "name", "version", "created_at")
+        paginator = KeysetPagination(time_field="created_at")
+        page = paginator.paginate_queryset(qs, request, view=self)
+        ser = SecretMetadataSerializer(page, many=True)
+        return paginator.get_paginated_response(ser.data)
 
     def post(self, request, vault_id):
         """
         Store a secret in the vault. Payload:
         { "name": "api-key", "value": "secret-value" }
+        With Content-Type: application/octet-stream the body is the value and the
+        name goes in ?name=.
         """
-        vault = get_object_or_404(Vault, id=vault_id)
-        if vault.owner != request.user and request.user.profile.role != "admin":
-            return Response({"error":"forbidden"}, status=status.HTTP_403_FORBIDDEN)
+        vault = access.get_vault(request, vault_id)
 
         name = request.data.get("name")
         value = request.data.get("value")
         if not name or value is None:
             return Response({"error":"name_and_value_required"}, status=status.HTTP_400_BAD_REQUEST)
+        error = secret_name_error(name)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
-        # unwrap vault key and use it to encrypt value
-        vault_key_b64 = utils.unwrap_vault_key_with_root(vault.wrapped_key)
-        f = Fernet(vault_key_b64)
-        wrapped = f.encrypt(value.encode("utf-8"))
-        secret = WrappedSecret.objects.create(vault=vault, name=name, wrapped=wrapped)
-        return Response({"id": secret.id, "name": secret.name, "created_at": secret.created_at})
+        # unwrapped vault key (cached) wraps the value's fresh data key
+        cipher = utils.vault_cipher(vault)
+        wrapped, wrapped_dek = cipher.encrypt(wire.text_in(value))
+        try:
+            secret = utils.create_secret(vault, cipher, name, wrapped, wrapped_dek)
+        except utils.SecretNameTaken:
+            return Response({"error":"name_exists"}, status=status.HTTP_409_CONFLICT)
+        return Response({"id": secret.id, "name": secret.name, "version": secret.version, "created_at": secret.created_at})
 
-class VaultRetrieveSecretView(APIView):
+class VaultRetrieveSecretView(BinaryWireMixin, APIView):
+    """Accept: application/octet-stream returns the value as the body."""
     permission_classes = [permissions.IsAuthenticated]
+    blob_out = "value"
 
     def get(self, request, vault_id, secret_id):
-        vault = get_object_or_404(Vault, id=vault_id)
-        if vault.owner != request.user and request.user.profile.role != "admin":
-            return Response({"error":"forbidden"}, status=status.HTTP_403_FORBIDDEN)
-        secret = get_object_or_404(WrappedSecret, id=secret_id, vault=vault)
-        vault_key_b64 = utils.unwrap_vault_key_with_root(vault.wrapped_key)
-        f = Fernet(vault_key_b64)
-        try:
-            plaintext = f.decrypt(bytes(secret.wrapped)).decode("utf-8")
+        # vault and secret in one query
+        secret = access.get_secret(request, vault_id, secret_id)
+        vault = secret.vault
+        cipher = utils.vault_cipher(vault)
+        try:
+            plaintext = cipher.decrypt(secret.wrapped, secret.wrapped_dek)
+        except Exception as e:
+            return Response({"error":"unwrap_failed", "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # lazy rotation: a secret still on an older key version moves to the current one
+        utils.refresh_stale_secret(vault, cipher, secret)
+        try:
+            value = wire.text_out(request, plaintext, "value")
+        except UnicodeDecodeError:
+            return Response(not_utf8_body("value"), status=status.HTTP_406_NOT_ACCEPTABLE)
+        return Response({"id": secret.id, "name": secret.name, "version": secret.version, "value": value})
+
+class VaultSecretByNameView(BinaryWireMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    blob_out = "value"
+
+    def get(self, request, vault_id, name):
+        """
+        Resolve a secret by name with one indexed query: the latest version,
+        or a specific one with ?version=N. Accept: application/octet-stream
+        returns the value as the body.
+        """
+        vault = access.get_vault(request, vault_id)
+        qs = WrappedSecret.objects.filter(vault_id=vault.id, name=name)
+        version = request.query_params.get("version")
+        if version is not None:
+            if not version.isdigit():
+                return Response({"error":"invalid_version"}, status=status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(version=int(version))
+        secret = qs.order_by("-version").first()
+        if secret is None:
+            return Response({"error":"not_found"}, status=status.HTTP_404_NOT_FOUND)
+        cipher = utils.vault_cipher(vault)
+        try:
+            plaintext = cipher.decrypt(secret.wrapped, secret.wrapped_dek)
         except Exception as e:
             return Response({"error":"unwrap_failed", "detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        return Response({"id": secret.id, "name": secret.name, "value": plaintext})
+        # lazy rotation: a secret still on an older key version moves to the current one
+        utils.refresh_stale_secret(vault, cipher, secret)
+        try:
+            value = wire.text_out(request, plaintext, "value")
+        except UnicodeDecodeError:
+            return Response(not_utf8_body("value"), status=status.HTTP_406_NOT_ACCEPTABLE)
+        return Response({"id": secret.id, "name": secret.name, "version": secret.version, "value": value})
+
+
 
+# upper bound on ids + names in one batch request
+BATCH_GET_MAX_ITEMS = 500
+
+class VaultBatchRetrieveSecretsView(BinaryWireMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, vault_id):
+        """
+        Fetch many secrets of one vault in a single call. Payload:
+        { "ids": ["<uuid>", ...], "names": ["api-key", ...] }
+        Secrets are loaded with one query and the vault key is unwrapped once.
+        Results come back in input order (ids first, then names); an item that
+        cannot be served carries an "error" (not_found, invalid_id, invalid_name...)
+        instead of failing the whole batch. Names resolve to their latest version.
+        """
+        vault = access.get_vault(request, vault_id)
+
+        ids = request.data.get("ids") or []
+        names = request.data.get("names") or []
+        if not isinstance(ids, list) or not isinstance(names, list):
+            return Response({"error":"ids_and_names_must_be_lists"}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids and not names:
+            return Response({"error":"ids_or_names_required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) + len(names) > BATCH_GET_MAX_ITEMS:
+            return Response({"error":"too_many_items", "max": BATCH_GET_MAX_ITEMS}, status=status.HTTP_400_BAD_REQUEST)
+
+        parsed = []  # (raw id, UUID or None)
+        for raw in ids:
+            try:
+                parsed.append((raw, uuid.UUID(str(raw))))
+            except ValueError:
+                parsed.append((raw, None))
+        valid_ids = [sid for _, sid in parsed if sid]
+        # (name, error code or None); non-strings are rejected, as by bulk ingest
+        names = [(n, secret_name_error(n)) for n in names]
+        valid_names = [n for n, error in names if error is None]
+
+        by_id, by_name = {}, {}
+        if valid_ids or valid_names:
+            qs = (WrappedSecret.objects
+                  .filter(vault_id=vault.id)
+                  .filter(Q(id__in=valid_ids) | Q(name__in=valid_names))
+                  .only("id", "name", "version", "wrapped", "wrapped_dek")
+                  .order_by("version"))
+            for secret in qs:
+                by_id[secret.id] = secret
+                by_name[secret.name] = secret  # ordered by version, so the latest wins
+
+        cipher = utils.vault_cipher(vault)
+        def render(secret, **ref):
+            if secret is None:
+                return {**ref, "error": "not_found"}
+            try:
+                plaintext = cipher.decrypt(secret.wrapped, secret.wrapped_dek)
+            except Exception:
+                return {**ref, "error": "unwrap_failed"}
+            try:
+                value = wire.text_out(request, plaintext)
+            except UnicodeDecodeError:
+                return {**ref, "error": "value_not_utf8"}
+            return {"id": secret.id, "name": secret.name, "version": secret.version, "value": value}
+
+        results = []
+        for raw, sid in parsed:
+            if sid is None:
+                results.append({"id": raw, "error": "invalid_id"})
+            else:
+                results.append(render(by_id.get(sid), id=raw))
+        for name, error in names:
+            if error:
+                results.append({"name": name, "error": error})
+            else:
+                results.append(render(by_name.get(name), name=name))
+        return Response({"results": results})
+
+
+# secrets encrypted and inserted per bulk_create during bulk ingest
+BULK_INGEST_CHUNK_SIZE = 1000
+
+class VaultBulkIngestSecretsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, vault_id):
+        """
+        Bulk-create secrets from a streamed body, either NDJSON
+        (Content-Type: application/x-ndjson, one {"name", "value"} object per line)
+        or a JSON array of such objects (Content-Type: application/json).
+        The body is read incrementally, encrypted with a single unwrapped vault key
+        and inserted with bulk_create in chunks; the response is streamed back as
+        NDJSON with one status line per item and a final summary line.
+        """
+        vault = access.get_vault(request, vault_id)
+
+        if request.stream is None:
+            return Response({"error":"empty_body"}, status=status.HTTP_400_BAD_REQUEST)
+        content_type = (request.content_type or "").split(";")[0].strip().lower()
+        if content_type in ("application/x-ndjson", "application/jsonl", "application/json-seq"):
+            items = iter_ndjson(request.stream)
+        elif content_type == "application/json":
+            items = iter_json_array(request.stream)
+        else:
+            return Response({"error":"unsupported_content_type"}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        cipher = utils.vault_cipher(vault)
+        response = streaming_response(request, self._ingest(vault, cipher, items), "application/x-ndjson")
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    def _ingest(self, vault, cipher, items):
+        created = failed = 0
+        chunk = []  # (item_no, WrappedSecret)
+
+        def flush():
+            nonlocal created, failed
+            lines = []
+            try:
+                rejected = utils.assign_secret_versions(vault, [secret for _, secret in chunk])
+                accepted = [(n, secret) for n, secret in chunk if secret.id not in rejected]
+                with transaction.atomic():
+                    # under the vault row lock, so a rotation since the cipher was built
+                    # cannot leave the chunk under a dropped key
+                    utils.settle_key_versions(utils.lock_vault(vault.pk), cipher, [secret for _, secret in accepted])
+                    WrappedSecret.objects.bulk_create([secret for _, secret in accepted])
+            except Exception as e:
+                failed += len(chunk)
+                lines = [{"item": n, "status": "error", "error": "insert_failed", "detail": str(e)} for n, _ in chunk]
+            else:
+                created += len(accepted)
+                failed += len(rejected)
+                for n, secret in chunk:
+                    if secret.id in rejected:
+                        lines.append({"item": n, "status": "error", "error": "name_exists"})
+                    else:
+                        lines.append({"item": n, "status": "created", "id": str(secret.id), "name": secret.name, "version": secret.version})
+            chunk.clear()
+            return "".join(json.dumps(line) + "\n" for line in lines)
+
+        try:
+            for item_no, item in items:
+                error = None
+                if isinstance(item, StreamItemError):
+                    error = str(item)
+                elif not isinstance(item, dict) or not item.get("name") or not isinstance(item.get("value"), str):
+                    error = "name_and_value_required"
+                else:
+                    error = secret_name_error(item["name"])
+                if error:
+                    failed += 1
+                    yield json.dumps({"item": item_no, "status": "error", "error": error}) + "\n"
+                    continue
+                wrapped, wrapped_dek = cipher.encrypt(item["value"].encode("utf-8"))
+                chunk.append((item_no, WrappedSecret(vault=vault, name=item["name"], wrapped=wrapped,
+                                                     wrapped_dek=wrapped_dek, key_version=cipher.version)))
+                if len(chunk) >= BULK_INGEST_CHUNK_SIZE:
+                    yield flush()
+        except StreamItemError as e:
+            # the JSON array framing is broken; nothing after this point can be read
+            yield json.dumps({"status": "error", "error": str(e)}) + "\n"
+        if chunk:
+            yield flush()
+        yield json.dumps({"summary": {"created": created, "failed": failed}}) + "\n"
@@ -0,0 +1,179 @@
+# backend/offload.py
+# Bounded worker pool for CPU-heavy crypto (RSA keygen, argon2, ...) called from
+# async views, plus the async DRF view base they use.
+#
+# Under ASGI, sync views all run on one thread (thread_sensitive sync_to_async), so
+# a 2048-bit keygen in a sync view stalls every other sync request. The async
+# variants await the pool instead; when more work is pending than the pool can
+# take, they answer 503 right away rather than queueing without bound. Under WSGI
+# every request has its own thread anyway, so the async views are only routed when
+# ASYNC_CRYPTO_VIEWS is on, which asgi.py does by default.
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework.views import APIView
+
+
+class PoolBusy(Exception):
+    """The pool already holds max_pending jobs."""
+
+
+def _apply(fn, chunk):
+    return [fn(item) for item in chunk]
+
+
+class CryptoPool:
+    """
+    Thread pool sized to the cores. OpenSSL (cryptography) and argon2-cffi release the
+    GIL while they compute, so threads run them in parallel without pickling keys to
+    worker processes.
+    - workers: threads (default: CPU count)
+    - max_pending: running + queued jobs accepted before run() raises PoolBusy
+    A job's slot is released when the job finishes, not when its caller stops waiting
+    (a cancelled request's job keeps running), so max_pending bounds the real queue.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 4
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crypto")
+            return self._executor
+
+    def _admit(self, jobs=1):
+        with self._lock:
+            if self.pending + jobs > self.max_pending:
+                self.rejected += 1
+                raise PoolBusy()
+            self.pending += jobs
+
+    def _release(self, jobs=1):
+        with self._lock:
+            self.pending -= jobs
+            self.completed += jobs
+
+    def _submit(self, fn, *args):
+        # for an admitted job: its slot is freed once the future is done (or cancelled
+        # before it started)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda f: self._release())
+        return future
+
+    def _submit_chunks(self, fn, chunks):
+        futures = []
+        try:
+            for chunk in chunks:
+                futures.append(self._submit(_apply, fn, chunk))
+        except BaseException:
+            # the failed chunk released its own slot; free the ones never submitted
+            unsubmitted = len(chunks) - len(futures) - 1
+            if unsubmitted:
+                self._release(unsubmitted)
+            raise
+        return futures
+
+    def _chunks(self, items):
+        # one job per worker at most; each job runs its slice sequentially
+        size = max(1, -(-len(items) // self.workers))
+        return [items[i:i + size] for i in range(0, len(items), size)]
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool and await its result. Raises PoolBusy when full."""
+        self._admit()
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    async def run_batch(self, fn, items):
+        """
+        fn(item) for every item, fanned out over the workers; results in input order.
+        fn should turn per-item failures into results, an exception fails the batch.
+        """
+        chunks = self._chunks(list(items))
+        if not chunks:
+            return []
+        self._admit(len(chunks))
+        futures = self._submit_chunks(fn, chunks)
+        done = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        return [result for chunk in done for result in chunk]
+
+    def run_batch_sync(self, fn, items):
+        """run_batch for sync callers (blocks until every chunk is done)."""
+        chunks = self._chunks(list(items))
+        if not chunks:
+            return []
+        self._admit(len(chunks))
+        futures = self._submit_chunks(fn, chunks)
+        return [result for future in futures for result in future.result()]
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+crypto_pool = CryptoPool(
+    workers=getattr(settings, "CRYPTO_POOL_WORKERS", 0) or None,
+    max_pending=getattr(settings, "CRYPTO_POOL_MAX_PENDING", 0) or None,
+)
+
+
+def busy_response():
+    response = JsonResponse({"error": "busy", "detail": "crypto workers are saturated, retry shortly"}, status=503)
+    response["Retry-After"] = "1"
+    return response
+
+
+class AsyncAPIView(APIView):
+    """
+    APIView whose handlers are coroutines (`async def post(self, request)`). Everything
+    DRF does before the handler (authentication, CSRF, permissions, throttling, content
+    negotiation) is APIView.initial() itself, run in a worker thread since it may query
+    the database; parsing, exceptions and rendering stay DRF's. The handler then awaits
+    crypto_pool without holding a thread. PoolBusy becomes a 503 with Retry-After.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # APIView.dispatch, with initial() off the event loop and the handler awaited
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PoolBusy):
+            return busy_response()
+        return super().handle_exception(exc)
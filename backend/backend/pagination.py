@@ -0,0 +1,118 @@
+# backend/pagination.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination, newest first, on (time_field, id).
+    Each page is one indexed range scan of page_size + 1 rows, so the cost does
+    not grow with how deep the client pages (unlike OFFSET).
+    - ?page_size=N (capped at max_page_size)
+    - ?cursor=<opaque> taken from the "next"/"previous" links of the response
+    Response body: {"next": url|null, "previous": url|null, "results": [...]}
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, time_field="created_at", page_size=None):
+        self.time_field = time_field
+        if page_size is not None:
+            self.page_size = page_size
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        try:
+            size = int(raw) if raw is not None else self.page_size
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj, reverse):
+        payload = {"t": getattr(obj, self.time_field).isoformat(), "i": str(obj.pk), "r": int(reverse)}
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, request):
+        """Return (timestamp, pk, reverse) or None; raise NotFound for a malformed cursor."""
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+            ts = parse_datetime(data["t"])
+            if ts is None:
+                raise ValueError("bad timestamp")
+            return ts, data["i"], bool(data.get("r"))
+        except (ValueError, TypeError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            try:
+                cursor = (cursor[0], queryset.model._meta.pk.to_python(cursor[1]), cursor[2])
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        tf = self.time_field
+        reverse = bool(cursor and cursor[2])
+
+        if cursor is None:
+            qs = queryset.order_by(f"-{tf}", "-pk")
+        elif not reverse:
+            # older than the cursor; the plain range filter lets the index bound the scan
+            ts, pk, _ = cursor
+            qs = (queryset.filter(**{f"{tf}__lte": ts})
+                  .filter(Q(**{f"{tf}__lt": ts}) | Q(**{tf: ts, "pk__lt": pk}))
+                  .order_by(f"-{tf}", "-pk"))
+        else:
+            # newer than the cursor: walk forward, then flip back to newest-first
+            ts, pk, _ = cursor
+            qs = (queryset.filter(**{f"{tf}__gte": ts})
+                  .filter(Q(**{f"{tf}__gt": ts}) | Q(**{tf: ts, "pk__gt": pk}))
+                  .order_by(tf, "pk"))
+
+        rows = list(qs[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
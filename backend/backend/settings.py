@@ -13,6 +13,7 @@ from backend import accounts
 
 '''added so that Django reads .env'''
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -37,13 +38,16 @@ def env_bool(key, default=False):
         return default
     return val.lower() in ("1", "true", "yes", "on")
 
+# `manage.py test`: a few defaults below differ so the suite runs without any .env
+TESTING = sys.argv[1:2] == ["test"]
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
 #SECRET_KEY = 'django-insecure-kc!v6z4xpqw1g$5%3b4m_xxy901lbcwc$44x6@ehs6ro@n%!e6'
-SECRET_KEY = os.getenv("SECRET_KEY")
+SECRET_KEY = os.getenv("SECRET_KEY") or ("django-insecure-test-only" if TESTING else None)
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -96,7 +100,10 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_HEADERS = list(default_headers) + [
     "X-CSRFToken",
+    "X-Encryption-Key",
 ]
+# streaming AES-GCM endpoints return the key / chunk size in headers
+CORS_EXPOSE_HEADERS = ["X-Encryption-Key", "X-Chunk-Size"]
 
 ROOT_URLCONF = 'backend.urls'
 
@@ -194,6 +201,79 @@ EMAIL_USE_TLS = env_bool("EMAIL_USE_TLS", False)
 EMAIL_USE_SSL = env_bool("EMAIL_USE_SSL", False)
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "security-sandbox@example.com")
 
+# Audit log (LogEvent) writer: buffered in memory and bulk-inserted by a background
+# thread; AUDIT_LOG_BUFFERED=False writes synchronously (the default under tests)
+AUDIT_LOG_BUFFERED = env_bool("AUDIT_LOG_BUFFERED", not TESTING)
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", 200) or 200)
+AUDIT_LOG_FLUSH_INTERVAL = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL", 1.0) or 1.0)
+AUDIT_LOG_MAX_QUEUE = int(os.getenv("AUDIT_LOG_MAX_QUEUE", 10000) or 10000)
+
+# Crypto endpoints (RSA keygen/sign/verify, argon2 hash-info): async views that run the
+# work on a bounded thread pool and answer 503 when it is saturated. They only pay off
+# under ASGI, so they are routed when ASYNC_CRYPTO_VIEWS is on, which asgi.py defaults
+# to (WSGI keeps the sync views). Workers default to the CPU count, max pending
+# (running + queued) to 4x workers.
+ASYNC_CRYPTO_VIEWS = env_bool("ASYNC_CRYPTO_VIEWS", False)
+CRYPTO_POOL_WORKERS = int(os.getenv("CRYPTO_POOL_WORKERS", 0) or 0)
+CRYPTO_POOL_MAX_PENDING = int(os.getenv("CRYPTO_POOL_MAX_PENDING", 0) or 0)
+
+# Pre-generated RSA key pairs for /demo/rsa/generate/: kept per key size (2048/3072/4096),
+# refilled by RSA_KEY_POOL_WORKERS background processes below the low-water mark
+RSA_KEY_POOL_TARGET = int(os.getenv("RSA_KEY_POOL_TARGET", 8) or 8)
+RSA_KEY_POOL_LOW_WATER = int(os.getenv("RSA_KEY_POOL_LOW_WATER", 3) or 3)
+RSA_KEY_POOL_WORKERS = int(os.getenv("RSA_KEY_POOL_WORKERS", 1) or 1)
+# Key sizes filled when a server process loads wsgi.py / asgi.py, so the first requests
+# hit the pool (empty = fill each size on its first request only)
+RSA_KEY_POOL_WARM = [int(s) for s in os.getenv("RSA_KEY_POOL_WARM", "2048").split(",") if s.strip()]
+
+# Parsed RSA keys cached by the sign/verify endpoints (entries / seconds)
+RSA_KEY_CACHE_SIZE = int(os.getenv("RSA_KEY_CACHE_SIZE", 1024) or 1024)
+RSA_KEY_CACHE_TTL = int(os.getenv("RSA_KEY_CACHE_TTL", 3600) or 3600)
+
+# Live log tail (GET /logs/stream/, ASGI only): max concurrent clients per process,
+# events buffered per slow client before dropping, idle keep-alive interval (seconds)
+LOG_STREAM_MAX_CLIENTS = int(os.getenv("LOG_STREAM_MAX_CLIENTS", 5000) or 5000)
+LOG_STREAM_QUEUE_SIZE = int(os.getenv("LOG_STREAM_QUEUE_SIZE", 256) or 256)
+LOG_STREAM_HEARTBEAT = int(os.getenv("LOG_STREAM_HEARTBEAT", 15) or 15)
+
+# LogEvent retention: `manage.py prune_logs` archives whole months older than
+# LOG_RETENTION_DAYS to LOG_ARCHIVE_DIR and drops them
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 90) or 90)
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR") or str(BASE_DIR / "log_archive")
+
+# Vault rotation: number of secrets re-encrypted per bulk UPDATE
+VAULT_ROTATION_BATCH_SIZE = int(os.getenv("VAULT_ROTATION_BATCH_SIZE", 500) or 500)
+
+# Lazy rotation: rotating only swaps in a new vault key; secrets move to it when read or
+# when `rotate_vaults` sweeps them (VAULT_SWEEP_BATCH_SIZE secrets per transaction,
+# VAULT_SWEEP_PAUSE seconds between batches to keep the sweep low priority)
+VAULT_LAZY_ROTATION = env_bool("VAULT_LAZY_ROTATION", False)
+VAULT_SWEEP_BATCH_SIZE = int(os.getenv("VAULT_SWEEP_BATCH_SIZE", 100) or 100)
+VAULT_SWEEP_PAUSE = float(os.getenv("VAULT_SWEEP_PAUSE", 0.1) or 0)
+# Seconds after a vault's last rotation before rotate_vaults may drop retired keys no
+# secret uses any more, so in-flight requests holding an older key finish first
+VAULT_RETIRED_KEY_GRACE = int(os.getenv("VAULT_RETIRED_KEY_GRACE", 3600) or 0)
+
+# Background rotation jobs: threads per web process, seconds without a heartbeat before
+# another worker may resume a job, and whether web processes run jobs at all
+# (False = only the run_rotation_jobs worker does)
+ROTATION_JOB_WORKERS = int(os.getenv("ROTATION_JOB_WORKERS", 2) or 2)
+ROTATION_JOB_STALE_SECONDS = int(os.getenv("ROTATION_JOB_STALE_SECONDS", 300) or 300)
+ROTATION_JOBS_IN_PROCESS = env_bool("ROTATION_JOBS_IN_PROCESS", True)
+
+# In-process cache of unwrapped vault keys (entries, seconds)
+VAULT_KEY_CACHE_SIZE = int(os.getenv("VAULT_KEY_CACHE_SIZE", 1024) or 1024)
+VAULT_KEY_CACHE_TTL = int(os.getenv("VAULT_KEY_CACHE_TTL", 300) or 300)
+
+# Seconds a user's effective role (Profile.role + unexpired PIM grants) stays in Django's
+# cache for permission checks; entries never outlive the grant they include, and are
+# dropped when a Profile or RoleRequest is saved (0 = resolve on every request). Unless
+# CACHES is a backend shared by all processes, the admin role is never cached.
+ROLE_CACHE_TTL = int(os.getenv("ROLE_CACHE_TTL", 60) or 0)
+
+# Tries allowed per email/SMS verification token before it is locked (a new token resets it)
+VERIFICATION_MAX_ATTEMPTS = int(os.getenv("VERIFICATION_MAX_ATTEMPTS", 5) or 5)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
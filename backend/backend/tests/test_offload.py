@@ -0,0 +1,145 @@
+# backend/tests/test_offload.py
+import asyncio
+import base64
+import threading
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, override_settings
+from django.urls import path
+
+from backend import wire
+from backend.accounts import views as accounts_views
+from backend.demo import views as demo_views
+from backend.offload import CryptoPool, PoolBusy, crypto_pool
+
+User = get_user_model()
+
+# the async views, whatever ASYNC_CRYPTO_VIEWS routed
+urlpatterns = [
+    path("rsa/sign/", demo_views.AsyncRSASignView.as_view()),
+    path("sync/rsa/sign/", demo_views.RSASignView.as_view()),
+    path("rsa/verify/", demo_views.AsyncRSAVerifyView.as_view()),
+    path("rsa:batchSign", demo_views.AsyncRSABatchSignView.as_view()),
+    path("password/hash-info/", accounts_views.AsyncPasswordHashInfoView.as_view()),
+]
+
+PEM = demo_views.generate_pem(2048)
+
+
+class CryptoPoolTests(SimpleTestCase):
+    def test_run_and_batch_order(self):
+        pool = CryptoPool(workers=2, max_pending=4)
+        self.assertEqual(async_to_sync(pool.run)(pow, 2, 10), 1024)
+        self.assertEqual(async_to_sync(pool.run_batch)(lambda x: x * x, range(7)), [x * x for x in range(7)])
+        self.assertEqual(pool.run_batch_sync(str, [1, 2, 3]), ["1", "2", "3"])
+        self.assertEqual(pool.stats()["pending"], 0)
+
+    def test_busy_when_full(self):
+        pool = CryptoPool(workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0)
+            with self.assertRaises(PoolBusy):
+                await pool.run(int)
+            release.set()
+            await first
+        async_to_sync(scenario)()
+        self.assertEqual((pool.stats()["rejected"], pool.stats()["pending"]), (1, 0))
+
+    def test_slot_held_until_job_finishes(self):
+        pool = CryptoPool(workers=1, max_pending=1)
+        release = threading.Event()
+
+        async def cancelled_caller():
+            task = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0.05)
+            task.cancel()
+        async_to_sync(cancelled_caller)()
+        # the job still runs: its slot is not free yet
+        self.assertEqual(pool.pending, 1)
+        release.set()
+        pool._get_executor().submit(int).result()
+        self.assertEqual(pool.pending, 0)
+
+
+@override_settings(ROOT_URLCONF=__name__,
+                   PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class AsyncAPIViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        self.basic = "Basic " + base64.b64encode(b"alice:pw").decode()
+
+    def sign(self, client, url="/rsa/sign/", **extra):
+        return client.post(url, {"private_key": PEM["private_key"], "message": "hi"},
+                           content_type="application/json", **extra)
+
+    def test_session_auth_enforces_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = self.sign(client)
+        self.assertEqual(response.status_code, 403)
+        self.assertIn("CSRF", response.json()["detail"])
+
+    def test_basic_auth(self):
+        self.assertEqual(self.sign(Client(enforce_csrf_checks=True), HTTP_AUTHORIZATION=self.basic).status_code, 200)
+
+    def test_failures_match_the_sync_view(self):
+        bad = "Basic " + base64.b64encode(b"alice:nope").decode()
+        for extra in ({}, {"HTTP_AUTHORIZATION": bad}):
+            response, expected = self.sign(self.client, **extra), self.sign(self.client, "/sync/rsa/sign/", **extra)
+            self.assertEqual((response.status_code, response.json()), (expected.status_code, expected.json()))
+            self.assertIn(response.status_code, (401, 403))
+
+    def test_allow_any_and_parse_errors(self):
+        response = self.client.post("/rsa/verify/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+    def test_sign_and_verify_round_trip_msgpack(self):
+        self.client.force_login(self.user)
+        response = self.client.post("/rsa/sign/", wire.packb({"private_key": PEM["private_key"], "message": b"hi"}),
+                                    content_type=wire.MSGPACK, HTTP_ACCEPT=wire.MSGPACK)
+        self.assertEqual(response["Content-Type"], wire.MSGPACK)
+        signature = wire.unpackb(response.content)["signature"]
+        self.assertIsInstance(signature, bytes)
+        response = self.client.post("/rsa/verify/", {"public_key": PEM["public_key"], "message": "hi",
+                                                     "signature": base64.b64encode(signature).decode()},
+                                    content_type="application/json")
+        self.assertEqual(response.json(), {"valid": True})
+
+    def test_octet_stream_blob_out(self):
+        self.client.force_login(self.user)
+        response = self.client.post("/rsa/sign/", {"private_key": PEM["private_key"], "message": "hi"},
+                                    content_type="application/json", HTTP_ACCEPT=wire.OCTET_STREAM)
+        self.assertEqual(response["Content-Type"], wire.OCTET_STREAM)
+        self.assertEqual(len(response.content), 256)
+
+    def test_pool_busy_is_503(self):
+        self.client.force_login(self.user)
+        with mock.patch.object(crypto_pool, "_admit", side_effect=PoolBusy()):
+            response = self.sign(self.client)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_password_hash_info_is_a_drf_response(self):
+        response = self.client.post("/password/hash-info/", {"password": "pw"}, content_type="application/json",
+                                    HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["hash"].startswith("$argon2"))
+        response = self.client.post("/password/hash-info/", {}, content_type="application/json")
+        self.assertEqual(response.json(), {"error": "password_required"})
+
+    def test_under_asgi(self):
+        async def scenario():
+            client = AsyncClient()
+            return await client.post("/rsa:batchSign", {"private_key": PEM["private_key"], "messages": ["a", 1]},
+                                     content_type="application/json", headers={"Authorization": self.basic})
+        response = async_to_sync(scenario)()
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertIn("signature", results[0])
+        self.assertEqual(results[1], {"error": "message_must_be_string"})
@@ -0,0 +1,63 @@
+# backend/tests/test_pagination.py
+import base64
+import json
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from backend.accounts.models import LogEvent
+from backend.pagination import KeysetPagination
+
+factory = APIRequestFactory()
+
+
+def cursor_of(link):
+    return parse_qs(urlparse(link).query)["cursor"][0]
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        # pairs of events share a timestamp, so the id breaks ties
+        self.events = [LogEvent.objects.create(event_type="test_event", timestamp=now - timedelta(seconds=n // 2))
+                       for n in range(7)]
+        self.newest_first = [e.pk for e in sorted(self.events, key=lambda e: (e.timestamp, e.pk), reverse=True)]
+
+    def page(self, **params):
+        paginator = KeysetPagination(time_field="timestamp", page_size=3)
+        rows = paginator.paginate_queryset(LogEvent.objects.all(), Request(factory.get("/logs/", params)))
+        return [r.pk for r in rows], paginator.get_next_link(), paginator.get_previous_link()
+
+    def test_walk_forward_and_back(self):
+        seen, pages, link = [], [], None
+        while True:
+            rows, link, previous = self.page(**({"cursor": cursor_of(link)} if link else {}))
+            seen += rows
+            pages.append((rows, previous))
+            if link is None:
+                break
+        self.assertEqual(seen, self.newest_first)
+        self.assertEqual([len(rows) for rows, _ in pages], [3, 3, 1])
+        self.assertIsNone(pages[0][1])
+        # "previous" from the last page is the middle page again
+        rows, next_link, _ = self.page(cursor=cursor_of(pages[2][1]))
+        self.assertEqual(rows, pages[1][0])
+        self.assertIsNotNone(next_link)
+
+    def test_page_size_is_capped(self):
+        paginator = KeysetPagination()
+        self.assertEqual(paginator.get_page_size(Request(factory.get("/", {"page_size": "10000"}))), 200)
+        self.assertEqual(paginator.get_page_size(Request(factory.get("/", {"page_size": "x"}))), 50)
+        self.assertEqual(paginator.get_page_size(Request(factory.get("/", {"page_size": "0"}))), 1)
+
+    def test_invalid_cursor(self):
+        bad_id = base64.urlsafe_b64encode(json.dumps({"t": timezone.now().isoformat(), "i": "nope"}).encode()).decode()
+        # not base64 JSON, a bad timestamp, a pk that is not a UUID
+        for cursor in ("garbage", "eyJ0IjoieCJ9", bad_id):
+            with self.assertRaises(NotFound):
+                self.page(cursor=cursor)
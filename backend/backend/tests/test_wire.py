@@ -0,0 +1,116 @@
+# backend/tests/test_wire.py
+import base64
+from unittest import mock
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from backend import wire
+from backend.demo import utils
+from backend.demo.keypool import rsa_key_pool
+from backend.demo.tests.factories import make_vault, store
+from backend.tests.test_offload import PEM
+
+User = get_user_model()
+
+
+class WireHelperTests(SimpleTestCase):
+    def test_blob_in(self):
+        self.assertEqual(wire.blob_in(b"\x00\x01"), b"\x00\x01")
+        self.assertEqual(wire.blob_in(base64.b64encode(b"\xff").decode()), b"\xff")
+        for bad in ("not base64!", None, 3):
+            with self.assertRaises(ValueError):
+                wire.blob_in(bad)
+
+    def test_msgpack_round_trip(self):
+        data = {"a": b"\x00\xff", "b": "text", "n": [1, None]}
+        self.assertEqual(wire.unpackb(wire.packb(data)), data)
+        with self.assertRaises(ValueError):
+            wire.unpackb(b"\xc1")
+
+
+class WireFormatViewTests(TestCase):
+    def setUp(self):
+        utils.vault_key_cache.clear()
+        self.user = User.objects.create_user(username="alice")
+        self.client.force_login(self.user)
+
+    def post(self, url, data, accept="application/json", content_type="application/json"):
+        body = wire.packb(data) if content_type == wire.MSGPACK else data
+        return self.client.post(url, body, content_type=content_type, HTTP_ACCEPT=accept)
+
+    def assertJSONFallback(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        return response.json()
+
+    # views without blob_out answer JSON (binary fields base64) to Accept: octet-stream
+
+    def test_encrypt_octet_stream_accept(self):
+        body = self.assertJSONFallback(self.post("/demo/symmetric/encrypt/", {"plaintext": "hi"}, wire.OCTET_STREAM))
+        key, nonce, ct = (base64.b64decode(body[f]) for f in ("key", "nonce", "ciphertext"))
+        self.assertEqual(AESGCM(key).decrypt(nonce, ct, None), b"hi")
+
+    def test_keygen_octet_stream_accept(self):
+        with mock.patch.object(rsa_key_pool, "take", return_value=dict(PEM)):
+            body = self.assertJSONFallback(self.post("/demo/rsa/generate/", {}, wire.OCTET_STREAM))
+        self.assertEqual((body["public_key"], body["key_size"]), (PEM["public_key"], 2048))
+
+    def test_batch_sign_octet_stream_accept(self):
+        body = self.assertJSONFallback(self.post("/demo/rsa:batchSign",
+                                                 {"private_key": PEM["private_key"], "messages": ["a"]},
+                                                 wire.OCTET_STREAM))
+        self.assertEqual(len(base64.b64decode(body["results"][0]["signature"])), 256)
+
+    def test_batch_verify_octet_stream_accept(self):
+        body = self.assertJSONFallback(self.post("/demo/rsa:batchVerify",
+                                                 {"items": [{"public_key": PEM["public_key"], "message": "a",
+                                                             "signature": base64.b64encode(b"x").decode()}]},
+                                                 wire.OCTET_STREAM))
+        self.assertEqual(body["results"], [{"valid": False}])
+
+    def test_vault_batch_get_octet_stream_accept(self):
+        vault = make_vault(self.user)
+        store(vault, "a", b"value")
+        body = self.assertJSONFallback(self.post(f"/demo/vaults/{vault.pk}/secrets:batchGet",
+                                                 {"names": ["a"]}, wire.OCTET_STREAM))
+        self.assertEqual(body["results"][0]["value"], "value")
+
+    # blob_out views return that field as the body
+
+    def test_decrypt_octet_stream(self):
+        key, nonce = AESGCM.generate_key(bit_length=256), b"\x00" * 12
+        ct = AESGCM(key).encrypt(nonce, b"\xffraw", None)
+        response = self.post("/demo/symmetric/decrypt/",
+                             {"key": key, "nonce": nonce, "ciphertext": ct}, wire.OCTET_STREAM, wire.MSGPACK)
+        self.assertEqual((response["Content-Type"], response.content), (wire.OCTET_STREAM, b"\xffraw"))
+        # JSON cannot carry non-UTF-8 plaintext
+        response = self.post("/demo/symmetric/decrypt/", {"key": key, "nonce": nonce, "ciphertext": ct},
+                             content_type=wire.MSGPACK)
+        self.assertEqual(response.status_code, 406)
+
+    def test_errors_stay_json(self):
+        response = self.post("/demo/symmetric/decrypt/", {}, wire.OCTET_STREAM)
+        self.assertEqual((response.status_code, response["Content-Type"]), (400, "application/json"))
+        self.assertEqual(response.json(), {"error": "missing_fields"})
+
+    def test_octet_stream_body_in(self):
+        response = self.client.post("/demo/symmetric/encrypt/", b"\x00raw", content_type=wire.OCTET_STREAM,
+                                    HTTP_ACCEPT=wire.MSGPACK)
+        body = wire.unpackb(response.content)
+        self.assertEqual(AESGCM(body["key"]).decrypt(body["nonce"], body["ciphertext"], None), b"\x00raw")
+        # views without blob_in refuse a raw body
+        response = self.client.post("/demo/rsa:batchSign", b"x", content_type=wire.OCTET_STREAM)
+        self.assertEqual(response.status_code, 400)
+
+    def test_vault_secret_binary_value(self):
+        vault = make_vault(self.user)
+        response = self.client.post(f"/demo/vaults/{vault.pk}/secrets/?name=blob", b"\xfe\x00",
+                                    content_type=wire.OCTET_STREAM)
+        self.assertEqual(response.status_code, 200)
+        url = f"/demo/vaults/{vault.pk}/secrets/{response.json()['id']}/"
+        response = self.client.get(url, HTTP_ACCEPT=wire.OCTET_STREAM)
+        self.assertEqual(response.content, b"\xfe\x00")
+        self.assertEqual(wire.unpackb(self.client.get(url, HTTP_ACCEPT=wire.MSGPACK).content)["value"], b"\xfe\x00")
+        self.assertEqual(self.client.get(url).status_code, 406)
@@ -0,0 +1,161 @@
+# backend/wire.py
+# Binary wire formats for the crypto endpoints, next to the default JSON.
+#
+# - application/msgpack: the same objects as the JSON API, but keys, nonces,
+#   ciphertexts and signatures travel as raw bytes instead of base64 strings.
+# - application/octet-stream: a single blob. Views that have one main binary input
+#   (blob_in) or output (blob_out) take/return just that field as the body; other
+#   request fields go in the query string. Errors still come back as JSON.
+#
+# JSON stays the default: it is picked whenever the client does not ask for a
+# binary format (Content-Type on requests, Accept on responses). Binary fields in
+# JSON bodies are base64 as before.
+import base64
+import datetime
+import decimal
+import uuid
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+MSGPACK = "application/msgpack"
+OCTET_STREAM = "application/octet-stream"
+BINARY_FORMATS = ("msgpack", "bin")
+
+
+def _msgpack_default(obj):
+    # the types DRF's JSON encoder handles that show up in our responses
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+def packb(data):
+    return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+def unpackb(body):
+    """MessagePack body -> object; raises ValueError on malformed input."""
+    try:
+        return msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise ValueError(str(e) or type(e).__name__)
+
+
+class MessagePackParser(BaseParser):
+    media_type = MSGPACK
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpackb(stream.read())
+        except ValueError as e:
+            raise ParseError(f"MessagePack parse error - {e}")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return packb(data)
+
+
+class OctetStreamParser(BaseParser):
+    """Raw body -> {view.blob_in: bytes}, query parameters as the other fields."""
+    media_type = OCTET_STREAM
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        view = (parser_context or {}).get("view")
+        field = getattr(view, "blob_in", None)
+        if field is None:
+            raise ParseError("This endpoint does not take a raw application/octet-stream body")
+        request = parser_context["request"]
+        data = request.query_params.dict()
+        data[field] = stream.read() if stream is not None else b""
+        return data
+
+
+class OctetStreamRenderer(BaseRenderer):
+    """
+    Body = the view's blob_out field of a successful response. Anything else
+    (errors, views without blob_out) falls back to JSON.
+    """
+    media_type = OCTET_STREAM
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        view, response = renderer_context.get("view"), renderer_context.get("response")
+        field = getattr(view, "blob_out", None)
+        if response is not None and response.status_code < 400 and isinstance(data, dict) and field in data:
+            value = data[field]
+            return value if isinstance(value, bytes) else str(value).encode("utf-8")
+        if response is not None:
+            response["Content-Type"] = "application/json"
+        return JSONRenderer().render(data, "application/json", renderer_context)
+
+
+class BinaryWireMixin:
+    """
+    Adds the binary parsers/renderers to an APIView (after the default JSON ones).
+    Set blob_in / blob_out to the field an octet-stream body maps to.
+    """
+    parser_classes = list(api_settings.DEFAULT_PARSER_CLASSES) + [MessagePackParser, OctetStreamParser]
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + [MessagePackRenderer, OctetStreamRenderer]
+    blob_in = None
+    blob_out = None
+
+
+def is_binary(request, field=None):
+    """
+    True when a response field travels as raw bytes: any field in MessagePack, but in
+    an octet-stream response only the view's blob_out (pass the field's name), since
+    everything else falls back to JSON there.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    fmt = renderer.format if renderer is not None else None
+    if fmt == "msgpack":
+        return True
+    view = (getattr(request, "parser_context", None) or {}).get("view")
+    return fmt == "bin" and field is not None and field == getattr(view, "blob_out", None)
+
+
+def blob_out(request, value: bytes, field=None):
+    """A binary response field (named field): raw bytes on a binary wire, base64 text in JSON."""
+    return value if is_binary(request, field) else base64.b64encode(value).decode("utf-8")
+
+
+def blob_in(value) -> bytes:
+    """A binary request field: raw bytes as sent, or base64 text. Raises ValueError."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    if not isinstance(value, str):
+        raise ValueError("expected bytes or a base64 string")
+    return base64.b64decode(value, validate=True)
+
+
+def text_in(value) -> bytes:
+    """A message/plaintext request field: raw bytes, or a string sent as UTF-8."""
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return str(value).encode("utf-8")
+
+
+def text_out(request, value: bytes, field=None):
+    """
+    A message/plaintext response field (named field): raw bytes on a binary wire, else
+    UTF-8 text. Raises UnicodeDecodeError when JSON cannot carry the bytes as text.
+    """
+    return value if is_binary(request, field) else value.decode("utf-8")
+
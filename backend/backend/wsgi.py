@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# server processes only: pre-generate RSA key pairs so the first keygen requests hit the pool
+from backend.demo.keypool import warm_from_settings  # noqa: E402
+
+warm_from_settings()
@@ -53,5 +53,10 @@ print('Superuser check done.')
 PY
 fi
 
-# Start development server (exec so signals are forwarded to Django)
+# Start development server (exec so signals are forwarded to Django).
+# ASGI_SERVER=1 serves backend.asgi with uvicorn instead; the live log tail
+# (/logs/stream/) only works under ASGI.
+if [ "${ASGI_SERVER:-0}" = "1" ]; then
+  exec uvicorn backend.asgi:application --host 0.0.0.0 --port 8000 --reload
+fi
 exec python manage.py runserver 0.0.0.0:8000
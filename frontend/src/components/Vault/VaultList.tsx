@@ -1,6 +1,6 @@
 // frontend/src/pages/Demo/VaultList.tsx
 import React, { useCallback, useEffect, useState } from "react";
-import { getJson, postJson } from "../../services/api";
+import { getJson, pageResults, postJson } from "../../services/api";
 import { useToast } from "../../components/ToastContext";
 import { useNavigate } from "react-router-dom";
 
@@ -43,7 +43,7 @@ export default function VaultList({ onSelect }: { onSelect?: (id: string) => voi
     const fetchVaults = useCallback(async () => {
         setLoading(true);
         try {
-            const res = await getJson("/demo/vaults/");
+            const res = pageResults(await getJson("/demo/vaults/?page_size=200"));
             if (Array.isArray(res)) setVaults(res as VaultSummary[]);
             else setVaults([]);
         } catch (err: unknown) {
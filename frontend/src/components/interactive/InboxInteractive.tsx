@@ -1,5 +1,5 @@
 import { useCallback, useEffect, useState } from "react";
-import { getJson } from "../../services/api";
+import { getJson, pageResults } from "../../services/api";
 import { useToast } from "../ToastContext";
 
 type InboxItem = {
@@ -26,7 +26,7 @@ export default function InboxInteractive() {
         setLoading(true);
         try {
             const q = filter === "all" ? "/inbox/" : `/inbox/?type=${filter}`;
-            const res = await getJson(q);
+            const res = pageResults(await getJson(q));
             if (Array.isArray(res)) {
                 // runtime-check items shape loosely
                 setItems(res as InboxItem[]);
@@ -1,6 +1,6 @@
 // frontend/src/components/interactive/LogsInteractive.tsx
 import { useEffect, useState, useCallback } from "react";
-import { getJson } from "../../services/api";
+import { getJson, pageResults } from "../../services/api";
 import { useToast } from "../ToastContext";
 
 type LogEvent = {
@@ -28,7 +28,7 @@ export default function LogsInteractive() {
     const fetchLogs = useCallback(async () => {
         setLoading(true);
         try {
-            const res = await getJson("/logs/");
+            const res = pageResults(await getJson("/logs/?page_size=200"));
             if (Array.isArray(res)) {
                 setLogs(res as LogEvent[]);
             } else {
@@ -82,7 +82,7 @@ export default function RBACInteractive() {
                     <button onClick={approve} className="btn-outline" disabled={loading}>Approve</button>
                 </div>
                 <div className="mt-2 text-sm text-gray-500">
-                    After approval, the user's Profile.role is set on the server for the demo expiry time (15 minutes). Check Logs → Refresh to confirm.
+                    After approval, the requested role is granted on the server until the demo expiry time (15 minutes) and then lapses on its own. Check Logs → Refresh to confirm.
                 </div>
             </div>
 
@@ -18,13 +18,14 @@ export default function RSA() {
     const [message, setMessage] = useState<string>("sign this");
     const [signature, setSignature] = useState<string | null>(null);
     const [verifyResult, setVerifyResult] = useState<boolean | null>(null);
+    const [keySize, setKeySize] = useState<number>(2048);
     const [loading, setLoading] = useState<boolean>(false);
     const toast = useToast();
 
     async function gen() {
         setLoading(true);
         try {
-            const res = await postJson("/demo/rsa/generate/", {});
+            const res = await postJson("/demo/rsa/generate/", { key_size: keySize });
             if (res && typeof res === "object" && "private_key" in res && "public_key" in res) {
                 setKeys(res as RSAKeys);
                 setSignature(null);
@@ -83,6 +84,9 @@ export default function RSA() {
     return (
         <div className="mt-4 form-card">
             <div className="flex gap-2">
+                <select className="border rounded px-2" value={keySize} onChange={(e) => setKeySize(Number(e.target.value))} disabled={loading}>
+                    {[2048, 3072, 4096].map((n) => <option key={n} value={n}>{n}-bit</option>)}
+                </select>
                 <button onClick={gen} className="btn-primary" disabled={loading}>Generate keys</button>
                 <button onClick={sign} className="btn-outline" disabled={!keys || loading}>Sign</button>
                 <button onClick={verify} className="btn-outline" disabled={!signature || loading}>Verify</button>
@@ -1,6 +1,6 @@
 // frontend/src/pages/Inbox.tsx
 import { useEffect, useState } from "react";
-import { getJson } from "../services/api";
+import { getJson, pageResults } from "../services/api";
 import { useToast } from "../components/ToastContext";
 import CopyButton from "../components/CopyButton";
 
@@ -22,7 +22,7 @@ export default function Inbox() {
         let mounted = true;
         (async () => {
             try {
-                const res = (await getJson("/inbox/")) as InboxItem[];
+                const res = pageResults(await getJson("/inbox/")) as InboxItem[] | null;
                 if (mounted) setItems(res ?? []);
             } catch (e) {
                 console.error(e);
@@ -1,6 +1,6 @@
 // frontend/src/pages/Logs.tsx
 import { useEffect, useState } from "react";
-import { getJson } from "../services/api";
+import { apiFetch, apiUrl, getJson, pageResults } from "../services/api";
 import { useToast } from "../components/ToastContext";
 
 type LogEvent = {
@@ -10,6 +10,27 @@ type LogEvent = {
     payload?: Record<string, unknown>;
 };
 
+const MAX_LOGS = 200;
+const STREAM_PATH = "/logs/stream/";
+const RETRY_MS = 5000;
+const MAX_RETRY_MS = 60000;
+
+// set once the server answered 501 (live tail needs the ASGI server); not retried until a reload
+let liveTailUnsupported = false;
+
+/** status of a fresh /logs/stream/ request, dropped as soon as the headers arrive (0 on network error) */
+async function streamStatus(): Promise<number> {
+    const controller = new AbortController();
+    try {
+        const r = await apiFetch(STREAM_PATH, { method: "GET", signal: controller.signal });
+        return r.status;
+    } catch {
+        return 0;
+    } finally {
+        controller.abort();
+    }
+}
+
 export default function Logs() {
     const [logs, setLogs] = useState<LogEvent[]>([]);
     const toast = useToast();
@@ -18,8 +39,11 @@ export default function Logs() {
         let mounted = true;
         (async () => {
             try {
-                const res = (await getJson("/logs/")) as LogEvent[];
-                if (mounted && Array.isArray(res)) setLogs(res);
+                const res = pageResults(await getJson(`/logs/?page_size=${MAX_LOGS}`)) as LogEvent[] | null;
+                if (mounted && Array.isArray(res)) {
+                    // keep anything the live tail delivered before the page arrived
+                    setLogs((prev) => [...prev, ...res.filter((r) => !prev.some((l) => l.id === r.id))].slice(0, MAX_LOGS));
+                }
             } catch (e) {
                 console.error(e);
                 toast.push("Failed to load logs", "error");
@@ -28,6 +52,53 @@ export default function Logs() {
         return () => { mounted = false; };
     }, [toast]);
 
+    useEffect(() => {
+        // live tail: new events are pushed over SSE instead of re-polling /logs/
+        if (typeof EventSource === "undefined" || liveTailUnsupported) return;
+        let source: EventSource | null = null;
+        let retryTimer: ReturnType<typeof setTimeout> | undefined;
+        let failures = 0;
+        let stopped = false;
+
+        const open = () => {
+            const es = new EventSource(apiUrl(STREAM_PATH), { withCredentials: true });
+            source = es;
+            es.addEventListener("open", () => { failures = 0; });
+            es.addEventListener("log", (e) => {
+                try {
+                    const ev = JSON.parse((e as MessageEvent).data) as LogEvent;
+                    setLogs((prev) => [ev, ...prev.filter((l) => l.id !== ev.id)].slice(0, MAX_LOGS));
+                } catch (err) {
+                    console.error(err);
+                }
+            });
+            es.addEventListener("error", () => {
+                // EventSource hides the status code: reconnect ourselves, after asking the server
+                // whether it can stream at all (a WSGI server answers 501 every time)
+                es.close();
+                if (stopped || source !== es) return;
+                source = null;
+                streamStatus().then((status) => {
+                    if (stopped) return;
+                    if (status === 501) {
+                        liveTailUnsupported = true;
+                        return;
+                    }
+                    const delay = Math.min(RETRY_MS * 2 ** failures, MAX_RETRY_MS);
+                    failures += 1;
+                    retryTimer = setTimeout(open, delay);
+                });
+            });
+        };
+
+        open();
+        return () => {
+            stopped = true;
+            clearTimeout(retryTimer);
+            source?.close();
+        };
+    }, []);
+
     return (
         <div>
             <h2 className="text-2xl text-primary-700 font-semibold">Logs</h2>
@@ -9,8 +9,13 @@ function readCookie(name: string): string | null {
     return v ? decodeURIComponent(v[2]) : null;
 }
 
+/** absolute or API_BASE-relative URL for a backend path */
+export function apiUrl(path: string): string {
+    return path.startsWith("http") ? path : `${API_BASE.replace(/\/$/, "")}${path}`;
+}
+
 export async function apiFetch(path: string, opts: RequestInit = {}) {
-    const url = path.startsWith("http") ? path : `${API_BASE.replace(/\/$/, "")}${path}`;
+    const url = apiUrl(path);
     const headers = new Headers(opts.headers ?? {});
     // if body present and content-type missing, assume JSON
     if (opts.method && opts.method !== "GET" && opts.method !== "HEAD") {
@@ -39,3 +44,12 @@ export async function postJson(path: string, body?: unknown): Promise<unknown> {
     if (!r.ok) throw { status: r.status, body: j } as ApiError;
     return j;
 }
+
+/** List endpoints are cursor-paginated ({ next, previous, results }); return the results array (or null). */
+export function pageResults(res: unknown): unknown[] | null {
+    if (Array.isArray(res)) return res;
+    if (res && typeof res === "object" && Array.isArray((res as { results?: unknown }).results)) {
+        return (res as { results: unknown[] }).results;
+    }
+    return null;
+}